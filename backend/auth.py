@@ -79,3 +79,14 @@ def verify_ws_api_key(key) -> bool:
     if not key:
         return False
     return verify_api_key(key)
+
+
+def api_key_weight(key: Optional[str]) -> float:
+    """Fair-queuing weight of a key: its optional "weight" entry, else 1."""
+    if not key:
+        return 1.0
+    try:
+        weight = float(_load_keys().get(key, {}).get("weight", 1.0))
+    except (TypeError, ValueError, AttributeError):
+        return 1.0
+    return weight if weight > 0 else 1.0
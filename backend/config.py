@@ -1,9 +1,17 @@
 import os
 from dotenv import load_dotenv
-from mistralai import Mistral
 
 load_dotenv()
 
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean feature flag from the environment."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 # Read Mistral API key from env var or fallback to secrets file
 DEMO_MODE = False
 MISTRAL_API_KEY = os.environ.get("MISTRAL_API_KEY")
@@ -22,13 +30,163 @@ if MISTRAL_API_KEY == "demo":
 
 AUDIO_MODEL = "voxtral-mini-latest"
 TEXT_MODEL = "mistral-large-latest"
-MAX_AUDIO_SIZE_MB = 25
+# Voxtral price per audio minute, for the cost estimate on /api/health
+AUDIO_COST_PER_MINUTE_USD = float(os.environ.get("AUDIO_COST_PER_MINUTE_USD", "0.001"))
+# Transcripts longer than MAX_TRANSCRIPT_LENGTH are scored in overlapping
+# chunks of that size, at most TRANSCRIPT_MAX_PARALLEL at a time, up to
+# MAX_TRANSCRIPT_TOTAL_LENGTH characters (the request schema allows 200000)
 MAX_TRANSCRIPT_LENGTH = 10000
+MAX_TRANSCRIPT_TOTAL_LENGTH = int(os.environ.get("MAX_TRANSCRIPT_TOTAL_LENGTH", "200000"))
+TRANSCRIPT_CHUNK_OVERLAP = int(os.environ.get("TRANSCRIPT_CHUNK_OVERLAP", "500"))
+TRANSCRIPT_MAX_PARALLEL = int(os.environ.get("TRANSCRIPT_MAX_PARALLEL", "4"))
+
+# Shared upstream HTTP client (connection pool for all Mistral API calls)
+MISTRAL_API_BASE_URL = os.environ.get("MISTRAL_API_BASE_URL", "https://api.mistral.ai")
+UPSTREAM_TIMEOUT_S = float(os.environ.get("UPSTREAM_TIMEOUT_S", "120"))
+UPSTREAM_MAX_CONNECTIONS = int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.environ.get("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY_S = float(os.environ.get("UPSTREAM_KEEPALIVE_EXPIRY_S", "30"))
+UPSTREAM_HTTP2 = _env_flag("UPSTREAM_HTTP2")
+
+# Upstream resilience: per-request deadlines cap every model call, connection
+# errors and 429/5xx are retried with jittered backoff while enough of the
+# deadline remains, and a per-model circuit breaker fails fast once recent
+# calls are mostly failing or slower than BREAKER_SLOW_CALL_S
+DEADLINE_AUDIO_S = float(os.environ.get("DEADLINE_AUDIO_S", "120"))
+DEADLINE_TRANSCRIPT_S = float(os.environ.get("DEADLINE_TRANSCRIPT_S", "60"))
+DEADLINE_STREAM_CHUNK_S = float(os.environ.get("DEADLINE_STREAM_CHUNK_S", "20"))
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", "2"))
+UPSTREAM_RETRY_BACKOFF_S = float(os.environ.get("UPSTREAM_RETRY_BACKOFF_S", "0.5"))
+UPSTREAM_RETRY_MIN_BUDGET_S = float(os.environ.get("UPSTREAM_RETRY_MIN_BUDGET_S", "5"))
+BREAKER_ENABLED = _env_flag("BREAKER_ENABLED", True)
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATIO = float(os.environ.get("BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_SLOW_CALL_S = float(os.environ.get("BREAKER_SLOW_CALL_S", "45"))
+BREAKER_OPEN_S = float(os.environ.get("BREAKER_OPEN_S", "30"))
+
+# Hedged requests for live stream chunks and transcripts: a duplicate call goes
+# out once the first has run past the model's rolling HEDGE_PERCENTILE latency
+# (after HEDGE_MIN_SAMPLES calls), on at most HEDGE_MAX_RATE of recent calls
+HEDGE_ENABLED = _env_flag("HEDGE_ENABLED")
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "90"))
+HEDGE_MAX_RATE = float(os.environ.get("HEDGE_MAX_RATE", "0.1"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+
+# Mistral Large second opinion on suspicious audio. In speculative mode the
+# text call starts as soon as Voxtral streams a complete transcript_summary.
+SECOND_OPINION_GATE = float(os.environ.get("SECOND_OPINION_GATE", "0.5"))
+SPECULATIVE_SECOND_OPINION = _env_flag("SPECULATIVE_SECOND_OPINION", True)
+
+# Content-addressed result cache. RESULT_CACHE_SHARED_DIR enables a
+# directory tier shared by every worker on the host, pruned back under
+# RESULT_CACHE_SHARED_MAX_BYTES as workers write to it.
+RESULT_CACHE_ENABLED = _env_flag("RESULT_CACHE_ENABLED", True)
+RESULT_CACHE_TTL_S = float(os.environ.get("RESULT_CACHE_TTL_S", "3600"))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "1024"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+RESULT_CACHE_SHARED_DIR = os.environ.get("RESULT_CACHE_SHARED_DIR", "")
+RESULT_CACHE_SHARED_MAX_BYTES = int(os.environ.get("RESULT_CACHE_SHARED_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Perceptual fingerprint index of scored recordings (seeded from demo/)
+FINGERPRINT_ENABLED = _env_flag("FINGERPRINT_ENABLED", True)
+FINGERPRINT_MIN_MATCHES = int(os.environ.get("FINGERPRINT_MIN_MATCHES", "20"))
+FINGERPRINT_MIN_MATCH_RATIO = float(os.environ.get("FINGERPRINT_MIN_MATCH_RATIO", "0.05"))
+FINGERPRINT_MIN_COVERAGE = float(os.environ.get("FINGERPRINT_MIN_COVERAGE", "0.8"))
+FINGERPRINT_MAX_DURATION_DIFF = float(os.environ.get("FINGERPRINT_MAX_DURATION_DIFF", "0.2"))
+FINGERPRINT_MAX_RECORDS = int(os.environ.get("FINGERPRINT_MAX_RECORDS", "500"))
+
+# Tier-0 phrase rules for transcripts. A higher threshold sends more
+# transcripts to the model (lower skip rate). RULES_PATH overrides the
+# bundled data/scam_rules.json.
+RULE_ENGINE_ENABLED = _env_flag("RULE_ENGINE_ENABLED", True)
+RULES_PATH = os.environ.get("RULES_PATH", "")
+RULE_SCAM_THRESHOLD = float(os.environ.get("RULE_SCAM_THRESHOLD", "0.95"))
+
+# Local hashed n-gram classifier cascade ahead of TEXT_MODEL. Probabilities
+# outside [LOCAL_SAFE_THRESHOLD, LOCAL_SCAM_THRESHOLD] are answered locally.
+# Off by default: the bundled model is a small bootstrap, not yet validated
+# on held-out data.
+LOCAL_CLASSIFIER_ENABLED = _env_flag("LOCAL_CLASSIFIER_ENABLED")
+LOCAL_CLASSIFIER_PATH = os.environ.get("LOCAL_CLASSIFIER_PATH", "")
+LOCAL_SCAM_THRESHOLD = float(os.environ.get("LOCAL_SCAM_THRESHOLD", "0.95"))
+LOCAL_SAFE_THRESHOLD = float(os.environ.get("LOCAL_SAFE_THRESHOLD", "0.05"))
+
+# Live stream pipeline: chunks buffered per connection and Voxtral
+# analyses allowed in flight per connection
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", "8"))
+STREAM_MAX_IN_FLIGHT = int(os.environ.get("STREAM_MAX_IN_FLIGHT", "3"))
+# What to do once more than STREAM_MAX_BACKLOG chunks wait for a slot:
+# "merge", "drop", "shed" or "block" (see services/backpressure.py)
+STREAM_BACKPRESSURE_POLICY = os.environ.get("STREAM_BACKPRESSURE_POLICY", "merge").strip().lower()
+STREAM_MAX_BACKLOG = int(os.environ.get("STREAM_MAX_BACKLOG", "2"))
+
+# Early verdict: once this many consecutive stream chunks score at or above
+# the threshold, final_result is sent at once and later chunks are either
+# skipped ("stop") or only every Nth one is analyzed ("sample"). 0 disables.
+STREAM_EARLY_VERDICT_CHUNKS = int(os.environ.get("STREAM_EARLY_VERDICT_CHUNKS", "3"))
+STREAM_EARLY_VERDICT_THRESHOLD = float(os.environ.get("STREAM_EARLY_VERDICT_THRESHOLD", "0.85"))
+STREAM_EARLY_VERDICT_MODE = os.environ.get("STREAM_EARLY_VERDICT_MODE", "stop").strip().lower()
+STREAM_EARLY_SAMPLE_EVERY = int(os.environ.get("STREAM_EARLY_SAMPLE_EVERY", "6"))
+
+# Upstream audio preparation: uploads and chunks are downmixed to mono 16-bit
+# and resampled down to AUDIO_TARGET_RATE before base64. AUDIO_PREP_WORKERS > 0
+# runs upload preparation in a process pool of that size instead of a thread.
+AUDIO_NORMALIZE_ENABLED = _env_flag("AUDIO_NORMALIZE_ENABLED", True)
+AUDIO_TARGET_RATE = int(os.environ.get("AUDIO_TARGET_RATE", "16000"))
+AUDIO_PREP_WORKERS = int(os.environ.get("AUDIO_PREP_WORKERS", "0"))
+# Default channel scored in stereo uploads ("mix", "left", "right" or "auto");
+# the request's "channel" form field overrides it
+STEREO_CHANNEL = os.environ.get("STEREO_CHANNEL", "mix").strip().lower()
+
+# Admission control: budgets shared by uploads, transcripts and stream chunks.
+# Work beyond them waits in a queue of ADMISSION_QUEUE_SIZE for up to
+# ADMISSION_QUEUE_TIMEOUT_S, else is refused with 503 and Retry-After.
+ADMISSION_MAX_AUDIO_MB = float(os.environ.get("ADMISSION_MAX_AUDIO_MB", "200"))
+ADMISSION_MAX_AUDIO_CALLS = int(os.environ.get("ADMISSION_MAX_AUDIO_CALLS", "32"))
+ADMISSION_MAX_TEXT_CALLS = int(os.environ.get("ADMISSION_MAX_TEXT_CALLS", "32"))
+ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT_S = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+ADMISSION_RETRY_AFTER_S = float(os.environ.get("ADMISSION_RETRY_AFTER_S", "5"))
+# Queued upstream work is ordered live stream > interactive transcript > bulk
+# upload, fair-queued between API keys (weights from api_keys.json "weight");
+# bulk may hold at most this share of each model's call slots
+PRIORITY_BULK_SHARE = float(os.environ.get("PRIORITY_BULK_SHARE", "0.75"))
+
+# Long uploads: prepared audio longer than SEGMENT_THRESHOLD_S is split into
+# ~SEGMENT_WINDOW_S windows (cut at pauses, overlapping by SEGMENT_OVERLAP_S)
+# scored concurrently, at most SEGMENT_MAX_PARALLEL at a time
+SEGMENTATION_ENABLED = _env_flag("SEGMENTATION_ENABLED", True)
+SEGMENT_THRESHOLD_S = float(os.environ.get("SEGMENT_THRESHOLD_S", "120"))
+SEGMENT_WINDOW_S = float(os.environ.get("SEGMENT_WINDOW_S", "60"))
+SEGMENT_OVERLAP_S = float(os.environ.get("SEGMENT_OVERLAP_S", "5"))
+SEGMENT_MAX_PARALLEL = int(os.environ.get("SEGMENT_MAX_PARALLEL", "4"))
+
+# Upload limits. MAX_AUDIO_SIZE_MB is a hard transport ceiling on bytes; the
+# real limit is audio duration. Segmented scoring keeps each upstream call to
+# one window, so the defaults then allow 30 minutes (about 58 MB at the
+# 16 kHz mono 16-bit the frontend records); a single call stays at 10 minutes
+MAX_AUDIO_SIZE_MB = float(os.environ.get("MAX_AUDIO_SIZE_MB", "64" if SEGMENTATION_ENABLED else "25"))
+MAX_AUDIO_DURATION_S = float(os.environ.get("MAX_AUDIO_DURATION_S", "1800" if SEGMENTATION_ENABLED else "600"))
+
+# Voice activity detection: non-speech runs of at least VAD_MIN_SILENCE_MS
+# (RMS below VAD_ENERGY_THRESHOLD, in 16-bit full scale) are cut from uploads
+# and stream chunks before they are sent to Voxtral
+VAD_ENABLED = _env_flag("VAD_ENABLED", True)
+VAD_ENERGY_THRESHOLD = float(os.environ.get("VAD_ENERGY_THRESHOLD", "500"))
+VAD_MIN_SILENCE_MS = int(os.environ.get("VAD_MIN_SILENCE_MS", "500"))
+VAD_PADDING_MS = int(os.environ.get("VAD_PADDING_MS", "150"))
+
+# Adaptive sampling: while a stream's cumulative score stays below
+# ADAPTIVE_LOW_SCORE and stable, only every Nth chunk goes upstream (the chunks
+# in between are merged into its window). Energy jumps, voice changes and
+# DTMF tones escalate back to every chunk.
+ADAPTIVE_SAMPLING_ENABLED = _env_flag("ADAPTIVE_SAMPLING_ENABLED", True)
+ADAPTIVE_SAMPLE_EVERY = int(os.environ.get("ADAPTIVE_SAMPLE_EVERY", "3"))
+ADAPTIVE_LOW_SCORE = float(os.environ.get("ADAPTIVE_LOW_SCORE", "0.3"))
+ADAPTIVE_WARMUP_CHUNKS = int(os.environ.get("ADAPTIVE_WARMUP_CHUNKS", "2"))
 
 # Verdict thresholds
 THRESHOLD_SAFE = 0.30
 THRESHOLD_SUSPICIOUS = 0.60
 THRESHOLD_LIKELY_SCAM = 0.85
-
-# Only create real Mistral client when not in demo mode
-client = None if DEMO_MODE else Mistral(api_key=MISTRAL_API_KEY)
@@ -1,11 +1,33 @@
+import asyncio
+import math
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
 from rate_limit import limiter
+from upload_limit import UploadLimitMiddleware
 from routers import health, analyze, stream
+from config import FINGERPRINT_ENABLED
+from services import cpu_pool, upstream
+from services.admission import AdmissionRejected
+from services.deadline import DeadlineExceeded
+from services.fingerprint import fingerprint_index, seed_from_demo
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled upstream client for the whole process
+    await upstream.startup()
+    if FINGERPRINT_ENABLED:
+        await asyncio.to_thread(seed_from_demo, fingerprint_index)
+    yield
+    await upstream.shutdown()
+    cpu_pool.shutdown()
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title="CallShield API",
     version="1.0.0",
     description=(
@@ -30,6 +52,27 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     )
 
 
+# Oversized uploads are refused before their body is read; added first so
+# CORS headers still wrap the error response
+app.add_middleware(UploadLimitMiddleware)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": {"error": exc.error, "detail": str(exc)}},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after_s)))},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(
+        status_code=504,
+        content={"detail": {"error": "deadline_exceeded", "detail": str(exc)}},
+    )
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
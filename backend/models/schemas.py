@@ -30,6 +30,21 @@ class AnalysisResult(BaseModel):
     review_required: bool = False
     review_reason: Optional[str] = None
 
+class SegmentTiming(BaseModel):
+    index: int
+    start_s: float  # position in the prepared (VAD-trimmed) audio
+    end_s: float
+    audio_ms: float
+    scam_score: float
+
+class ReportTiming(BaseModel):
+    audio_ms: Optional[float] = None
+    text_ms: Optional[float] = None
+    speculative_saving_ms: Optional[float] = None
+    speculative_saving_p50_ms: Optional[float] = None
+    speculative_saving_p95_ms: Optional[float] = None
+    segments: Optional[List[SegmentTiming]] = None  # long uploads scored in segments
+
 class ScamReport(BaseModel):
     id: str = Field(default_factory=lambda: f"analysis_{uuid.uuid4()}")
     mode: str  # "audio", "text", or "stream"
@@ -39,10 +54,16 @@ class ScamReport(BaseModel):
     processing_time_ms: float
     review_required: bool = False
     review_reason: Optional[str] = None
+    timing: Optional[ReportTiming] = None
+    decision_source: str = "model"  # "model", "cache", "fingerprint", "rules", "local_classifier" or "local_fallback"
+    audio_duration_s: Optional[float] = None
+    audio_removed_s: Optional[float] = None  # non-speech cut by the VAD before Voxtral
+    scored_channel: Optional[str] = None  # stereo uploads: "mix", "left" or "right"
     analyzed_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
 
 class TranscriptRequest(BaseModel):
-    transcript: str = Field(max_length=10000)
+    # Transport ceiling; longer than MAX_TRANSCRIPT_LENGTH is analyzed in chunks
+    transcript: str = Field(max_length=200000)
 
 class ErrorResponse(BaseModel):
     error: str
@@ -1,24 +1,105 @@
+import io
+import os
+import mmap
 import time
 import asyncio
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from typing import Awaitable, BinaryIO, Callable, List, Optional, Tuple, Union
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
 
 logger = logging.getLogger(__name__)
 from services.audio_analyzer import analyze_audio
 from services.text_analyzer import analyze_transcript as analyze_text
-from services.response_formatter import parse_analysis_result, build_scam_report
-from models.schemas import ScamReport, ErrorResponse, TranscriptRequest
-from config import MAX_AUDIO_SIZE_MB, MAX_TRANSCRIPT_LENGTH, DEMO_MODE
-from auth import require_api_key
+from services.response_formatter import parse_analysis_result, build_scam_report, reduce_results
+from services.second_opinion import SpeculativeSecondOpinion, saving_percentiles
+from services.result_cache import result_cache, audio_cache_key, transcript_cache_key
+from services.fingerprint import Fingerprint, fingerprint_index, compute_fingerprint
+from services.singleflight import upstream_flights
+from services.rule_engine import rule_engine
+from services.local_classifier import local_classifier
+from services.wav import WavFormatError, WavParser, parse_wav
+from services.audio_prep import CHANNEL_MODES, detect_caller_channel, prepare_audio
+from services.cpu_pool import run_cpu
+from services.segmenter import Segment, split_wav
+from services.transcript_chunker import split_transcript
+from services.audio_usage import audio_usage
+from services.admission import AdmissionRejected, admission
+from services.deadline import DeadlineExceeded, set_deadline
+from services.resilience import CircuitOpen
+from models.schemas import AnalysisResult, ScamReport, ErrorResponse, TranscriptRequest, ReportTiming, SegmentTiming
+from config import (
+    MAX_AUDIO_SIZE_MB,
+    MAX_AUDIO_DURATION_S,
+    MAX_TRANSCRIPT_LENGTH,
+    MAX_TRANSCRIPT_TOTAL_LENGTH,
+    TRANSCRIPT_CHUNK_OVERLAP,
+    TRANSCRIPT_MAX_PARALLEL,
+    DEMO_MODE,
+    DEADLINE_AUDIO_S,
+    DEADLINE_TRANSCRIPT_S,
+    FINGERPRINT_ENABLED,
+    SECOND_OPINION_GATE,
+    SPECULATIVE_SECOND_OPINION,
+    AUDIO_NORMALIZE_ENABLED,
+    AUDIO_TARGET_RATE,
+    STEREO_CHANNEL,
+    SEGMENTATION_ENABLED,
+    SEGMENT_THRESHOLD_S,
+    SEGMENT_WINDOW_S,
+    SEGMENT_OVERLAP_S,
+    SEGMENT_MAX_PARALLEL,
+    VAD_ENABLED,
+    VAD_ENERGY_THRESHOLD,
+    VAD_MIN_SILENCE_MS,
+    VAD_PADDING_MS,
+)
+from auth import api_key_weight, require_api_key
+from services.priority import BULK, INTERACTIVE, set_priority
 from rate_limit import limiter
 from services.demo_responses import get_demo_audio_response, get_demo_transcript_response
 
 router = APIRouter()
 
+# Leading upload bytes checked for a RIFF/WAVE header before the rest is touched
+HEADER_PROBE_BYTES = 64 * 1024
+# Uploads at least this large are memory-mapped from the spool file rather
+# than read into a bytes object (Starlette spools parts over 1 MB to disk)
+MMAP_MIN_BYTES = 1024 * 1024
+
+
+def _spooled_size(spool: BinaryIO) -> int:
+    spool.seek(0, os.SEEK_END)
+    return spool.tell()
+
+
+def _map_upload(spool: BinaryIO, size: int) -> Union[bytes, mmap.mmap]:
+    """The whole upload as bytes, or as a read-only mmap of its spool file when large.
+
+    The map is left to the garbage collector rather than closed: a coalesced
+    upstream call may still be reading it after this request has returned.
+    """
+    spool.seek(0)
+    if size < MMAP_MIN_BYTES:
+        return spool.read()
+    try:
+        fileno = spool.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return spool.read()
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
 @router.post("/api/analyze/audio", response_model=ScamReport)
 @limiter.limit("10/minute")
-async def analyze_audio_endpoint(request: Request, file: UploadFile = File(...), _key=Depends(require_api_key)):
+async def analyze_audio_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    channel: Optional[str] = Form(None),
+    _key=Depends(require_api_key),
+):
     start_time = time.time()
+    # Uploads have no one waiting in real time: they queue behind live and interactive work
+    set_priority(BULK, _key, api_key_weight(_key))
+    set_deadline(DEADLINE_AUDIO_S)
 
     # Validate file type
     if not file.filename or not file.filename.lower().endswith(".wav"):
@@ -27,39 +108,227 @@ async def analyze_audio_endpoint(request: Request, file: UploadFile = File(...),
             detail={"error": "invalid_file_type", "detail": "Only WAV files are accepted."},
         )
 
-    # Read and validate file size
-    audio_bytes = await file.read()
-    size_mb = len(audio_bytes) / (1024 * 1024)
-    if size_mb > MAX_AUDIO_SIZE_MB:
+    # Validate the size (also capped while the body arrives, see upload_limit.py)
+    # and the RIFF header before the upload is loaded, hashed or encoded
+    size = file.size if file.size is not None else await asyncio.to_thread(_spooled_size, file.file)
+    if size / (1024 * 1024) > MAX_AUDIO_SIZE_MB:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "file_too_large", "detail": f"File exceeds {MAX_AUDIO_SIZE_MB:g}MB limit."},
+        )
+    try:
+        WavParser().feed(await file.read(HEADER_PROBE_BYTES))
+        audio_bytes = await asyncio.to_thread(_map_upload, file.file, size)
+        wav_info = parse_wav(audio_bytes)
+    except WavFormatError as e:
         raise HTTPException(
             status_code=400,
-            detail={"error": "file_too_large", "detail": f"File exceeds {MAX_AUDIO_SIZE_MB}MB limit."},
+            detail={"error": "invalid_file_type", "detail": str(e)},
+        )
+    duration_s = wav_info.duration_s
+    if duration_s > MAX_AUDIO_DURATION_S:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "audio_too_long",
+                "detail": f"Audio is {duration_s:.0f}s; the limit is {MAX_AUDIO_DURATION_S:.0f}s.",
+            },
         )
 
-    # Validate WAV magic bytes
-    if len(audio_bytes) >= 12 and (audio_bytes[:4] != b'RIFF' or audio_bytes[8:12] != b'WAVE'):
+    # Stereo call recordings: score the mix, one channel, or detect the caller's
+    channel = (channel or STEREO_CHANNEL).strip().lower()
+    if channel not in CHANNEL_MODES:
         raise HTTPException(
             status_code=400,
-            detail={"error": "invalid_file_type", "detail": "File is not a valid WAV format."},
+            detail={"error": "invalid_channel", "detail": f"channel must be one of {', '.join(CHANNEL_MODES)}."},
         )
 
     if DEMO_MODE:
         await asyncio.sleep(1.5)
         return get_demo_audio_response()
 
-    # Call Voxtral audio analysis
+    scored_channel = None
+    if wav_info.channels == 2:
+        if channel == "auto":
+            channel = await run_cpu(detect_caller_channel, audio_bytes, VAD_ENERGY_THRESHOLD)
+        scored_channel = channel
+    else:
+        channel = "mix"
+
+    # Identical recordings reuse the stored verdict in a fresh report; a
+    # single-channel verdict is stored apart from the whole-call one
+    cache_key = audio_cache_key(audio_bytes)
+    if channel != "mix":
+        cache_key += ":" + channel
+    cached = await result_cache.get(cache_key)
+    if cached is not None:
+        cached_audio, cached_text = cached
+        audio_usage.record(duration_s, "cache")
+        return build_scam_report(
+            mode="audio",
+            audio_result=cached_audio,
+            text_result=cached_text,
+            start_time=start_time,
+            decision_source="cache",
+            audio_duration_s=duration_s,
+            scored_channel=scored_channel,
+        )
+
+    # Re-encoded replays of a known recording reuse its verdict
+    fingerprint = None
+    if FINGERPRINT_ENABLED and channel == "mix":
+        fingerprint = await asyncio.to_thread(compute_fingerprint, audio_bytes)
+        match = fingerprint_index.lookup(fingerprint)
+        if match is not None and match.audio_result is not None:
+            logger.info("Fingerprint match %s (%d votes)", match.name, match.votes)
+            audio_usage.record(duration_s, "fingerprint")
+            return build_scam_report(
+                mode="audio",
+                audio_result=match.audio_result,
+                text_result=match.text_result,
+                start_time=start_time,
+                decision_source="fingerprint",
+                audio_duration_s=duration_s,
+                scored_channel=scored_channel,
+            )
+
+    led = False
+
+    async def score():
+        nonlocal led
+        led = True
+        # The upload's size counts against the in-flight audio budget while it is scored
+        async with admission.admit(nbytes=len(audio_bytes)):
+            scored = await _score_audio(audio_bytes, cache_key, fingerprint, channel)
+        # Upstream seconds are recorded once per call, not once per waiter
+        removed_s = scored[3]
+        audio_usage.record(duration_s - removed_s, "model")
+        if removed_s:
+            audio_usage.record(removed_s, "vad")
+        return scored
+
+    # Identical uploads already in flight share one upstream call
+    audio_result, text_result, timing, removed_s = await upstream_flights.do(cache_key, score)
+    if not led:
+        audio_usage.record(duration_s, "coalesced")
+
+    # Build and return report
+    report = build_scam_report(
+        mode="audio",
+        audio_result=audio_result,
+        text_result=text_result,
+        start_time=start_time,
+        timing=timing.model_copy(),
+        audio_duration_s=duration_s,
+        audio_removed_s=removed_s,
+        scored_channel=scored_channel,
+    )
+    return report
+
+async def _score_audio(
+    audio_bytes: bytes,
+    cache_key: str,
+    fingerprint: Optional[Fingerprint],
+    channel: str = "mix",
+) -> Tuple[AnalysisResult, Optional[AnalysisResult], ReportTiming, float]:
+    """Run Voxtral (in segments for long audio) plus the conditional second opinion and store the outcome.
+
+    Returns the results, the timing and the seconds of non-speech the VAD
+    cut before upload.
+    """
+    # Downmix/resample to 16 kHz mono and cut ring-back, hold silence and long
+    # pauses; the verdict is still cached under the original recording's key
+    prepared = await run_cpu(
+        prepare_audio, audio_bytes, AUDIO_NORMALIZE_ENABLED, AUDIO_TARGET_RATE,
+        VAD_ENABLED, VAD_ENERGY_THRESHOLD, VAD_MIN_SILENCE_MS, VAD_PADDING_MS, channel,
+    )
+    audio_usage.record_payload(prepared.original_bytes, len(prepared.audio_bytes))
+    audio_bytes = prepared.audio_bytes
+    removed_s = prepared.removed_s
+
+    # Long recordings are scored as concurrent segments and reduced to one result
+    segments = None
+    if SEGMENTATION_ENABLED:
+        try:
+            if parse_wav(audio_bytes).duration_s > SEGMENT_THRESHOLD_S:
+                segments = await run_cpu(split_wav, audio_bytes, SEGMENT_WINDOW_S, SEGMENT_OVERLAP_S)
+        except WavFormatError:
+            segments = None
+
+    speculation = None
+    if segments is not None and len(segments) > 1:
+        audio_start = time.time()
+        audio_result, segment_timings = await _score_segments(segments)
+        audio_done = time.time()
+        timing = ReportTiming(audio_ms=round((audio_done - audio_start) * 1000, 2), segments=segment_timings)
+    else:
+        # Speculative mode starts the Mistral Large second opinion while Voxtral
+        # is still streaming, as soon as transcript_summary is complete
+        if SPECULATIVE_SECOND_OPINION:
+            speculation = SpeculativeSecondOpinion(analyze_text, gate=SECOND_OPINION_GATE)
+
+        # Call Voxtral audio analysis
+        audio_start = time.time()
+        try:
+            audio_result = await _call_voxtral(audio_bytes, speculation.feed if speculation else None)
+        except BaseException:
+            # Any failure or cancellation, not just mapped HTTP errors, must
+            # not leave the speculative text call running
+            if speculation:
+                speculation.cancel()
+            raise
+        audio_done = time.time()
+        timing = ReportTiming(audio_ms=round((audio_done - audio_start) * 1000, 2))
+
+    # Conditional second-opinion via Mistral Large when Voxtral score > gate
+    text_result = None
+    second_opinion_failed = False
+    if audio_result.scam_score > SECOND_OPINION_GATE and audio_result.transcript_summary:
+        try:
+            if speculation:
+                raw_text = await speculation.result(audio_result.transcript_summary)
+                timing.text_ms = round((speculation.finished_at - speculation.started_at) * 1000, 2)
+            else:
+                text_start = time.time()
+                raw_text = await analyze_text(audio_result.transcript_summary)
+                timing.text_ms = round((time.time() - text_start) * 1000, 2)
+            text_result = parse_analysis_result(raw_text)
+        except Exception as e:
+            second_opinion_failed = True
+            logger.warning("Second-opinion analysis failed (non-fatal): %s", e)
+        if speculation:
+            timing.speculative_saving_ms = speculation.record_saving(audio_done)
+    elif speculation:
+        speculation.cancel()
+
+    if speculation:
+        p50, p95 = saving_percentiles()
+        timing.speculative_saving_p50_ms = p50 if p50 is None else round(p50, 2)
+        timing.speculative_saving_p95_ms = p95 if p95 is None else round(p95, 2)
+
+    # Don't pin a transient second-opinion failure into the cache
+    if not second_opinion_failed:
+        await result_cache.put(cache_key, audio_result=audio_result, text_result=text_result)
+        if fingerprint is not None:
+            fingerprint_index.add(fingerprint, audio_result=audio_result, text_result=text_result)
+
+    return audio_result, text_result, timing, removed_s
+
+
+async def _call_voxtral(audio_bytes: bytes, on_partial=None) -> AnalysisResult:
+    """One Voxtral call; upstream and parse failures surface as 502."""
     try:
-        raw_response = await analyze_audio(audio_bytes)
+        raw_response = await analyze_audio(audio_bytes, on_partial=on_partial)
+    except (AdmissionRejected, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.exception("Audio analysis failed: %s", e)
         raise HTTPException(
             status_code=502,
             detail={"error": "model_error", "detail": f"Audio analysis failed: {e}"},
         )
-
-    # Parse response
     try:
-        audio_result = parse_analysis_result(raw_response)
+        return parse_analysis_result(raw_response)
     except Exception as e:
         logger.exception("Parse failed: %s", e)
         raise HTTPException(
@@ -67,28 +336,96 @@ async def analyze_audio_endpoint(request: Request, file: UploadFile = File(...),
             detail={"error": "parse_error", "detail": f"Failed to parse results: {e}"},
         )
 
-    # Conditional second-opinion via Mistral Large when Voxtral score > 0.5
-    text_result = None
-    if not DEMO_MODE and audio_result.scam_score > 0.5 and audio_result.transcript_summary:
+
+async def _score_segments(segments: List[Segment]) -> Tuple[AnalysisResult, List[SegmentTiming]]:
+    """Score segments concurrently (at most SEGMENT_MAX_PARALLEL at a time) and reduce them.
+
+    The first failure cancels the segments still queued or in flight: a
+    partial verdict over part of the call is not reported.
+    """
+    async def score(segment: Segment) -> Tuple[AnalysisResult, SegmentTiming]:
+        start = time.time()
+        result = await _call_voxtral(segment.audio_bytes)
+        return result, SegmentTiming(
+            index=segment.index, start_s=segment.start_s, end_s=segment.end_s,
+            audio_ms=round((time.time() - start) * 1000, 2), scam_score=result.scam_score,
+        )
+
+    scored = await _gather_bounded([lambda s=s: score(s) for s in segments], SEGMENT_MAX_PARALLEL)
+    return reduce_results([r for r, _ in scored]), [t for _, t in scored]
+
+
+async def _gather_bounded(factories: List[Callable[[], Awaitable]], limit: int) -> list:
+    """Await each factory's coroutine, at most `limit` at a time, results in order.
+
+    The first failure cancels everything still queued or in flight and is re-raised.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory):
+        async with semaphore:
+            return await factory()
+
+    tasks = [asyncio.ensure_future(run(factory)) for factory in factories]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _score_transcript_chunks(chunks: List[str]) -> AnalysisResult:
+    """Score transcript chunks concurrently and reduce them in transcript order."""
+    async def score(chunk: str) -> AnalysisResult:
         try:
-            raw_text = await analyze_text(audio_result.transcript_summary)
-            text_result = parse_analysis_result(raw_text)
+            raw_response = await analyze_text(chunk)
+        except (AdmissionRejected, DeadlineExceeded):
+            raise
         except Exception as e:
-            logger.warning("Second-opinion analysis failed (non-fatal): %s", e)
+            logger.exception("Text analysis failed: %s", e)
+            raise HTTPException(
+                status_code=502,
+                detail={"error": "model_error", "detail": f"Text analysis service temporarily unavailable: {e}"},
+            )
+        try:
+            return parse_analysis_result(raw_response)
+        except Exception as e:
+            logger.exception("Text result parsing failed: %s", e)
+            raise HTTPException(
+                status_code=502,
+                detail={"error": "parse_error", "detail": f"Failed to process analysis results: {e}"},
+            )
 
-    # Build and return report
-    report = build_scam_report(
-        mode="audio",
-        audio_result=audio_result,
-        text_result=text_result,
+    results = await _gather_bounded([lambda c=c: score(c) for c in chunks], TRANSCRIPT_MAX_PARALLEL)
+    return reduce_results(results)
+
+def _local_fallback_report(transcript: str, start_time: float, exc: CircuitOpen) -> ScamReport:
+    """While TEXT_MODEL's circuit is open, answer from the local classifier when there is one.
+
+    The verdict is capped at SUSPICIOUS and flagged for review, and it is not
+    cached: the model's verdict should replace it once the circuit closes.
+    Without a local classifier the CircuitOpen goes on to become a 503.
+    """
+    if local_classifier is None:
+        raise exc
+    allow_safe = not rule_engine.evaluate(transcript).scam_rules
+    return build_scam_report(
+        mode="text",
+        text_result=local_classifier.fallback(transcript, allow_safe=allow_safe),
         start_time=start_time,
+        decision_source="local_fallback",
+        review_reason="Text model unavailable; scored by the local classifier only",
     )
-    return report
+
 
 @router.post("/api/analyze/transcript", response_model=ScamReport)
 @limiter.limit("20/minute")
 async def analyze_transcript_endpoint(request: Request, body: TranscriptRequest, _key=Depends(require_api_key)):
     start_time = time.time()
+    set_priority(INTERACTIVE, _key, api_key_weight(_key))
+    set_deadline(DEADLINE_TRANSCRIPT_S)
 
     transcript = body.transcript.strip()
     if not transcript:
@@ -96,19 +433,68 @@ async def analyze_transcript_endpoint(request: Request, body: TranscriptRequest,
             status_code=400,
             detail={"error": "transcript_empty", "detail": "Transcript cannot be empty."},
         )
-    if len(transcript) > MAX_TRANSCRIPT_LENGTH:
+    if len(transcript) > MAX_TRANSCRIPT_TOTAL_LENGTH:
         raise HTTPException(
             status_code=400,
-            detail={"error": "transcript_too_long", "detail": f"Transcript exceeds {MAX_TRANSCRIPT_LENGTH} character limit."},
+            detail={"error": "transcript_too_long", "detail": f"Transcript exceeds {MAX_TRANSCRIPT_TOTAL_LENGTH} character limit."},
         )
 
     if DEMO_MODE:
         await asyncio.sleep(1.0)
         return get_demo_transcript_response(transcript)
 
-    # Call Mistral text analysis
+    # Obvious scam or personal calls are settled by local phrase rules
+    rule_result = rule_engine.decide(transcript)
+    if rule_result is not None:
+        return build_scam_report(
+            mode="text",
+            text_result=rule_result,
+            start_time=start_time,
+            decision_source="rules",
+        )
+
+    # Confident local classifier predictions skip TEXT_MODEL; the uncertain band falls through.
+    # Any matched scam phrase is evidence the classifier may not overrule with SAFE.
+    local_result = None
+    if local_classifier:
+        local_result = local_classifier.decide(
+            transcript, allow_safe=not rule_engine.evaluate(transcript).scam_rules,
+        )
+    if local_result is not None:
+        return build_scam_report(
+            mode="text",
+            text_result=local_result,
+            start_time=start_time,
+            decision_source="local_classifier",
+        )
+
+    cache_key = transcript_cache_key(transcript)
+    cached = await result_cache.get(cache_key)
+    if cached is not None:
+        return build_scam_report(
+            mode="text",
+            text_result=cached[1],
+            start_time=start_time,
+            decision_source="cache",
+        )
+
+    # Long transcripts are scored in chunks and reduced to one result
+    if len(transcript) > MAX_TRANSCRIPT_LENGTH:
+        chunks = split_transcript(transcript, MAX_TRANSCRIPT_LENGTH, TRANSCRIPT_CHUNK_OVERLAP)
+        try:
+            text_result = await upstream_flights.do(cache_key, lambda: _score_transcript_chunks(chunks))
+        except CircuitOpen as e:
+            return _local_fallback_report(transcript, start_time, e)
+        await result_cache.put(cache_key, text_result=text_result)
+        return build_scam_report(mode="text", text_result=text_result, start_time=start_time)
+
+    # Call Mistral text analysis; identical transcripts in flight share one call
     try:
-        raw_response = await analyze_text(transcript)
+        raw_response = await upstream_flights.do(cache_key, lambda: analyze_text(transcript))
+    except CircuitOpen as e:
+        return _local_fallback_report(transcript, start_time, e)
+    except (AdmissionRejected, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.exception("Text analysis failed: %s", e)
         raise HTTPException(
@@ -126,6 +512,8 @@ async def analyze_transcript_endpoint(request: Request, body: TranscriptRequest,
             detail={"error": "parse_error", "detail": f"Failed to process analysis results: {e}"},
         )
 
+    await result_cache.put(cache_key, text_result=text_result)
+
     # Build and return report
     report = build_scam_report(
         mode="text",
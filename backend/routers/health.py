@@ -1,5 +1,13 @@
 from fastapi import APIRouter
 from config import DEMO_MODE
+from services.result_cache import result_cache
+from services.fingerprint import fingerprint_index
+from services.singleflight import upstream_flights
+from services.rule_engine import rule_engine
+from services.local_classifier import local_classifier
+from services.audio_usage import audio_usage
+from services.admission import admission
+from services import resilience
 
 router = APIRouter()
 
@@ -10,4 +18,12 @@ async def health_check():
         "model": "voxtral-mini-latest",
         "version": "1.0.0",
         "demo_mode": DEMO_MODE,
+        "cache": result_cache.stats(),
+        "fingerprint": fingerprint_index.stats(),
+        "coalescing": upstream_flights.stats(),
+        "rules": rule_engine.stats(),
+        "local_classifier": local_classifier.stats() if local_classifier else {"enabled": False},
+        "audio_usage": audio_usage.stats(),
+        "admission": admission.stats(),
+        "upstream": resilience.stats(),
     }
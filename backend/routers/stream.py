@@ -1,17 +1,160 @@
 import json
 import asyncio
+import logging
 from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 from services.stream_processor import StreamProcessor
 from services.demo_responses import get_demo_stream_chunks, get_demo_stream_final
-from config import DEMO_MODE
-from auth import verify_ws_api_key
+from services.backpressure import plan_dispatch
+from services.admission import AdmissionRejected
+from config import (
+    DEMO_MODE,
+    STREAM_QUEUE_SIZE,
+    STREAM_MAX_IN_FLIGHT,
+    STREAM_MAX_BACKLOG,
+    STREAM_BACKPRESSURE_POLICY,
+)
+from auth import api_key_weight, verify_ws_api_key
+from services.priority import LIVE, set_priority
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 MAX_CHUNK_SIZE = 512 * 1024  # 512KB
 MAX_CHUNKS = 60
 
+
+class _StreamSession:
+    """Per-connection analysis pipeline.
+
+    The receive loop only enqueues chunks. A dispatcher starts up to
+    STREAM_MAX_IN_FLIGHT analyses at once and a deliverer awaits them in
+    arrival order, so partial results always go out in chunk_index order
+    even when a later chunk finishes first. When the backlog outgrows
+    STREAM_MAX_BACKLOG, STREAM_BACKPRESSURE_POLICY decides what to do with it.
+    """
+
+    def __init__(self, ws: WebSocket, processor: StreamProcessor):
+        self.ws = ws
+        self.processor = processor
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._ordered: asyncio.Queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(STREAM_MAX_IN_FLIGHT)
+        self.policy = STREAM_BACKPRESSURE_POLICY
+        self._send_lock = asyncio.Lock()
+        # Per-chunk analyses, so a disconnect can cancel the ones still running
+        self._analyses: set = set()
+        self._tasks = [
+            asyncio.create_task(self._dispatch()),
+            asyncio.create_task(self._deliver()),
+        ]
+
+    async def send(self, message: dict) -> None:
+        async with self._send_lock:
+            try:
+                await self.ws.send_json(message)
+            except Exception:
+                pass
+
+    def _start_analysis(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._analyses.add(task)
+        task.add_done_callback(self._analysis_done)
+        return task
+
+    def _analysis_done(self, task: asyncio.Task) -> None:
+        self._analyses.discard(task)
+        # Mark exceptions as retrieved when the deliverer never gets to the task
+        if not task.cancelled():
+            task.exception()
+
+    async def _dispatch(self) -> None:
+        ended = False
+        while not ended:
+            item = await self.queue.get()
+            if item is None:
+                break
+            await self._in_flight.acquire()
+            # Everything that arrived while waiting for a slot is the backlog
+            batch = [item]
+            while not self.queue.empty():
+                queued = self.queue.get_nowait()
+                if queued is None:
+                    ended = True
+                    break
+                batch.append(queued)
+
+            holding_slot = True
+            for step in plan_dispatch(batch, self.policy, STREAM_MAX_BACKLOG):
+                if not step.upstream:
+                    task = self._start_analysis(self.processor.analyze_chunk(step.audio_chunk, allow_upstream=False))
+                else:
+                    if not holding_slot:
+                        await self._in_flight.acquire()
+                    holding_slot = False
+                    task = self._start_analysis(self.processor.analyze_chunk(step.audio_chunk))
+                    task.add_done_callback(lambda _task: self._in_flight.release())
+                await self._ordered.put((step, task))
+            if holding_slot:
+                self._in_flight.release()
+        await self._ordered.put(None)
+
+    async def _deliver(self) -> None:
+        while True:
+            item = await self._ordered.get()
+            if item is None:
+                return
+            step, task = item
+            try:
+                analysis = await task
+                # Malformed model output fails in apply(); report it like any chunk failure
+                partial = self.processor.apply(step.chunk_index, analysis)
+                early_final = self.processor.take_early_final()
+            except AdmissionRejected as e:
+                await self.send({
+                    "type": "error",
+                    "detail": f"Chunk not analyzed: {e}",
+                    "chunk_index": step.chunk_index,
+                    "retry_after_s": e.retry_after_s,
+                })
+                continue
+            except Exception as e:
+                logger.exception("Chunk processing failed: %s", e)
+                await self.send({
+                    "type": "error",
+                    "detail": f"Failed to process audio chunk: {e}",
+                    "chunk_index": step.chunk_index,
+                })
+                continue
+            if step.report is not None:
+                partial["backpressure"] = step.report
+            await self.send(partial)
+            if early_final is not None:
+                await self.send(early_final)
+
+    async def drain(self) -> None:
+        """Stop accepting chunks and wait until every queued result is sent."""
+        await self.queue.put(None)
+        await asyncio.gather(*self._tasks)
+
+    async def flush_held(self) -> None:
+        """Fold the chunks the sampler still holds into the session before the
+        final verdict. Call after drain(); sends no partial_result of its own."""
+        try:
+            analysis = await self.processor.flush_held()
+            if analysis is not None:
+                self.processor.apply(self.processor.chunk_index, analysis)
+        except Exception as e:
+            logger.warning("Held chunks not analyzed at end of stream: %s", e)
+
+    async def cancel(self) -> None:
+        """Cancel the pipeline and every chunk analysis, and wait for them to stop."""
+        tasks = [*self._tasks, *self._analyses]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
 @router.websocket("/ws/stream")
 async def stream_audio(ws: WebSocket, api_key: Optional[str] = Query(None)):
     if not verify_ws_api_key(api_key):
@@ -61,73 +204,64 @@ async def stream_audio(ws: WebSocket, api_key: Optional[str] = Query(None)):
                 pass
         return
 
+    # Chunk analyses started by the session inherit the live class
+    set_priority(LIVE, api_key, api_key_weight(api_key))
     processor = StreamProcessor()
+    session = _StreamSession(ws, processor)
     chunk_count = 0
+    ended = False
 
     try:
         while chunk_count < MAX_CHUNKS:
             try:
                 message = await asyncio.wait_for(ws.receive(), timeout=30.0)
             except asyncio.TimeoutError:
-                try:
-                    await ws.send_json({
-                        "type": "error",
-                        "detail": "Chunk timeout: no data received",
-                    })
-                except Exception:
-                    pass
+                await session.send({
+                    "type": "error",
+                    "detail": "Chunk timeout: no data received",
+                })
                 break
 
+            if message.get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
             # Check for text message (end signal)
-            if "text" in message:
+            if message.get("text") is not None:
                 try:
                     data = json.loads(message["text"])
                 except json.JSONDecodeError as e:
-                    import logging
-                    logging.getLogger(__name__).warning("Invalid JSON received: %s", e)
+                    logger.warning("Invalid JSON received: %s", e)
                     continue
                 if data.get("type") == "end_stream":
-                    final = processor.get_final_result()
-                    try:
-                        await ws.send_json(final)
-                    except Exception:
-                        pass
+                    ended = True
                     break
 
             # Binary audio chunk
-            if "bytes" in message:
+            if message.get("bytes") is not None:
                 audio_chunk = message["bytes"]
                 if len(audio_chunk) > MAX_CHUNK_SIZE:
-                    try:
-                        await ws.send_json({
-                            "type": "error",
-                            "detail": "Chunk too large",
-                        })
-                    except Exception:
-                        pass
+                    await session.send({
+                        "type": "error",
+                        "detail": "Chunk too large",
+                    })
                     continue
 
-                try:
-                    partial = await processor.process_chunk(audio_chunk)
-                    try:
-                        await ws.send_json(partial)
-                    except Exception:
-                        pass
-                    chunk_count += 1
-                except Exception as e:
-                    import logging
-                    logging.getLogger(__name__).exception("Chunk processing failed: %s", e)
-                    try:
-                        await ws.send_json({
-                            "type": "error",
-                            "detail": f"Failed to process audio chunk: {e}",
-                        })
-                    except Exception:
-                        pass
+                chunk_count += 1
+                chunk_index = processor.next_index()
+                await session.send({"type": "chunk_received", "chunk_index": chunk_index})
+                # Waits only when the queue is full, bounding per-connection memory
+                await session.queue.put((chunk_index, audio_chunk))
+
+        # Deliver every queued result before the final verdict
+        await session.drain()
+        if ended:
+            await session.flush_held()
+            await session.send(processor.get_final_result())
 
     except WebSocketDisconnect:
         pass
     finally:
+        await session.cancel()
         try:
             await ws.close()
         except Exception:
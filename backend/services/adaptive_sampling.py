@@ -0,0 +1,114 @@
+"""Adaptive chunk sampling for low-risk live streams.
+
+Most calls are benign, so analyzing every non-silent chunk at full cadence
+mostly pays for confirming "still safe". Once a stream's cumulative score is
+low and stable, the sampler sends only every k-th chunk upstream; the chunks
+in between are held back and merged into that k-th chunk's window, so the
+model still hears them (chunks held when the stream ends are merged into one
+last window).
+
+It escalates back to every chunk as soon as anything looks different:
+- the stream is not yet warmed up, or the score rose or moved
+- an energy jump (the chunk is much louder or quieter than the last one)
+- a voice change (spectral centroid shift, e.g. a new speaker)
+- a DTMF keypad tone
+"""
+
+from collections import Counter
+from typing import Optional
+
+from services.audio_features import ChunkFeatures
+
+
+class AdaptiveSampler:
+    def __init__(
+        self,
+        every: int = 3,
+        low_score: float = 0.3,
+        warmup: int = 2,
+        stable_delta: float = 0.05,
+        energy_jump: float = 2.0,
+        voice_shift: float = 0.35,
+        enabled: bool = True,
+    ):
+        self.every = max(1, every)
+        self.low_score = low_score
+        self.warmup = warmup
+        self.stable_delta = stable_delta
+        self.energy_jump = energy_jump
+        self.voice_shift = voice_shift
+        self.enabled = enabled
+        self.analyzed = 0
+        self.skipped = 0
+        self.escalations: Counter = Counter()
+        self.flushed_chunks = 0
+        self._since_analyzed = 0
+        self._last_features: Optional[ChunkFeatures] = None
+        self._last_cumulative = 0.0
+
+    def _change(self, features: Optional[ChunkFeatures]) -> Optional[str]:
+        if features is None:
+            return None
+        if features.dtmf is not None:
+            return "dtmf"
+        last = self._last_features
+        if last is None:
+            return None
+        low, high = sorted((last.rms, features.rms))
+        if high / max(low, 1.0) >= self.energy_jump:
+            return "energy"
+        low, high = sorted((last.centroid_hz, features.centroid_hz))
+        if high > 0 and (high - low) / high >= self.voice_shift:
+            return "voice"
+        return None
+
+    def decide(self, features: Optional[ChunkFeatures], cumulative_score: float) -> Optional[str]:
+        """Why this chunk must go upstream, or None to hold it back."""
+        change = self._change(features)
+        if features is not None:
+            self._last_features = features
+        moved = abs(cumulative_score - self._last_cumulative) > self.stable_delta
+        self._last_cumulative = cumulative_score
+
+        if not self.enabled or self.every == 1:
+            reason = "disabled"
+        elif self.analyzed < self.warmup:
+            reason = "warmup"
+        elif change is not None:
+            reason = change
+        elif cumulative_score >= self.low_score:
+            reason = "risk"
+        elif moved:
+            reason = "unstable"
+        elif self._since_analyzed + 1 >= self.every:
+            reason = "cadence"
+        else:
+            self._since_analyzed += 1
+            self.skipped += 1
+            return None
+
+        if reason in ("energy", "voice", "dtmf", "risk", "unstable"):
+            self.escalations[reason] += 1
+        self._since_analyzed = 0
+        self.analyzed += 1
+        return reason
+
+    def flushed(self, held: int) -> None:
+        """Count the end-of-stream window of `held` chunks as an analyzed one."""
+        self.flushed_chunks = held
+        self.skipped -= 1
+        self.analyzed += 1
+        self._since_analyzed = 0
+
+    def stats(self) -> dict:
+        eligible = self.analyzed + self.skipped
+        return {
+            "enabled": self.enabled,
+            "every": self.every,
+            "eligible_chunks": eligible,
+            "analyzed_chunks": self.analyzed,
+            "upstream_calls_saved": self.skipped,
+            "effective_rate": round(self.analyzed / eligible, 4) if eligible else 1.0,
+            "escalations": dict(self.escalations),
+            "flushed_chunks": self.flushed_chunks,
+        }
@@ -0,0 +1,281 @@
+"""Process-wide admission control for audio memory and upstream concurrency.
+
+Two budgets are shared by uploads, transcripts and live-stream chunks:
+- audio bytes in flight: an upload's size is reserved while it is prepared
+  and scored, a stream chunk's while it is sent upstream
+- upstream calls in flight per model (Voxtral, Mistral Large)
+
+Work that does not fit waits in one bounded queue, ordered by priority
+class (live > interactive > bulk, see services/priority.py) and, within a
+class, by weighted fair queuing between API keys: each tenant's waiters
+get virtual finish tags advancing by 1/weight, so one key's backfill
+interleaves with other keys' requests instead of running ahead of them.
+Bulk work may hold at most PRIORITY_BULK_SHARE of any model's call slots,
+keeping headroom for live chunks that arrive while a backfill runs.
+
+When the queue is full, or a waiter is not admitted within the queue
+timeout, it is rejected at once with AdmissionRejected. Routers turn that into 503 plus Retry-After,
+or a stream error message. A single reservation larger than the whole byte
+budget is still admitted when nothing else is in flight, so an accepted
+upload can always run.
+"""
+
+import asyncio
+import itertools
+import math
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from config import (
+    AUDIO_MODEL,
+    TEXT_MODEL,
+    ADMISSION_MAX_AUDIO_MB,
+    ADMISSION_MAX_AUDIO_CALLS,
+    ADMISSION_MAX_TEXT_CALLS,
+    ADMISSION_QUEUE_SIZE,
+    ADMISSION_QUEUE_TIMEOUT_S,
+    ADMISSION_RETRY_AFTER_S,
+    PRIORITY_BULK_SHARE,
+)
+from services.metrics import RollingPercentile
+from services.priority import BULK, PRIORITY_CLASSES, Priority, current_priority
+
+
+class AdmissionRejected(Exception):
+    """The server is at capacity; retry after retry_after_s seconds."""
+
+    error = "server_busy"
+
+    def __init__(self, reason: str, retry_after_s: float):
+        super().__init__(f"Server at capacity ({reason}); retry in {retry_after_s:g}s")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class _Waiter:
+    __slots__ = ("model", "nbytes", "priority", "finish", "seq", "enqueued_at", "future")
+
+    def __init__(self, model, nbytes, priority, finish, seq, future):
+        self.model = model
+        self.nbytes = nbytes
+        self.priority = priority
+        self.finish = finish
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.future = future
+
+    def sort_key(self):
+        return (self.priority.rank, self.finish, self.seq)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_bytes: int,
+        call_limits: Dict[str, int],
+        queue_size: int = 64,
+        queue_timeout_s: float = 10.0,
+        retry_after_s: float = 5.0,
+        bulk_share: float = 1.0,
+    ):
+        self.max_bytes = max_bytes
+        self.call_limits = dict(call_limits)
+        self.queue_size = queue_size
+        self.queue_timeout_s = queue_timeout_s
+        self.retry_after_s = retry_after_s
+        self.bulk_share = bulk_share
+        self.bytes_in_flight = 0
+        self.calls_in_flight: Counter = Counter()
+        self._bulk_calls: Counter = Counter()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        # Weighted fair queuing state: virtual time and each tenant's last finish tag
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._waits = {klass: RollingPercentile() for klass in PRIORITY_CLASSES}
+        self._admitted_by_class: Counter = Counter()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _bulk_limit(self, model: str) -> int:
+        limit = self.call_limits.get(model)
+        return math.inf if limit is None else max(1, int(limit * self.bulk_share))
+
+    def _bytes_fit(self, nbytes: int) -> bool:
+        return nbytes <= 0 or self.bytes_in_flight == 0 or self.bytes_in_flight + nbytes <= self.max_bytes
+
+    def _fits(self, model: Optional[str], nbytes: int, priority: Priority) -> bool:
+        if model is not None:
+            if self.calls_in_flight[model] >= self.call_limits.get(model, math.inf):
+                return False
+            if priority.klass == BULK and self._bulk_calls[model] >= self._bulk_limit(model):
+                return False
+        return self._bytes_fit(nbytes)
+
+    def _queued_ahead(self, model: Optional[str], nbytes: int, priority: Priority) -> bool:
+        """A waiter of the same or higher class competes for the same resource (keeps queue order)."""
+        return any(
+            w.priority.rank <= priority.rank
+            and ((model is not None and w.model == model) or (nbytes > 0 and w.nbytes > 0))
+            for w in self._waiters
+        )
+
+    def _take(self, model: Optional[str], nbytes: int, priority: Priority, waited_s: float) -> None:
+        self.admitted += 1
+        self._admitted_by_class[priority.klass] += 1
+        self._waits[priority.klass].add(waited_s * 1000)
+        self.bytes_in_flight += nbytes
+        if model is not None:
+            self.calls_in_flight[model] += 1
+            if priority.klass == BULK:
+                self._bulk_calls[model] += 1
+
+    def _release(self, model: Optional[str], nbytes: int, priority: Priority) -> None:
+        self.bytes_in_flight -= nbytes
+        if model is not None:
+            self.calls_in_flight[model] -= 1
+            if priority.klass == BULK:
+                self._bulk_calls[model] -= 1
+        self._pump()
+
+    def _finish_tag(self, priority: Priority) -> float:
+        start = max(self._virtual_time, self._last_finish.get(priority.tenant, 0.0))
+        finish = start + 1.0 / priority.weight
+        self._last_finish[priority.tenant] = finish
+        return finish
+
+    def _pump(self) -> None:
+        """Admit waiters in (class, finish tag) order.
+
+        A waiter that does not fit blocks lower-ordered waiters for the same
+        model, and a byte waiter that does not fit blocks later byte waiters,
+        so a large upload is not starved by a stream of small ones.
+        """
+        bytes_blocked = False
+        blocked_models = set()
+        for waiter in sorted(self._waiters, key=_Waiter.sort_key):
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+                continue
+            if (waiter.nbytes > 0 and bytes_blocked) or waiter.model in blocked_models:
+                continue
+            if self._fits(waiter.model, waiter.nbytes, waiter.priority):
+                self._take(waiter.model, waiter.nbytes, waiter.priority, time.monotonic() - waiter.enqueued_at)
+                self._virtual_time = max(self._virtual_time, waiter.finish - 1.0 / waiter.priority.weight)
+                self._waiters.remove(waiter)
+                waiter.future.set_result(None)
+                continue
+            if waiter.nbytes > 0 and not self._bytes_fit(waiter.nbytes):
+                bytes_blocked = True
+            # The bulk share only holds back bulk; live and interactive waiters can still pass
+            if waiter.model is not None and not (
+                waiter.priority.klass == BULK and self.calls_in_flight[waiter.model] < self.call_limits.get(waiter.model, math.inf)
+            ):
+                blocked_models.add(waiter.model)
+        if not self._waiters:
+            # Idle: tags restart so an old backlog does not penalize the next burst
+            self._virtual_time = 0.0
+            self._last_finish.clear()
+
+    async def _acquire(self, model: Optional[str], nbytes: int, priority: Priority) -> None:
+        if self._fits(model, nbytes, priority) and not self._queued_ahead(model, nbytes, priority):
+            self._take(model, nbytes, priority, 0.0)
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejected("queue full", self.retry_after_s)
+
+        self.queued += 1
+        waiter = _Waiter(
+            model, nbytes, priority, self._finish_tag(priority), next(self._seq),
+            asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout_s)
+        except BaseException as exc:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the wait ended: hand the reservation back
+                self._release(model, nbytes, priority)
+            else:
+                waiter.future.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._pump()
+            if isinstance(exc, asyncio.TimeoutError):
+                self.rejected += 1
+                self.timed_out += 1
+                raise AdmissionRejected("queue timeout", self.retry_after_s) from None
+            raise
+
+    @asynccontextmanager
+    async def admit(self, model: Optional[str] = None, nbytes: int = 0, priority: Optional[Priority] = None):
+        """Hold an upstream call slot for model and/or nbytes of audio budget.
+
+        priority defaults to the current request's (services.priority).
+        """
+        priority = priority or current_priority()
+        await self._acquire(model, nbytes, priority)
+        try:
+            yield
+        finally:
+            self._release(model, nbytes, priority)
+
+    def try_acquire(self, model: Optional[str] = None, nbytes: int = 0, priority: Optional[Priority] = None) -> bool:
+        """Take a reservation only if it fits now and no one is queued for it.
+
+        For optional extra work (hedged requests) that must never wait or
+        jump the queue; pair with release().
+        """
+        priority = priority or current_priority()
+        if not self._fits(model, nbytes, priority) or self._queued_ahead(model, nbytes, priority):
+            return False
+        self._take(model, nbytes, priority, 0.0)
+        return True
+
+    def release(self, model: Optional[str] = None, nbytes: int = 0, priority: Optional[Priority] = None) -> None:
+        self._release(model, nbytes, priority or current_priority())
+
+    def class_stats(self) -> dict:
+        waiting = Counter(w.priority.klass for w in self._waiters)
+        stats = {}
+        for klass in PRIORITY_CLASSES:
+            p50, p95 = self._waits[klass].percentile(50), self._waits[klass].percentile(95)
+            stats[klass] = {
+                "admitted": self._admitted_by_class[klass],
+                "waiting": waiting[klass],
+                "queue_wait_p50_ms": p50 if p50 is None else round(p50, 2),
+                "queue_wait_p95_ms": p95 if p95 is None else round(p95, 2),
+            }
+        return stats
+
+    def stats(self) -> dict:
+        return {
+            "audio_bytes_in_flight": self.bytes_in_flight,
+            "audio_bytes_budget": self.max_bytes,
+            "audio_bytes_utilization": round(self.bytes_in_flight / self.max_bytes, 4) if self.max_bytes else None,
+            "calls_in_flight": {model: self.calls_in_flight[model] for model in self.call_limits},
+            "call_limits": dict(self.call_limits),
+            "waiting": len(self._waiters),
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "bulk_share": self.bulk_share,
+            "classes": self.class_stats(),
+        }
+
+
+admission = AdmissionController(
+    max_bytes=int(ADMISSION_MAX_AUDIO_MB * 1024 * 1024),
+    call_limits={AUDIO_MODEL: ADMISSION_MAX_AUDIO_CALLS, TEXT_MODEL: ADMISSION_MAX_TEXT_CALLS},
+    queue_size=ADMISSION_QUEUE_SIZE,
+    queue_timeout_s=ADMISSION_QUEUE_TIMEOUT_S,
+    retry_after_s=ADMISSION_RETRY_AFTER_S,
+    bulk_share=PRIORITY_BULK_SHARE,
+)
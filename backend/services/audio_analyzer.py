@@ -1,16 +1,25 @@
 import base64
-import asyncio
-import functools
 import json
-import urllib.request
-from config import MISTRAL_API_KEY, AUDIO_MODEL
+from typing import Callable, Iterator, Optional, Tuple
+from config import AUDIO_MODEL
 from prompts.templates import SCAM_AUDIO_PROMPT
+from services.priority import LIVE, current_priority
+from services.resilience import call_model
+from services.upstream import StreamedJsonBody, chat_completion, stream_chat_completion
 
-async def analyze_audio(audio_bytes: bytes) -> str:
-    """Send audio to Voxtral chat completions and return raw response text."""
-    audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
+# Audio base64-encoded per body part; a multiple of 3 so the parts concatenate
+# into one valid base64 string without padding in between
+B64_CHUNK_BYTES = 3 * 64 * 1024
+_AUDIO_MARKER = "@@AUDIO_B64@@"
 
-    payload = json.dumps({
+
+def build_audio_payload(audio_bytes: bytes) -> dict:
+    """Build the Voxtral chat completions payload for a WAV clip."""
+    return _payload(base64.b64encode(audio_bytes).decode("utf-8"))
+
+
+def _payload(audio_b64: str) -> dict:
+    return {
         "model": AUDIO_MODEL,
         "messages": [{
             "role": "user",
@@ -31,31 +40,65 @@ async def analyze_audio(audio_bytes: bytes) -> str:
         "temperature": 0.3,
         "top_p": 0.9,
         "response_format": {"type": "json_object"},
-    }).encode()
-
-    req = urllib.request.Request(
-        "https://api.mistral.ai/v1/chat/completions",
-        data=payload,
-        headers={
-            "Authorization": f"Bearer {MISTRAL_API_KEY}",
-            "Content-Type": "application/json",
-        },
-    )
+    }
+
+
+def _template(stream: bool) -> Tuple[bytes, bytes]:
+    """The serialized payload before and after the audio's base64 string."""
+    payload = _payload(_AUDIO_MARKER)
+    if stream:
+        payload["stream"] = True
+    prefix, suffix = json.dumps(payload).encode("utf-8").split(_AUDIO_MARKER.encode("utf-8"))
+    return prefix, suffix
+
+
+# The model, prompt and options are serialized once, not per request
+_TEMPLATES = {stream: _template(stream) for stream in (False, True)}
+
 
-    loop = asyncio.get_event_loop()
-    resp = await loop.run_in_executor(
-        None,
-        functools.partial(urllib.request.urlopen, req, timeout=120),
+def _b64_parts(audio_bytes: bytes) -> Iterator[bytes]:
+    view = memoryview(audio_bytes)
+    for start in range(0, len(view), B64_CHUNK_BYTES):
+        yield base64.b64encode(view[start:start + B64_CHUNK_BYTES])
+
+
+def build_audio_body(audio_bytes: bytes, stream: bool = False) -> StreamedJsonBody:
+    """The same payload as build_audio_payload, as a body streamed to the socket.
+
+    Only one B64_CHUNK_BYTES slice of base64 exists at a time, so a request
+    holds little more than the audio itself instead of several full-size
+    copies (base64 bytes, str, JSON str, encoded body).
+    """
+    prefix, suffix = _TEMPLATES[stream]
+    return StreamedJsonBody(
+        prefix, lambda: _b64_parts(audio_bytes), suffix, parts_length=4 * ((len(audio_bytes) + 2) // 3),
     )
 
-    try:
-        body = json.loads(resp.read().decode())
-        choices = body.get("choices")
-        if not choices or not isinstance(choices, list) or len(choices) == 0:
-            raise ValueError(f"Unexpected API response structure: no choices")
-        content = choices[0].get("message", {}).get("content", "")
-        if not content:
-            raise ValueError("Empty content in API response")
-        return content
-    finally:
-        resp.close()
+
+async def analyze_audio(audio_bytes: bytes, on_partial: Optional[Callable[[str], None]] = None) -> str:
+    """Send audio to Voxtral chat completions and return raw response text.
+
+    When ``on_partial`` is given the response is streamed and the callback
+    receives the accumulated text as it arrives. Live-stream chunks (the
+    live priority class) may be hedged. The call goes through
+    services.resilience and may raise AdmissionRejected, CircuitOpen or
+    DeadlineExceeded.
+    """
+    if on_partial is None:
+        return await call_model(
+            AUDIO_MODEL, lambda: chat_completion(build_audio_body(audio_bytes)),
+            hedge=current_priority().klass == LIVE,
+        )
+
+    delivered = []
+
+    def feed(text: str) -> None:
+        delivered.append(True)
+        on_partial(text)
+
+    # Once partial text has reached the caller the stream cannot be replayed
+    return await call_model(
+        AUDIO_MODEL,
+        lambda: stream_chat_completion(build_audio_body(audio_bytes, stream=True), feed),
+        can_retry=lambda: not delivered,
+    )
@@ -0,0 +1,105 @@
+"""Cheap per-chunk audio features for the live-stream scheduler.
+
+Everything here is a few NumPy passes over one chunk's PCM, so it can run on
+every received chunk without touching the upstream models:
+
+- rms: loudness, for energy jumps
+- zcr / centroid: zero-crossing rate and spectral centroid, a coarse voice
+  timbre that shifts when a different speaker takes over
+- dtmf: a keypad tone (one DTMF row and one column frequency dominating the
+  spectrum for several consecutive short frames), i.e. the caller is being
+  told to "press 1"
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from services.wav import WavFormatError, parse_wav, to_samples
+
+DTMF_LOW = (697.0, 770.0, 852.0, 941.0)
+DTMF_HIGH = (1209.0, 1336.0, 1477.0, 1633.0)
+DTMF_KEYS = ("123A", "456B", "789C", "*0#D")
+# Share of a frame's spectral energy a row+column pair must hold
+DTMF_MIN_SHARE = 0.5
+# A key press lasts 40 ms or more, far less than a chunk, so tones are
+# detected per frame and a key needs this many consecutive matching frames
+DTMF_FRAME_MS = 40
+DTMF_MIN_FRAMES = 2
+
+
+@dataclass
+class ChunkFeatures:
+    rms: float
+    zcr: float
+    centroid_hz: float
+    dtmf: Optional[str] = None
+
+
+def _pcm(audio_bytes: bytes):
+    """Return (mono float samples, sample rate), or (None, 0) if unreadable."""
+    try:
+        info = parse_wav(audio_bytes)
+    except WavFormatError:
+        return None, 0
+    samples = to_samples(info, audio_bytes)
+    if samples is None:
+        return None, 0
+    samples = samples.astype(np.float32, copy=False)
+    if info.channels > 1:
+        samples = samples[: len(samples) // info.channels * info.channels].reshape(-1, info.channels).mean(axis=1)
+    return samples, info.sample_rate
+
+
+def _band_power(power: np.ndarray, freqs: np.ndarray, hz: float, half_width: float) -> float:
+    band = (freqs >= hz - half_width) & (freqs <= hz + half_width)
+    return float(power[band].sum())
+
+
+def _frame_key(frame: np.ndarray, rate: int) -> Optional[str]:
+    """The DTMF key dominating one short frame, if any."""
+    power = np.abs(np.fft.rfft(frame * np.hanning(len(frame)))) ** 2
+    total = float(power.sum())
+    if total <= 0.0:
+        return None
+    freqs = np.fft.rfftfreq(len(frame), 1.0 / rate)
+    # DTMF generators may be off by up to 1.5%; a short frame's bins are
+    # coarser than that, so the band is at least the windowed main lobe
+    lobe = 2.0 * rate / len(frame)
+    low = [_band_power(power, freqs, hz, max(hz * 0.015, lobe)) for hz in DTMF_LOW]
+    high = [_band_power(power, freqs, hz, max(hz * 0.015, lobe)) for hz in DTMF_HIGH]
+    row, col = int(np.argmax(low)), int(np.argmax(high))
+    if (low[row] + high[col]) / total < DTMF_MIN_SHARE:
+        return None
+    return DTMF_KEYS[row][col]
+
+
+def detect_dtmf(samples: np.ndarray, rate: int) -> Optional[str]:
+    """Return the first DTMF key held for DTMF_MIN_FRAMES consecutive frames."""
+    frame_len = int(rate * DTMF_FRAME_MS / 1000)
+    if frame_len < 64 or rate < 2 * DTMF_HIGH[-1]:
+        return None
+    run_key, run = None, 0
+    for start in range(0, len(samples) - frame_len + 1, frame_len):
+        key = _frame_key(samples[start:start + frame_len], rate)
+        run = run + 1 if key is not None and key == run_key else int(key is not None)
+        run_key = key
+        if run >= DTMF_MIN_FRAMES:
+            return key
+    return None
+
+
+def extract_features(audio_bytes: bytes) -> Optional[ChunkFeatures]:
+    """Features of one WAV chunk; None when it is unreadable or empty."""
+    samples, rate = _pcm(audio_bytes)
+    if samples is None or len(samples) < 2:
+        return None
+    rms = float(np.sqrt(np.mean(samples * samples)))
+    signs = np.signbit(samples)
+    zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / (len(samples) - 1)
+    magnitude = np.abs(np.fft.rfft(samples))
+    freqs = np.fft.rfftfreq(len(samples), 1.0 / rate)
+    total = float(magnitude.sum())
+    centroid = float((magnitude * freqs).sum() / total) if total > 0 else 0.0
+    return ChunkFeatures(rms=rms, zcr=zcr, centroid_hz=centroid, dtmf=detect_dtmf(samples, rate))
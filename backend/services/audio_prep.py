@@ -0,0 +1,194 @@
+"""Upstream audio preparation: downmix, resample and VAD-trim before base64.
+
+Call-center exports are often 44.1/48 kHz stereo, yet Voxtral gets nothing
+from more than the 16 kHz mono 16-bit the frontend records. prepare_audio
+normalizes to that format (only ever downward: lower rates are kept, 8-bit
+mono is left alone), then cuts non-speech with the VAD. The payload shrinks
+before it is base64-encoded, typically 3-6x for stereo 44.1/48 kHz files.
+
+Stereo PBX exports carry the customer on one channel and the caller on the
+other. With channel="left"/"right" only that channel is kept, halving the
+payload and keeping the customer's voice out of the analysis;
+detect_caller_channel picks one automatically.
+
+prepare_audio and detect_caller_channel are pure, top-level functions so
+they can run in a worker process (see services/cpu_pool.py).
+"""
+
+from dataclasses import dataclass
+from math import gcd
+from typing import Optional
+
+import numpy as np
+
+from services.vad import FRAME_MS, speech_frames, trim_silence
+from services.wav import WavFormatError, WavInfo, build_wav, parse_wav, to_samples
+
+TARGET_RATE = 16000
+# Windowed-sinc resampling filter: taps on each side of the output position
+HALF_TAPS = 16
+# Output samples resampled per vectorized block, bounding the gather matrix
+_BLOCK = 1 << 16
+
+CHANNEL_MODES = ("mix", "left", "right", "auto")
+_CHANNEL_INDEX = {"left": 0, "right": 1}
+# Channels correlated above this carry the same audio (duplicated mono or
+# heavy crosstalk), so isolating one gains nothing
+CROSSTALK_CORRELATION = 0.8
+# A channel "owns" a speech frame when it is this much louder than the other
+OWN_SPEECH_RATIO = 2.0
+
+
+@dataclass
+class PreparedAudio:
+    audio_bytes: bytes
+    original_bytes: int
+    normalized: bool = False
+    removed_s: float = 0.0
+    channel: Optional[str] = None  # channel scored for stereo input: "mix", "left" or "right"
+
+
+def _phase_filters(up: int, cutoff: float) -> np.ndarray:
+    """Hann-windowed sinc taps for each of the `up` fractional output phases."""
+    k = np.arange(-HALF_TAPS + 1, HALF_TAPS + 1, dtype=np.float64)
+    t = k[None, :] - (np.arange(up, dtype=np.float64) / up)[:, None]
+    taps = cutoff * np.sinc(cutoff * t) * (0.5 + 0.5 * np.cos(np.pi * np.clip(t / HALF_TAPS, -1.0, 1.0)))
+    return taps / taps.sum(axis=1, keepdims=True)
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Band-limited rational resampling of mono samples (vectorized polyphase FIR)."""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples.astype(np.float32, copy=False)
+    g = gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    # Low-pass at the lower of the two Nyquist rates to avoid aliasing
+    filters = _phase_filters(up, min(1.0, dst_rate / src_rate))
+    k = np.arange(-HALF_TAPS + 1, HALF_TAPS + 1)
+    padded = np.pad(samples.astype(np.float32, copy=False), HALF_TAPS)
+
+    n_out = len(samples) * up // down
+    out = np.empty(n_out, dtype=np.float32)
+    for start in range(0, n_out, _BLOCK):
+        n = np.arange(start, min(start + _BLOCK, n_out), dtype=np.int64)
+        base, phase = np.divmod(n * down, up)
+        window = padded[base[:, None] + k[None, :] + HALF_TAPS]
+        out[start:start + len(n)] = np.einsum("ij,ij->i", window, filters[phase])
+    return out
+
+
+def _frames(samples: np.ndarray, channels: int) -> np.ndarray:
+    frames = len(samples) // channels
+    return samples[: frames * channels].reshape(frames, channels)
+
+
+def detect_caller_channel(audio_bytes: bytes, energy_threshold: float = 500.0) -> str:
+    """Pick the remote party's channel of a stereo call recording, or "mix".
+
+    Channels that are strongly correlated carry the same audio and are mixed.
+    Otherwise each channel is credited with the speech frames where it is
+    active and clearly louder than the other (so crosstalk leaking into the
+    quieter side is not counted), and the channel that talks most is taken
+    as the caller: scam callers do most of the talking.
+    """
+    try:
+        info = parse_wav(audio_bytes)
+    except WavFormatError:
+        return "mix"
+    samples = to_samples(info, audio_bytes)
+    if info.channels != 2 or samples is None:
+        return "mix"
+    stereo = _frames(samples, 2).astype(np.float64)
+    left, right = stereo[:, 0], stereo[:, 1]
+    if left.std() > 0 and right.std() > 0 and abs(np.corrcoef(left, right)[0, 1]) > CROSSTALK_CORRELATION:
+        return "mix"
+
+    frame_len = max(1, info.sample_rate * FRAME_MS // 1000)
+    starts = np.arange(0, len(left), frame_len)
+    lengths = np.diff(np.append(starts, len(left)))
+    rms = [np.sqrt(np.add.reduceat(ch * ch, starts) / lengths) for ch in (left, right)]
+    active = [speech_frames(ch, frame_len, energy_threshold) for ch in (left, right)]
+    own = [
+        int(np.count_nonzero(active[i] & (rms[i] >= OWN_SPEECH_RATIO * rms[1 - i])))
+        for i in (0, 1)
+    ]
+    if own[0] == own[1]:
+        return "mix"
+    return "left" if own[0] > own[1] else "right"
+
+
+def normalize_wav(
+    audio_bytes: bytes,
+    info: WavInfo,
+    target_rate: int = TARGET_RATE,
+    channel: str = "mix",
+) -> Optional[bytes]:
+    """Re-encode as mono 16-bit at min(rate, target_rate); None if already compact or unsupported.
+
+    Multi-channel audio is mixed down, or reduced to one channel of a stereo
+    file when channel is "left" or "right".
+    """
+    wants_mix = info.channels > 1
+    wants_rate = info.sample_rate > target_rate
+    wants_depth = info.bits_per_sample > 16
+    if not (wants_mix or wants_rate or wants_depth):
+        return None
+    samples = to_samples(info, audio_bytes)
+    if samples is None:
+        return None
+
+    samples = samples.astype(np.float32, copy=False)
+    if wants_mix:
+        frames = _frames(samples, info.channels)
+        if info.channels == 2 and channel in _CHANNEL_INDEX:
+            samples = frames[:, _CHANNEL_INDEX[channel]]
+        else:
+            samples = frames.mean(axis=1)
+    rate = info.sample_rate
+    if wants_rate:
+        samples = resample(samples, rate, target_rate)
+        rate = target_rate
+    pcm = np.clip(np.rint(samples), -32768, 32767).astype("<i2")
+    return build_wav(pcm.tobytes(), 1, rate, 16)
+
+
+def prepare_audio(
+    audio_bytes: bytes,
+    normalize: bool = True,
+    target_rate: int = TARGET_RATE,
+    vad: bool = True,
+    vad_energy_threshold: float = 500.0,
+    vad_min_silence_ms: int = 500,
+    vad_padding_ms: int = 150,
+    channel: str = "mix",
+) -> PreparedAudio:
+    """Normalize then VAD-trim one recording; unreadable input passes through untouched.
+
+    channel ("mix", "left" or "right") selects what is kept of a stereo
+    recording; isolating a channel normalizes even when normalize is off.
+    """
+    prepared = PreparedAudio(audio_bytes, original_bytes=len(audio_bytes))
+    try:
+        info = parse_wav(audio_bytes)
+    except WavFormatError:
+        return prepared
+
+    isolate = info.channels == 2 and channel in _CHANNEL_INDEX
+    if info.channels == 2:
+        prepared.channel = channel if isolate else "mix"
+    if normalize or isolate:
+        normalized = normalize_wav(audio_bytes, info, target_rate if normalize else info.sample_rate, channel)
+        if normalized is not None:
+            prepared.audio_bytes = normalized
+            prepared.normalized = True
+            info = parse_wav(normalized)
+
+    if vad:
+        trim = trim_silence(
+            prepared.audio_bytes, vad_energy_threshold, vad_min_silence_ms, vad_padding_ms, info=info,
+        )
+        # With no speech found at all the model still gets the whole recording
+        if trim is not None and trim.kept_s > 0 and trim.removed_s > 0:
+            prepared.audio_bytes = trim.audio_bytes
+            prepared.removed_s = trim.removed_s
+    return prepared
@@ -0,0 +1,46 @@
+"""Audio-duration accounting for uploads and live streams.
+
+Voxtral is billed by audio minute, so usage is tracked in seconds of audio
+(read from the WAV header) rather than bytes. Every analyzed recording or
+stream window is recorded with the decision_source that settled it; only
+"model" seconds were sent upstream and count toward the estimated cost.
+Callers that waited on another caller's identical in-flight call record
+"coalesced", so shared audio is billed once.
+"""
+
+from collections import Counter
+
+from config import AUDIO_COST_PER_MINUTE_USD
+
+
+class AudioUsage:
+    def __init__(self, cost_per_minute: float = AUDIO_COST_PER_MINUTE_USD):
+        self.cost_per_minute = cost_per_minute
+        self.seconds_by_source: Counter = Counter()
+        self.items = 0
+        self.payload_bytes_in = 0
+        self.payload_bytes_out = 0
+
+    def record_payload(self, bytes_in: int, bytes_out: int) -> None:
+        """Bytes of an upload before and after preparation (downmix, resample, VAD)."""
+        self.payload_bytes_in += bytes_in
+        self.payload_bytes_out += bytes_out
+
+    def record(self, duration_s: float, decision_source: str) -> None:
+        self.items += 1
+        self.seconds_by_source[decision_source] += duration_s
+
+    def stats(self) -> dict:
+        upstream = self.seconds_by_source.get("model", 0.0)
+        return {
+            "items": self.items,
+            "audio_seconds": round(sum(self.seconds_by_source.values()), 2),
+            "upstream_audio_seconds": round(upstream, 2),
+            "seconds_by_source": {k: round(v, 2) for k, v in self.seconds_by_source.items()},
+            "estimated_cost_usd": round(upstream / 60.0 * self.cost_per_minute, 6),
+            "payload_bytes_in": self.payload_bytes_in,
+            "payload_bytes_out": self.payload_bytes_out,
+        }
+
+
+audio_usage = AudioUsage()
@@ -0,0 +1,81 @@
+"""Backpressure policies for live streams that outrun upstream capacity.
+
+When Voxtral is slower than real time, chunks pile up on a connection. Once
+more than STREAM_MAX_BACKLOG chunks are waiting for an analysis slot, the
+configured policy decides what happens to the backlog:
+
+- block: analyze every chunk in turn (lag grows without bound)
+- merge: join the backlog into one longer window and analyze it once
+- drop:  analyze only the newest chunk and skip the stale ones
+- shed:  send only the newest chunk upstream; stale chunks get the local
+         silence/fingerprint path only
+
+Every step produced here carries a report that is echoed to the client in
+the partial result under "backpressure".
+"""
+
+import io
+import wave
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+POLICIES = ("block", "merge", "drop", "shed")
+
+
+@dataclass
+class DispatchStep:
+    chunk_index: int
+    audio_chunk: bytes
+    upstream: bool = True
+    report: Optional[dict] = None
+
+
+def merge_wav_chunks(chunks: List[bytes]) -> Optional[bytes]:
+    """Concatenate WAV chunks into one WAV; None if any is unreadable or formats differ."""
+    frames = []
+    params = None
+    try:
+        for chunk in chunks:
+            with wave.open(io.BytesIO(chunk)) as w:
+                fmt = (w.getnchannels(), w.getsampwidth(), w.getframerate())
+                if params is not None and fmt != params:
+                    return None
+                params = fmt
+                frames.append(w.readframes(w.getnframes()))
+    except (wave.Error, EOFError):
+        return None
+    if params is None:
+        return None
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as out:
+        out.setnchannels(params[0])
+        out.setsampwidth(params[1])
+        out.setframerate(params[2])
+        out.writeframes(b"".join(frames))
+    return buf.getvalue()
+
+
+def plan_dispatch(batch: List[Tuple[int, bytes]], policy: str, max_backlog: int) -> List[DispatchStep]:
+    """Turn the waiting (chunk_index, audio) backlog into analysis steps."""
+    if policy not in POLICIES or policy == "block" or len(batch) <= max_backlog:
+        return [DispatchStep(index, chunk) for index, chunk in batch]
+
+    indices = [index for index, _ in batch]
+    newest_index, newest_chunk = batch[-1]
+    report = {"policy": policy, "backlog": len(batch)}
+
+    if policy == "merge":
+        merged = merge_wav_chunks([chunk for _, chunk in batch])
+        if merged is not None:
+            return [DispatchStep(newest_index, merged, report={**report, "merged_chunks": indices})]
+        # Mixed or unreadable formats cannot be joined; keep the newest instead
+        report = {"policy": "drop", "backlog": len(batch), "requested_policy": "merge"}
+        policy = "drop"
+
+    if policy == "drop":
+        return [DispatchStep(newest_index, newest_chunk, report={**report, "dropped_chunks": indices[:-1]})]
+
+    steps = [DispatchStep(index, chunk, upstream=False, report=dict(report)) for index, chunk in batch[:-1]]
+    steps.append(DispatchStep(newest_index, newest_chunk, report={**report, "shed_chunks": indices[:-1]}))
+    return steps
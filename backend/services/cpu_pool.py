@@ -0,0 +1,42 @@
+"""Off-loop execution for CPU-bound audio work.
+
+With AUDIO_PREP_WORKERS=0 (default) work runs in the default thread pool via
+asyncio.to_thread; NumPy releases the GIL for most of it. With N > 0 a
+process pool of N workers is started on first use, so even large uploads
+never hold the event loop's GIL. Functions passed to run_cpu must be
+top-level and their arguments picklable; a memory-mapped upload is copied
+into bytes for the worker, as pickling would copy it anyway.
+"""
+
+import asyncio
+import functools
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import AUDIO_PREP_WORKERS
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if AUDIO_PREP_WORKERS > 0 and _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=AUDIO_PREP_WORKERS)
+    return _executor
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run fn(*args, **kwargs) off the event loop."""
+    executor = _get_executor()
+    if executor is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    args = tuple(arg[:] if isinstance(arg, mmap.mmap) else arg for arg in args)
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
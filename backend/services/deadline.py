@@ -0,0 +1,47 @@
+"""Per-request time budgets carried down to upstream calls via contextvars.
+
+Routers set a deadline when a request starts; the stream sets one per
+chunk. services/resilience.py caps each upstream attempt at what is left of
+it and only retries when enough remains, so a slow upstream cannot hold a
+request past its budget. Tasks created under a deadline (coalesced flights,
+segment fan-out, the speculative second opinion) inherit it.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before the upstream call could finish."""
+
+
+def _bounded(seconds: float) -> float:
+    """The earlier of the current deadline and `seconds` from now (monotonic)."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    return at if current is None else min(current, at)
+
+
+def set_deadline(seconds: float) -> None:
+    """Give the current request (and tasks it starts) at most `seconds` more."""
+    _deadline.set(_bounded(seconds))
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Tighten the deadline to `seconds` from now for the enclosed block."""
+    token = _deadline.set(_bounded(seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_s() -> Optional[float]:
+    """Seconds left in the current budget, or None when no deadline is set."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
@@ -0,0 +1,339 @@
+"""Perceptual audio fingerprints for recurring robocall recordings.
+
+Robocall campaigns replay one recording with different encodings, gain and
+leading silence, so exact-bytes caching misses them. This module hashes
+spectral peak pairs (landmarks) the way music-recognition systems do:
+
+- STFT frames are sized in milliseconds, not samples, so a frequency bin is
+  the same width in Hz at every sample rate and no resampling is needed
+- peaks are local maxima within a fixed dynamic range of the loudest bin,
+  which makes them gain invariant; digital silence produces no peaks
+- each anchor peak is paired with the next few peaks; a hash packs
+  (f1, f2, dt) and is stored with the anchor's frame time
+
+The index is an inverted list held as sorted NumPy arrays. A query votes for
+(record, time offset) pairs, so a clip that starts late or has extra leading
+silence still lines up on a single offset.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import (
+    FINGERPRINT_ENABLED,
+    FINGERPRINT_MIN_MATCHES,
+    FINGERPRINT_MIN_MATCH_RATIO,
+    FINGERPRINT_MIN_COVERAGE,
+    FINGERPRINT_MAX_DURATION_DIFF,
+    FINGERPRINT_MAX_RECORDS,
+)
+from models.schemas import AnalysisResult
+from services.wav import parse_wav, to_samples
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 64
+HOP_MS = 32
+MAX_FREQ_HZ = 4000
+DYNAMIC_RANGE_DB = 50.0
+PEAK_FREQ_RADIUS = 10   # bins (~156 Hz)
+PEAK_TIME_RADIUS = 5    # frames (~160 ms)
+FAN_OUT = 5
+MAX_PAIR_DT = 63        # frames (~2 s); fits in 6 bits
+
+_DEMO_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "demo",
+)
+
+
+@dataclass
+class Fingerprint:
+    hashes: np.ndarray  # int64 landmark hashes
+    times: np.ndarray   # int64 anchor frame index per hash
+    duration_s: float
+
+
+def _decode_wav(audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+    """Decode WAV bytes (or an mmap of them) to mono float32 samples and the sample rate."""
+    info = parse_wav(audio_bytes)
+    samples = to_samples(info, audio_bytes)
+    if samples is None:
+        raise ValueError(f"Unsupported sample format: {info.format_tag}/{info.bits_per_sample}-bit")
+    samples = samples.astype(np.float32) / 32768.0
+    usable = len(samples) - len(samples) % info.channels
+    samples = samples[:usable].reshape(-1, info.channels).mean(axis=1)
+    return samples, info.sample_rate
+
+
+def _spectrogram(samples: np.ndarray, rate: int) -> np.ndarray:
+    """Log-magnitude spectrogram (frames x bins) up to MAX_FREQ_HZ."""
+    n_fft = int(round(rate * FRAME_MS / 1000))
+    hop = int(round(rate * HOP_MS / 1000))
+    if len(samples) < n_fft:
+        return np.empty((0, 0), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, n_fft)[::hop]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(n_fft).astype(np.float32), axis=1))
+    max_bin = int(MAX_FREQ_HZ * n_fft / rate)
+    return 20.0 * np.log10(spectrum[:, 1:max_bin] + 1e-10)
+
+
+def _sliding_max(values: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius, radius)
+    padded = np.pad(values, pad, constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=axis)
+    return windows.max(axis=-1)
+
+
+def _find_peaks(spec: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (frame, bin) coordinates of spectral peaks sorted by time."""
+    if spec.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    local_max = _sliding_max(_sliding_max(spec, PEAK_FREQ_RADIUS, axis=1), PEAK_TIME_RADIUS, axis=0)
+    floor = spec.max() - DYNAMIC_RANGE_DB
+    t, f = np.nonzero((spec == local_max) & (spec > floor))
+    return t.astype(np.int64), f.astype(np.int64)
+
+
+def _pair_hashes(t: np.ndarray, f: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    hashes, times = [], []
+    for k in range(1, FAN_OUT + 1):
+        if len(t) <= k:
+            break
+        dt = t[k:] - t[:-k]
+        keep = (dt > 0) & (dt <= MAX_PAIR_DT)
+        hashes.append((f[:-k][keep] << 14) | (f[k:][keep] << 6) | dt[keep])
+        times.append(t[:-k][keep])
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(times)
+
+
+def compute_fingerprint(audio_bytes: bytes) -> Optional[Fingerprint]:
+    """Fingerprint a WAV file; returns None when it cannot be decoded."""
+    try:
+        samples, rate = _decode_wav(audio_bytes)
+    except ValueError as e:
+        logger.debug("Fingerprint decode failed: %s", e)
+        return None
+    t, f = _find_peaks(_spectrogram(samples, rate))
+    hashes, times = _pair_hashes(t, f)
+    return Fingerprint(hashes=hashes, times=times, duration_s=len(samples) / rate if rate else 0.0)
+
+
+@dataclass
+class FingerprintMatch:
+    name: str
+    votes: int
+    match_ratio: float
+    offset_s: float
+    query_coverage: float      # share of the query's landmark seconds with an aligned hash
+    reference_coverage: float  # same, for the indexed recording
+    audio_result: Optional[AnalysisResult]
+    text_result: Optional[AnalysisResult]
+
+
+class FingerprintIndex:
+    """Inverted index from landmark hash to (record, time) postings."""
+
+    def __init__(
+        self,
+        min_matches: int = 20,
+        min_match_ratio: float = 0.05,
+        max_records: int = 500,
+        min_coverage: float = 0.8,
+        max_duration_diff: float = 0.2,
+    ):
+        self.min_matches = min_matches
+        self.min_match_ratio = min_match_ratio
+        self.min_coverage = min_coverage
+        self.max_duration_diff = max_duration_diff
+        self.max_records = max_records
+        self._records = OrderedDict()  # rid -> (name, value_json, seeded, duration_s, landmark_seconds)
+        self._hashes = np.empty(0, dtype=np.int64)
+        self._rids = np.empty(0, dtype=np.int64)
+        self._times = np.empty(0, dtype=np.int64)
+        self._next_rid = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(
+        self,
+        fingerprint: Fingerprint,
+        audio_result: Optional[AnalysisResult],
+        text_result: Optional[AnalysisResult] = None,
+        name: str = "",
+        seeded: bool = False,
+    ) -> None:
+        """Index a scored recording so replays of it can reuse the verdict."""
+        if len(fingerprint.hashes) < self.min_matches:
+            return
+        value = json.dumps({
+            "audio_analysis": audio_result.model_dump(mode="json") if audio_result else None,
+            "text_analysis": text_result.model_dump(mode="json") if text_result else None,
+        })
+        order = np.argsort(fingerprint.hashes, kind="stable")
+        new_hashes = fingerprint.hashes[order]
+        with self._lock:
+            rid = self._next_rid
+            self._next_rid += 1
+            self._records[rid] = (
+                name or f"record_{rid}", value, seeded, fingerprint.duration_s, _seconds(fingerprint.times),
+            )
+            # Merge the new sorted postings into the existing sorted arrays
+            at = np.searchsorted(self._hashes, new_hashes)
+            self._hashes = np.insert(self._hashes, at, new_hashes)
+            self._rids = np.insert(self._rids, at, np.full(len(new_hashes), rid, dtype=np.int64))
+            self._times = np.insert(self._times, at, fingerprint.times[order])
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._records) > self.max_records:
+            victim = next((rid for rid, (_, _, seeded, _, _) in self._records.items() if not seeded), None)
+            if victim is None:
+                return
+            del self._records[victim]
+            keep = self._rids != victim
+            self._hashes = self._hashes[keep]
+            self._rids = self._rids[keep]
+            self._times = self._times[keep]
+
+    def lookup(self, fingerprint: Optional[Fingerprint], whole_recording: bool = True) -> Optional[FingerprintMatch]:
+        """Return the best aligned match, or None below the vote and coverage thresholds.
+
+        Coverage is counted in one-second buckets: of the seconds that hold any
+        landmark, the share that also hold an aligned hash. Re-encoding drops
+        hashes evenly, while new audio spliced around a known clip leaves whole
+        seconds unmatched. The query needs min_coverage. With whole_recording
+        (uploads, which reuse a whole-call verdict) the indexed recording needs
+        it too and the durations must be within max_duration_diff of each
+        other; a stream chunk only has to lie inside a known recording.
+        """
+        self.lookups += 1
+        if fingerprint is None or len(fingerprint.hashes) < self.min_matches:
+            return None
+        with self._lock:
+            hashes, rids, times = self._hashes, self._rids, self._times
+            records = dict(self._records)
+        if len(hashes) == 0:
+            return None
+
+        lo = np.searchsorted(hashes, fingerprint.hashes, side="left")
+        hi = np.searchsorted(hashes, fingerprint.hashes, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            return None
+
+        # Expand every query hash into its postings without a Python loop
+        starts = np.repeat(lo - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        postings = starts + np.arange(total)
+        offsets = times[postings] - np.repeat(fingerprint.times, counts)
+        keys = (rids[postings] << 32) | (offsets + (1 << 31))
+        unique_keys, votes = np.unique(keys, return_counts=True)
+        best = int(votes.argmax())
+        best_votes = int(votes[best])
+        ratio = best_votes / len(fingerprint.hashes)
+        if best_votes < self.min_matches or ratio < self.min_match_ratio:
+            return None
+
+        rid = int(unique_keys[best] >> 32)
+        offset_frames = int(unique_keys[best] & 0xFFFFFFFF) - (1 << 31)
+        if rid not in records:
+            return None
+        name, value, _, ref_duration_s, ref_seconds = records[rid]
+
+        aligned = keys == unique_keys[best]
+        query_coverage = _seconds(np.repeat(fingerprint.times, counts)[aligned]) / _seconds(fingerprint.times)
+        ref_coverage = _seconds(times[postings][aligned]) / ref_seconds
+        if query_coverage < self.min_coverage:
+            return None
+        if whole_recording:
+            longer = max(fingerprint.duration_s, ref_duration_s)
+            if ref_coverage < self.min_coverage or abs(fingerprint.duration_s - ref_duration_s) > self.max_duration_diff * longer:
+                return None
+        data = json.loads(value)
+        self.matches += 1
+        return FingerprintMatch(
+            name=name,
+            votes=best_votes,
+            match_ratio=round(ratio, 4),
+            offset_s=round(offset_frames * HOP_MS / 1000, 3),
+            query_coverage=round(query_coverage, 4),
+            reference_coverage=round(ref_coverage, 4),
+            audio_result=AnalysisResult(**data["audio_analysis"]) if data["audio_analysis"] else None,
+            text_result=AnalysisResult(**data["text_analysis"]) if data["text_analysis"] else None,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "enabled": FINGERPRINT_ENABLED,
+            "records": len(self._records),
+            "postings": int(len(self._hashes)),
+            "lookups": self.lookups,
+            "matches": self.matches,
+        }
+
+
+def _seconds(frame_times: np.ndarray) -> int:
+    """Number of distinct one-second buckets the anchor frames fall in."""
+    return len(np.unique(frame_times * HOP_MS // 1000))
+
+
+def seed_from_demo(index: "FingerprintIndex", demo_root: str = _DEMO_ROOT) -> int:
+    """Index demo/sample_calls/audio with the verdicts in demo/expected_outputs."""
+    audio_dir = os.path.join(demo_root, "sample_calls", "audio")
+    outputs_dir = os.path.join(demo_root, "expected_outputs")
+    if not os.path.isdir(audio_dir):
+        return 0
+
+    seeded = 0
+    for fname in sorted(os.listdir(audio_dir)):
+        if not fname.endswith(".wav"):
+            continue
+        stem = fname[:-4]
+        # Prefer the audio-mode expected output when a text-mode one shares the name
+        for candidate in (f"{stem}_audio.json", f"{stem}.json"):
+            output_path = os.path.join(outputs_dir, candidate)
+            if os.path.exists(output_path):
+                break
+        else:
+            continue
+        with open(output_path) as f:
+            report = json.load(f)
+        with open(os.path.join(audio_dir, fname), "rb") as f:
+            fingerprint = compute_fingerprint(f.read())
+        if fingerprint is None:
+            continue
+        audio = report.get("audio_analysis")
+        text = report.get("text_analysis")
+        index.add(
+            fingerprint,
+            audio_result=AnalysisResult(**audio) if audio else None,
+            text_result=AnalysisResult(**text) if text else None,
+            name=stem,
+            seeded=True,
+        )
+        seeded += 1
+    return seeded
+
+
+fingerprint_index = FingerprintIndex(
+    min_matches=FINGERPRINT_MIN_MATCHES,
+    min_match_ratio=FINGERPRINT_MIN_MATCH_RATIO,
+    max_records=FINGERPRINT_MAX_RECORDS,
+    min_coverage=FINGERPRINT_MIN_COVERAGE,
+    max_duration_diff=FINGERPRINT_MAX_DURATION_DIFF,
+)
@@ -0,0 +1,238 @@
+"""CPU-only hashed n-gram classifier that runs ahead of Mistral Large.
+
+Transcripts are tokenized, expanded into word unigrams and bigrams, and each
+n-gram is hashed into a fixed number of buckets. The model is a logistic
+regression over bucket presence, stored as a single float32 weight array in
+an .npz file (data/local_classifier.npz), so scoring is one NumPy gather and
+a sum.
+
+The endpoint uses it as a cascade stage. Probabilities at or above
+LOCAL_SCAM_THRESHOLD or at or below LOCAL_SAFE_THRESHOLD are answered
+locally; the uncertain band between them goes to TEXT_MODEL.
+
+Train or retrain with scripts/train_local_classifier.py.
+"""
+
+import logging
+import os
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    LOCAL_CLASSIFIER_ENABLED,
+    LOCAL_CLASSIFIER_PATH,
+    LOCAL_SCAM_THRESHOLD,
+    LOCAL_SAFE_THRESHOLD,
+    THRESHOLD_SAFE,
+    THRESHOLD_SUSPICIOUS,
+)
+from models.schemas import AnalysisResult, Signal
+from services.response_formatter import score_to_verdict
+from services.result_cache import normalize_transcript
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "local_classifier.npz",
+)
+DEFAULT_BUCKETS = 1 << 14
+# Fallback verdicts stay below LIKELY_SCAM: the classifier is not calibrated
+FALLBACK_MAX_SCORE = THRESHOLD_SUSPICIOUS - 0.01
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def ngrams(transcript: str) -> List[str]:
+    """Distinct word unigrams and bigrams of the normalized transcript."""
+    tokens = _TOKEN_RE.findall(normalize_transcript(transcript).replace("’", "'"))
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return list(dict.fromkeys(grams))
+
+
+def hash_ngrams(grams: List[str], buckets: int) -> np.ndarray:
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) % buckets for g in grams), dtype=np.int64, count=len(grams))
+
+
+def featurize(transcript: str, buckets: int = DEFAULT_BUCKETS) -> Tuple[np.ndarray, float]:
+    """Return (bucket indices, per-feature value); presence is scaled by 1/sqrt(n)."""
+    grams = ngrams(transcript)
+    value = 1.0 / np.sqrt(len(grams)) if grams else 0.0
+    return hash_ngrams(grams, buckets), value
+
+
+class LocalClassifier:
+    """Logistic regression over hashed n-gram buckets."""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: float,
+        scam_threshold: float = 0.95,
+        safe_threshold: float = 0.05,
+        enabled: bool = True,
+    ):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.buckets = len(self.weights)
+        self.scam_threshold = scam_threshold
+        self.safe_threshold = safe_threshold
+        self.enabled = enabled
+        self.evaluated = 0
+        self.decided_scam = 0
+        self.decided_safe = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> Optional["LocalClassifier"]:
+        try:
+            with np.load(path) as data:
+                return cls(data["weights"], float(data["bias"]), **kwargs)
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Local classifier unavailable (%s): %s", path, e)
+            return None
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=np.float32(self.bias))
+
+    def predict_proba(self, transcript: str) -> float:
+        """Probability that the transcript is a scam (any non-SAFE verdict)."""
+        idx, value = featurize(transcript, self.buckets)
+        z = self.bias + value * float(self.weights[idx].sum())
+        return float(1.0 / (1.0 + np.exp(-z)))
+
+    def top_ngrams(self, transcript: str, k: int = 3) -> List[str]:
+        """N-grams pushing hardest toward a scam verdict."""
+        grams = ngrams(transcript)
+        if not grams:
+            return []
+        contrib = self.weights[hash_ngrams(grams, self.buckets)]
+        order = np.argsort(-contrib)[:k]
+        return [grams[i] for i in order if contrib[i] > 0]
+
+    def decide(self, transcript: str, allow_safe: bool = True) -> Optional[AnalysisResult]:
+        """Return a local verdict outside the uncertain band, else None.
+
+        allow_safe=False (a scam phrase rule matched) keeps a low probability
+        from clearing the transcript; it goes to TEXT_MODEL instead.
+        """
+        if not self.enabled:
+            return None
+        self.evaluated += 1
+        p = self.predict_proba(transcript)
+
+        if p >= self.scam_threshold:
+            self.decided_scam += 1
+            score = round(p, 4)
+            phrases = ", ".join(f"'{g}'" for g in self.top_ngrams(transcript))
+            return AnalysisResult(
+                scam_score=score,
+                confidence=score,
+                verdict=score_to_verdict(score),
+                signals=[Signal(
+                    category="KNOWN_SCAM_SCRIPTS",
+                    detail=f"Wording typical of scam calls: {phrases}",
+                    severity="high",
+                )],
+                transcript_summary="Scored by the local transcript classifier.",
+                recommendation="Hang up. This call reads like a known scam script.",
+            )
+
+        if p <= self.safe_threshold and allow_safe:
+            self.decided_safe += 1
+            return AnalysisResult(
+                scam_score=round(p, 4),
+                confidence=round(1.0 - p, 4),
+                verdict="SAFE",
+                signals=[],
+                transcript_summary="Scored by the local transcript classifier.",
+                recommendation="No scam indicators found.",
+            )
+        return None
+
+    def fallback(self, transcript: str, allow_safe: bool = True) -> AnalysisResult:
+        """A verdict for any probability, used while TEXT_MODEL is unavailable.
+
+        The probability is not calibrated, so the score is capped below the
+        LIKELY_SCAM line (at most SUSPICIOUS); with allow_safe=False (a scam
+        phrase rule matched) it is also kept at or above SUSPICIOUS.
+        Confidence is the distance from 0.5.
+        """
+        self.fallbacks += 1
+        p = self.predict_proba(transcript)
+        score = min(p, FALLBACK_MAX_SCORE)
+        if not allow_safe:
+            score = max(score, THRESHOLD_SAFE)
+        score = round(score, 4)
+        phrases = ", ".join(f"'{g}'" for g in self.top_ngrams(transcript))
+        signals = []
+        if p >= 0.5 and phrases:
+            signals.append(Signal(
+                category="KNOWN_SCAM_SCRIPTS",
+                detail=f"Wording typical of scam calls: {phrases}",
+                severity="medium",
+            ))
+        return AnalysisResult(
+            scam_score=score,
+            confidence=round(abs(p - 0.5) * 2, 4),
+            verdict=score_to_verdict(score),
+            signals=signals,
+            transcript_summary="Scored by the local transcript classifier while the text model is unavailable.",
+            recommendation=(
+                "Treat this call with caution; the full analysis is temporarily unavailable."
+                if score >= THRESHOLD_SAFE else "No strong scam indicators found by the local check."
+            ),
+        )
+
+    def stats(self) -> dict:
+        decided = self.decided_scam + self.decided_safe
+        return {
+            "enabled": self.enabled,
+            "buckets": self.buckets,
+            "evaluated": self.evaluated,
+            "decided_scam": self.decided_scam,
+            "decided_safe": self.decided_safe,
+            "skip_rate": round(decided / self.evaluated, 4) if self.evaluated else 0.0,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def train(
+    transcripts: List[str],
+    labels: List[int],
+    buckets: int = DEFAULT_BUCKETS,
+    epochs: int = 1000,
+    learning_rate: float = 20.0,
+    l2: float = 1e-4,
+) -> LocalClassifier:
+    """Fit logistic regression by full-batch gradient descent."""
+    X = np.zeros((len(transcripts), buckets), dtype=np.float32)
+    for row, transcript in enumerate(transcripts):
+        idx, value = featurize(transcript, buckets)
+        X[row, idx] = value
+    y = np.asarray(labels, dtype=np.float32)
+
+    w = np.zeros(buckets, dtype=np.float32)
+    b = 0.0
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-(X @ w + b)))
+        err = p - y
+        w -= learning_rate * (X.T @ err / len(y) + l2 * w)
+        b -= learning_rate * float(err.mean())
+    return LocalClassifier(w, b)
+
+
+def _load_default() -> Optional[LocalClassifier]:
+    if not LOCAL_CLASSIFIER_ENABLED:
+        return None
+    return LocalClassifier.load(
+        LOCAL_CLASSIFIER_PATH or DEFAULT_MODEL_PATH,
+        scam_threshold=LOCAL_SCAM_THRESHOLD,
+        safe_threshold=LOCAL_SAFE_THRESHOLD,
+    )
+
+
+local_classifier = _load_default()
@@ -0,0 +1,26 @@
+"""Rolling sample windows for percentile reporting."""
+
+import math
+from collections import deque
+from typing import Optional
+
+
+class RollingPercentile:
+    """Keep the last ``maxlen`` samples and report nearest-rank percentiles."""
+
+    def __init__(self, maxlen: int = 500):
+        self._values = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the ``pct`` (0-100) percentile, or None with no samples."""
+        if not self._values:
+            return None
+        ordered = sorted(self._values)
+        rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+        return ordered[min(rank, len(ordered) - 1)]
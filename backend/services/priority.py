@@ -0,0 +1,47 @@
+"""Request priority classes carried down to upstream admission via contextvars.
+
+Routers tag the work they start; analyze_audio / analyze_transcript and the
+admission controller read the tag without it being threaded through every
+call. Tasks created while a tag is set (stream chunk analyses, coalesced
+flights, segment fan-out) inherit it.
+
+Classes, highest first:
+- live: /ws/stream chunks, a person is on the call right now
+- interactive: /api/analyze/transcript, a person is waiting on the page
+- bulk: /api/analyze/audio uploads, scripts and evaluation runs
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+LIVE = "live"
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITY_CLASSES = (LIVE, INTERACTIVE, BULK)
+PRIORITY_RANK = {name: rank for rank, name in enumerate(PRIORITY_CLASSES)}
+
+ANONYMOUS = "anonymous"
+
+
+@dataclass(frozen=True)
+class Priority:
+    klass: str = BULK
+    tenant: str = ANONYMOUS  # API key; weighted fair queuing happens between tenants
+    weight: float = 1.0
+
+    @property
+    def rank(self) -> int:
+        return PRIORITY_RANK[self.klass]
+
+
+_current: ContextVar[Priority] = ContextVar("upstream_priority", default=Priority())
+
+
+def set_priority(klass: str, tenant: Optional[str] = None, weight: float = 1.0) -> None:
+    """Tag the current request (and tasks it starts) with a class and tenant."""
+    _current.set(Priority(klass, tenant or ANONYMOUS, weight if weight > 0 else 1.0))
+
+
+def current_priority() -> Priority:
+    return _current.get()
@@ -0,0 +1,357 @@
+"""Circuit breakers and bounded retries around upstream model calls.
+
+Every Voxtral and Mistral Large call goes through call_model, which:
+- fails fast with CircuitOpen while the model's breaker is open, instead of
+  queueing for admission and waiting out a timeout
+- caps each attempt at UPSTREAM_TIMEOUT_S or what is left of the request's
+  deadline (services/deadline.py), whichever is sooner
+- retries connection errors and 429/5xx responses with full-jitter
+  exponential backoff, but only when at least UPSTREAM_RETRY_MIN_BUDGET_S of
+  the deadline would remain after the backoff. Timed-out attempts are not
+  retried: a slow upstream would only get slower with more load.
+- for calls that opt in (live-stream chunks, transcripts) with HEDGE_ENABLED,
+  sends a duplicate attempt once the first has run past the model's rolling
+  HEDGE_PERCENTILE latency. The first answer wins and the other is
+  cancelled. At most HEDGE_MAX_RATE of recent calls are hedged, and a hedge
+  only goes out when an admission slot is free at once.
+
+A breaker counts failed and slow (over BREAKER_SLOW_CALL_S) calls over its
+last BREAKER_WINDOW calls. Once at least BREAKER_MIN_CALLS were seen and the
+bad share reaches BREAKER_FAILURE_RATIO it opens for BREAKER_OPEN_S, then
+lets one probe call through (half-open): success closes it, failure opens
+it again.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from config import (
+    AUDIO_MODEL,
+    TEXT_MODEL,
+    UPSTREAM_TIMEOUT_S,
+    UPSTREAM_RETRIES,
+    UPSTREAM_RETRY_BACKOFF_S,
+    UPSTREAM_RETRY_MIN_BUDGET_S,
+    BREAKER_ENABLED,
+    BREAKER_WINDOW,
+    BREAKER_MIN_CALLS,
+    BREAKER_FAILURE_RATIO,
+    BREAKER_SLOW_CALL_S,
+    BREAKER_OPEN_S,
+    HEDGE_ENABLED,
+    HEDGE_PERCENTILE,
+    HEDGE_MAX_RATE,
+    HEDGE_MIN_SAMPLES,
+)
+from services.admission import AdmissionRejected, admission
+from services.deadline import DeadlineExceeded, remaining_s
+from services.metrics import RollingPercentile
+from services.priority import current_priority
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpen(AdmissionRejected):
+    """The model's breaker is open; calls fail fast until it half-opens."""
+
+    error = "upstream_unavailable"
+
+    def __init__(self, model: str, retry_after_s: float):
+        Exception.__init__(self, f"{model} is failing or slow; retry in {retry_after_s:.0f}s")
+        self.reason = "circuit open"
+        self.model = model
+        self.retry_after_s = retry_after_s
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+        slow_call_s: float = 45.0,
+        open_s: float = 30.0,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_s = slow_call_s
+        self.open_s = open_s
+        self.enabled = enabled
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window)  # True for a failed or slow call
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+        self.fast_failures = 0
+
+    def _retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_s - time.monotonic())
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless a call may go upstream now."""
+        if not self.enabled or self.state == CLOSED:
+            return
+        if self.state == OPEN and self._retry_after() <= 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.fast_failures += 1
+        raise CircuitOpen(self.name, self._retry_after() or self.open_s)
+
+    def record(self, ok: bool, elapsed_s: float) -> None:
+        bad = not ok or elapsed_s >= self.slow_call_s
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if bad:
+                self._open()
+            else:
+                self.state = CLOSED
+                self._outcomes.clear()
+            return
+        self._outcomes.append(bad)
+        if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) >= self.failure_ratio * len(self._outcomes)):
+            self._open()
+
+    def abandon(self) -> None:
+        """A call ended without an outcome (cancelled); free the half-open probe."""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def _open(self) -> None:
+        logger.warning("Circuit for %s opened for %.0fs", self.name, self.open_s)
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+
+    def reset(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._probing = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": sum(self._outcomes),
+            "trips": self.trips,
+            "fast_failures": self.fast_failures,
+            "retry_after_s": round(self._retry_after(), 1) if self.state == OPEN else None,
+        }
+
+
+def _make_breaker(model: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        model,
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        failure_ratio=BREAKER_FAILURE_RATIO,
+        slow_call_s=BREAKER_SLOW_CALL_S,
+        open_s=BREAKER_OPEN_S,
+        enabled=BREAKER_ENABLED,
+    )
+
+
+breakers: Dict[str, CircuitBreaker] = {model: _make_breaker(model) for model in (AUDIO_MODEL, TEXT_MODEL)}
+
+
+class Hedger:
+    """When to send a duplicate request for one model, and how that went."""
+
+    def __init__(self, percentile: float = 90.0, max_rate: float = 0.1, min_samples: int = 20, window: int = 200):
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.latencies = RollingPercentile(maxlen=window)
+        self._recent = deque(maxlen=window)  # True for each recent call that was hedged
+        self.calls = 0
+        self.hedged = 0
+        self.wins = 0
+
+    def delay_s(self) -> Optional[float]:
+        """How long to give the primary attempt, or None while there are too few samples."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return self.latencies.percentile(self.percentile)
+
+    def allow(self) -> bool:
+        """Whether one more hedge keeps the recent hedge rate within max_rate."""
+        return sum(self._recent) + 1 <= self.max_rate * (len(self._recent) + 1)
+
+    def record(self, elapsed_s: float, hedged: bool, hedge_won: bool) -> None:
+        self.calls += 1
+        self._recent.append(hedged)
+        self.latencies.add(elapsed_s)
+        if hedged:
+            self.hedged += 1
+            self.wins += hedge_won
+
+    def stats(self) -> dict:
+        delay = self.delay_s()
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.wins,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+            "win_rate": round(self.wins / self.hedged, 4) if self.hedged else None,
+            "delay_ms": None if delay is None else round(delay * 1000, 2),
+        }
+
+
+hedgers: Dict[str, Hedger] = {
+    model: Hedger(HEDGE_PERCENTILE, HEDGE_MAX_RATE, HEDGE_MIN_SAMPLES) for model in (AUDIO_MODEL, TEXT_MODEL)
+}
+
+_counters = {"attempts": 0, "retries": 0, "deadline_exceeded": 0}
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    # Timeouts are excluded: only fast connection-level failures are retried
+    return isinstance(exc, httpx.TransportError) and not isinstance(exc, httpx.TimeoutException)
+
+
+def _upstream_failure(exc: BaseException) -> bool:
+    """Errors that say something about the model's health (not our request)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+async def _hedged(model: str, fn: Callable[[], Awaitable[T]]) -> T:
+    """Run fn, adding a duplicate after the hedge delay; the first success wins."""
+    hedger = hedgers[model]
+    start = time.monotonic()
+    primary = asyncio.ensure_future(fn())
+    tasks = [primary]
+    hedge = None
+    try:
+        delay = hedger.delay_s()
+        if delay is not None:
+            await asyncio.wait([primary], timeout=delay)
+            priority = current_priority()
+            if not primary.done() and hedger.allow() and admission.try_acquire(model, priority=priority):
+                hedge = asyncio.ensure_future(fn())
+                hedge.add_done_callback(lambda _task: admission.release(model, priority=priority))
+                tasks.append(hedge)
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    hedger.record(time.monotonic() - start, hedge is not None, task is hedge)
+                    return task.result()
+                # One attempt failed: the other may still answer
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # a failed loser's error is not worth a warning
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, UPSTREAM_RETRY_BACKOFF_S * (2 ** attempt))
+
+
+async def call_model(
+    model: str,
+    fn: Callable[[], Awaitable[T]],
+    timeout_s: Optional[float] = None,
+    can_retry: Optional[Callable[[], bool]] = None,
+    hedge: bool = False,
+) -> T:
+    """Run one upstream call for `model` under its breaker, admission slot and deadline.
+
+    fn starts a fresh attempt each time it is called. can_retry, when given,
+    is asked before every retry (a streamed call that already delivered
+    partial output must not be replayed). hedge allows a duplicate attempt
+    when the first is slow (see Hedger). May raise CircuitOpen,
+    AdmissionRejected or DeadlineExceeded.
+    """
+    breaker = breakers[model]
+    timeout_s = UPSTREAM_TIMEOUT_S if timeout_s is None else timeout_s
+    breaker.before_call()
+    async with AsyncExitStack() as stack:
+        try:
+            await stack.enter_async_context(admission.admit(model))
+        except BaseException:
+            # Rejected or cancelled while queued: hand back a half-open probe
+            breaker.abandon()
+            raise
+        attempt = 0
+        while True:
+            if attempt:
+                breaker.before_call()
+            budget = remaining_s()
+            if budget is not None and budget <= 0:
+                _counters["deadline_exceeded"] += 1
+                breaker.abandon()
+                raise DeadlineExceeded(f"{model} call not started: request deadline passed")
+            capped = budget is not None and budget < timeout_s
+            _counters["attempts"] += 1
+            start = time.monotonic()
+            try:
+                call = _hedged(model, fn) if hedge and HEDGE_ENABLED else fn()
+                result = await asyncio.wait_for(call, timeout=budget if capped else timeout_s)
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except Exception as exc:
+                elapsed = time.monotonic() - start
+                if capped and isinstance(exc, asyncio.TimeoutError):
+                    # Our budget ran out, not necessarily the model's patience
+                    breaker.record(True, elapsed)
+                    _counters["deadline_exceeded"] += 1
+                    raise DeadlineExceeded(f"{model} call cut off at the request deadline") from None
+                if _upstream_failure(exc):
+                    breaker.record(False, elapsed)
+                else:
+                    breaker.abandon()
+                delay = _backoff(attempt)
+                left = remaining_s()
+                if (attempt >= UPSTREAM_RETRIES or not _retryable(exc)
+                        or (can_retry is not None and not can_retry())
+                        or (left is not None and left - delay < UPSTREAM_RETRY_MIN_BUDGET_S)):
+                    raise
+                logger.info("Retrying %s in %.2fs after: %s", model, delay, exc)
+                _counters["retries"] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            breaker.record(True, time.monotonic() - start)
+            return result
+
+
+def stats() -> dict:
+    return {
+        **_counters,
+        "breakers": {model: breaker.stats() for model, breaker in breakers.items()},
+        "hedging": {
+            "enabled": HEDGE_ENABLED,
+            **{model: hedger.stats() for model, hedger in hedgers.items()},
+        },
+    }
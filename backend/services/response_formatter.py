@@ -1,7 +1,7 @@
 import json
 import re
-from models.schemas import AnalysisResult, ScamReport, Signal, Verdict, Severity
-from typing import Optional
+from models.schemas import AnalysisResult, ScamReport, ReportTiming, Signal, Verdict, Severity
+from typing import List, Optional
 from config import THRESHOLD_SAFE, THRESHOLD_SUSPICIOUS, THRESHOLD_LIKELY_SCAM
 import time
 import uuid
@@ -97,13 +97,70 @@ def score_to_verdict(score: float) -> str:
     else:
         return "SCAM"
 
+def update_cumulative(cumulative: float, score: float) -> float:
+    """Exponential weighting across chunks or segments: recent/severe ones weigh more."""
+    return 0.7 * score + 0.3 * cumulative
+
+
+def peak_weighted_score(max_score: float, cumulative_score: float) -> float:
+    """The frontend live score: combined = 0.6 * max_score + 0.4 * cumulative_score."""
+    return round(0.6 * max_score + 0.4 * cumulative_score, 4)
+
+
+_SEVERITY_RANK = {Severity.low: 0, Severity.medium: 1, Severity.high: 2}
+
+
+def reduce_results(results: List[AnalysisResult]) -> AnalysisResult:
+    """Merge time-ordered partial results (segments of one call) into one.
+
+    The score uses the same peak-weighted formula as a live stream, so a
+    long call scores like the same call streamed. Signals are merged per
+    category keeping the most severe; the recommendation comes from the
+    peak segment.
+    """
+    if not results:
+        raise ValueError("At least one analysis result is required")
+    cumulative = max_score = 0.0
+    for result in results:
+        max_score = max(max_score, result.scam_score)
+        cumulative = update_cumulative(cumulative, result.scam_score)
+    combined = peak_weighted_score(max_score, cumulative)
+
+    signals = {}
+    for result in results:
+        for signal in result.signals:
+            kept = signals.get(signal.category)
+            if kept is None or _SEVERITY_RANK[signal.severity] > _SEVERITY_RANK[kept.severity]:
+                signals[signal.category] = signal
+
+    peak = max(results, key=lambda r: r.scam_score)
+    summaries = [r.transcript_summary for r in results if r.transcript_summary]
+    return AnalysisResult(
+        scam_score=combined,
+        confidence=round(sum(r.confidence for r in results) / len(results), 4),
+        verdict=score_to_verdict(combined),
+        signals=list(signals.values()),
+        transcript_summary=" ".join(summaries) or None,
+        recommendation=peak.recommendation,
+    )
+
+
 def build_scam_report(
     mode: str,
     audio_result: Optional[AnalysisResult] = None,
     text_result: Optional[AnalysisResult] = None,
     start_time: float = 0.0,
+    timing: Optional[ReportTiming] = None,
+    decision_source: str = "model",
+    audio_duration_s: Optional[float] = None,
+    audio_removed_s: Optional[float] = None,
+    scored_channel: Optional[str] = None,
+    review_reason: Optional[str] = None,
 ) -> ScamReport:
-    """Build a unified ScamReport from one or both analysis results."""
+    """Build a unified ScamReport from one or both analysis results.
+
+    A review_reason from the caller always flags the report for review.
+    """
     # Calculate combined score
     if audio_result and text_result:
         combined = audio_result.scam_score * 0.6 + text_result.scam_score * 0.4
@@ -118,8 +175,8 @@ def build_scam_report(
     disagree = (audio_result is not None and text_result is not None and
                 abs(audio_result.scam_score - text_result.scam_score) > 0.3)
     low_conf = (audio_result is not None and audio_result.confidence < 0.55)
-    review_required = in_band or disagree or low_conf
-    review_reason = (
+    review_required = bool(review_reason) or in_band or disagree or low_conf
+    review_reason = review_reason or (
         "Score in ambiguous range — human judgement recommended" if in_band else
         "Audio and text analyses disagree significantly" if disagree else
         "Low model confidence" if low_conf else None
@@ -136,4 +193,9 @@ def build_scam_report(
         processing_time_ms=round(elapsed_ms, 2),
         review_required=review_required,
         review_reason=review_reason,
+        timing=timing,
+        decision_source=decision_source,
+        audio_duration_s=round(audio_duration_s, 3) if audio_duration_s is not None else None,
+        audio_removed_s=round(audio_removed_s, 3) if audio_removed_s is not None else None,
+        scored_channel=scored_channel,
     )
@@ -0,0 +1,294 @@
+"""Content-addressed cache of analysis results.
+
+Keys hash the normalized transcript or the raw audio bytes together with the
+model names and a digest of the prompts, so a prompt or model change never
+serves stale verdicts. Values are the serialized AnalysisResult objects, not
+whole reports: every hit is rebuilt into a fresh ScamReport with its own id
+and analyzed_at.
+
+Two tiers:
+- an in-process LRU bounded by entry count, total bytes and TTL
+- an optional directory tier (RESULT_CACHE_SHARED_DIR) that every worker on
+  the host reads and writes, so one worker's miss becomes everyone's hit; its
+  file IO runs in a worker thread, off the event loop
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import (
+    AUDIO_MODEL,
+    TEXT_MODEL,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_TTL_S,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_SHARED_DIR,
+    RESULT_CACHE_SHARED_MAX_BYTES,
+)
+from models.schemas import AnalysisResult
+from prompts.templates import SCAM_AUDIO_PROMPT, SCAM_TEXT_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8") if isinstance(part, str) else part)
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+# Short prompt fingerprints; editing a prompt invalidates every cached verdict
+TEXT_PROMPT_VERSION = _digest(SCAM_TEXT_PROMPT)[:12]
+AUDIO_PROMPT_VERSION = _digest(SCAM_AUDIO_PROMPT)[:12]
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Fold case, Unicode forms and whitespace so trivially different copies share a key."""
+    return " ".join(unicodedata.normalize("NFKC", transcript).casefold().split())
+
+
+def transcript_cache_key(transcript: str) -> str:
+    return "text:" + _digest(TEXT_MODEL, TEXT_PROMPT_VERSION, normalize_transcript(transcript))
+
+
+def audio_cache_key(audio_bytes: bytes) -> str:
+    # The cached audio entry may include the Mistral Large second opinion
+    return "audio:" + _digest(
+        AUDIO_MODEL, AUDIO_PROMPT_VERSION, TEXT_MODEL, TEXT_PROMPT_VERSION, audio_bytes,
+    )
+
+
+class DirectoryTier:
+    """Shared cache tier backed by one JSON file per key in a directory.
+
+    Methods block on file IO; ResultCache calls them via asyncio.to_thread.
+    A file's mtime is its write time, so expiry and age come from one
+    directory scan. Each worker prunes the directory back under max_bytes on
+    its first write and then after every max_bytes / PRUNE_FRACTION bytes it
+    writes, expired files first, then the oldest.
+    """
+
+    PRUNE_FRACTION = 20
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._written: Optional[int] = None  # bytes since the last prune; None before the first
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        name = key.replace(":", "_")
+        return os.path.join(self.path, name[:8], name + ".json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._file(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"expires_at": time.time() + ttl, "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Shared cache write failed for %s: %s", path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            due = self._written is None or self._written + len(value) >= self.max_bytes // self.PRUNE_FRACTION
+            self._written = 0 if due else self._written + len(value)
+        if due:
+            self.prune(ttl)
+
+    def prune(self, ttl: float) -> int:
+        """Delete expired entries, then the oldest, until the tier fits max_bytes."""
+        files = []
+        try:
+            with os.scandir(self.path) as shards:
+                for shard in shards:
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as entries:
+                        for entry in entries:
+                            if entry.name.endswith(".json"):
+                                st = entry.stat()
+                                files.append((st.st_mtime, st.st_size, entry.path))
+        except OSError as e:
+            logger.warning("Shared cache scan failed for %s: %s", self.path, e)
+            return 0
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - ttl
+        removed = 0
+        for mtime, size, path in files:
+            if total <= self.max_bytes and mtime >= cutoff:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker pruned it first
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+
+class ResultCache:
+    """Two-tier cache of (audio_result, text_result) pairs."""
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        shared: Optional[DirectoryTier] = None,
+        enabled: bool = True,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Tuple[Optional[AnalysisResult], Optional[AnalysisResult]]]:
+        """Return cached (audio_result, text_result) or None on a miss."""
+        if not self.enabled:
+            return None
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return self._decode(value)
+        if self.shared is not None:
+            value = await asyncio.to_thread(self.shared.get, key)
+            if value is not None:
+                self.shared_hits += 1
+                self._set_local(key, value)
+                return self._decode(value)
+        self.misses += 1
+        return None
+
+    async def put(
+        self,
+        key: str,
+        audio_result: Optional[AnalysisResult] = None,
+        text_result: Optional[AnalysisResult] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        value = json.dumps({
+            "audio_analysis": audio_result.model_dump(mode="json") if audio_result else None,
+            "text_analysis": text_result.model_dump(mode="json") if text_result else None,
+        })
+        self._set_local(key, value)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.set, key, value, self.ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "shared_tier": self.shared is not None,
+            "shared_evictions": self.shared.evictions if self.shared is not None else 0,
+        }
+
+    @staticmethod
+    def _decode(value: str):
+        data = json.loads(value)
+        audio = data.get("audio_analysis")
+        text = data.get("text_analysis")
+        return (
+            AnalysisResult(**audio) if audio else None,
+            AnalysisResult(**text) if text else None,
+        )
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: str) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+
+result_cache = ResultCache(
+    ttl=RESULT_CACHE_TTL_S,
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    shared=DirectoryTier(RESULT_CACHE_SHARED_DIR, RESULT_CACHE_SHARED_MAX_BYTES) if RESULT_CACHE_SHARED_DIR else None,
+    enabled=RESULT_CACHE_ENABLED,
+)
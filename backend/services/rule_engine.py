@@ -0,0 +1,143 @@
+"""Tier-0 phrase rules that settle obvious transcripts without an upstream call.
+
+Every phrase in the rule set is compiled into one regular expression
+alternation, so a transcript is scanned once regardless of how many rules
+exist. Each matched rule is one piece of evidence; rule weights combine as
+a noisy-OR (1 - prod(1 - w)) into a scam score.
+
+A transcript is decided locally only when the scam score reaches
+RULE_SCAM_THRESHOLD. The rules never clear a call as SAFE: pleasantries
+are easy to add to a scam script, so everything else goes to the model.
+Raising the threshold lowers the skip rate; the rule set itself lives in
+data/scam_rules.json or RULES_PATH.
+"""
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from config import RULE_ENGINE_ENABLED, RULES_PATH, RULE_SCAM_THRESHOLD
+from models.schemas import AnalysisResult, Signal
+from services.response_formatter import score_to_verdict
+from services.result_cache import normalize_transcript
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "scam_rules.json",
+)
+
+
+def _normalize(text: str) -> str:
+    return normalize_transcript(text).replace("’", "'")
+
+
+@dataclass
+class Rule:
+    weight: float
+    detail: str
+    category: str = "RULE_MATCH"
+    severity: str = "medium"
+
+
+@dataclass
+class RuleEvaluation:
+    scam_score: float
+    scam_rules: List[Rule] = field(default_factory=list)
+    phrases: List[str] = field(default_factory=list)
+
+
+def _noisy_or(weights) -> float:
+    remaining = 1.0
+    for w in weights:
+        remaining *= 1.0 - w
+    return 1.0 - remaining
+
+
+class RuleEngine:
+    """Single-pass multi-phrase matcher over a scam rule set."""
+
+    def __init__(self, rules: dict, scam_threshold: float = 0.95, enabled: bool = True):
+        self.scam_threshold = scam_threshold
+        self.enabled = enabled
+        self._phrase_rule: Dict[str, Rule] = {}
+        for spec in rules.get("scam", []):
+            rule = Rule(
+                weight=float(spec["weight"]),
+                detail=spec["detail"],
+                category=spec.get("category", "RULE_MATCH"),
+                severity=spec.get("severity", "medium"),
+            )
+            for phrase in spec["phrases"]:
+                self._phrase_rule[_normalize(phrase)] = rule
+
+        # Longest phrase first so "press 1 now" wins over "press 1"
+        alternatives = sorted(self._phrase_rule, key=len, reverse=True)
+        body = "|".join(re.escape(p) for p in alternatives) or r"(?!x)x"
+        self._pattern = re.compile(rf"(?<!\w)(?:{body})(?!\w)")
+        self.evaluated = 0
+        self.decided_scam = 0
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "RuleEngine":
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._phrase_rule)
+
+    def evaluate(self, transcript: str) -> RuleEvaluation:
+        """Score a transcript against every rule in one scan."""
+        matched: Dict[int, Rule] = {}
+        phrases = []
+        for m in self._pattern.finditer(_normalize(transcript)):
+            phrase = m.group(0)
+            rule = self._phrase_rule[phrase]
+            if id(rule) not in matched:
+                matched[id(rule)] = rule
+                phrases.append(phrase)
+        scam_rules = list(matched.values())
+        return RuleEvaluation(
+            scam_score=_noisy_or(r.weight for r in scam_rules),
+            scam_rules=scam_rules,
+            phrases=phrases,
+        )
+
+    def decide(self, transcript: str) -> Optional[AnalysisResult]:
+        """Return a local SCAM verdict when the rules are conclusive, else None."""
+        if not self.enabled:
+            return None
+        self.evaluated += 1
+        ev = self.evaluate(transcript)
+
+        if ev.scam_score >= self.scam_threshold:
+            self.decided_scam += 1
+            score = round(ev.scam_score, 4)
+            return AnalysisResult(
+                scam_score=score,
+                confidence=score,
+                verdict=score_to_verdict(score),
+                signals=[Signal(category=r.category, detail=r.detail, severity=r.severity) for r in ev.scam_rules],
+                transcript_summary=f"Matched scam phrases: {', '.join(ev.phrases)}.",
+                recommendation="Hang up. This call matches several well-known scam scripts.",
+            )
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "phrases": len(self),
+            "evaluated": self.evaluated,
+            "decided_scam": self.decided_scam,
+            "skip_rate": round(self.decided_scam / self.evaluated, 4) if self.evaluated else 0.0,
+        }
+
+
+rule_engine = RuleEngine.from_file(
+    RULES_PATH or DEFAULT_RULES_PATH,
+    scam_threshold=RULE_SCAM_THRESHOLD,
+    enabled=RULE_ENGINE_ENABLED,
+)
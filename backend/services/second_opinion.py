@@ -0,0 +1,103 @@
+"""Speculative Mistral Large second opinion for audio uploads.
+
+Voxtral emits ``transcript_summary`` before ``recommendation`` and the vocal
+feature scores, so once the summary string has closed in the streamed
+response the text opinion can start while Voxtral is still finishing. If the
+final audio score lands at or below the gate the speculative call is
+cancelled.
+"""
+
+import asyncio
+import json
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+from services.metrics import RollingPercentile
+
+_SUMMARY_RE = re.compile(r'"transcript_summary"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_SCORE_RE = re.compile(r'"scam_score"\s*:\s*(-?[0-9.]+)\s*[,}]')
+
+# Latency saved per second opinion, in ms, across recent uploads
+_savings = RollingPercentile()
+
+
+def saving_percentiles() -> tuple:
+    """Return the rolling (p50, p95) speculative saving in ms."""
+    return _savings.percentile(50), _savings.percentile(95)
+
+
+def _decode_json_string(raw: str) -> str:
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError:
+        return raw
+
+
+class SpeculativeSecondOpinion:
+    """Start the text second opinion from a partially streamed Voxtral response."""
+
+    def __init__(self, analyze_text: Callable[[str], Awaitable[str]], gate: float):
+        self._analyze_text = analyze_text
+        self._gate = gate
+        self._task: Optional[asyncio.Task] = None
+        self._summary: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def feed(self, partial: str) -> None:
+        """Inspect the accumulated Voxtral text; start the text call once ready."""
+        if self._task is not None:
+            return
+        summary_match = _SUMMARY_RE.search(partial)
+        if not summary_match:
+            return
+        score_match = _SCORE_RE.search(partial)
+        if score_match and float(score_match.group(1)) <= self._gate:
+            return
+        summary = _decode_json_string(summary_match.group(1))
+        if summary:
+            self._start(summary)
+
+    def _start(self, summary: str) -> None:
+        self._summary = summary
+        self.started_at = time.time()
+        self._task = asyncio.create_task(self._analyze_text(summary))
+        self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self.finished_at = time.time()
+        # Mark exceptions as retrieved when nobody awaits a cancelled speculation
+        if not task.cancelled():
+            task.exception()
+
+    async def result(self, summary: str) -> str:
+        """Return the text opinion for ``summary``, reusing the speculative call if it matches."""
+        if self._task is not None and self._summary != summary:
+            self.cancel()
+        if self._task is None:
+            self._start(summary)
+        try:
+            return await self._task
+        finally:
+            if self.finished_at is None:
+                self.finished_at = time.time()
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._summary = None
+
+    def record_saving(self, audio_done_at: float) -> float:
+        """Record and return the ms of text-call latency overlapped with Voxtral."""
+        saving_ms = 0.0
+        if self.started_at is not None and self.finished_at is not None:
+            overlap = min(audio_done_at, self.finished_at) - self.started_at
+            saving_ms = max(0.0, overlap * 1000)
+        _savings.add(saving_ms)
+        return round(saving_ms, 2)
@@ -0,0 +1,101 @@
+"""Split long recordings into overlapping windows cut at pauses.
+
+A long call sent to Voxtral as one request is slow, can run into the
+upstream timeout and holds one connection for minutes. split_wav cuts it
+into windows of about window_s seconds that are scored concurrently and
+reduced into one verdict (see response_formatter.reduce_results).
+
+Each window ends at the quietest FRAME_MS frame within the last search_s
+seconds before its nominal end, so cuts fall in pauses rather than
+mid-word. The next window starts overlap_s before that cut, so a sentence
+split by a short pause is still heard whole by one of the two windows.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from services.vad import FRAME_MS
+from services.wav import WavInfo, build_wav, parse_wav, to_samples
+
+
+@dataclass
+class Segment:
+    index: int
+    start_s: float
+    end_s: float
+    audio_bytes: bytes
+
+
+def _frame_rms(info: WavInfo, audio_bytes: bytes, frame_len: int) -> Optional[np.ndarray]:
+    samples = to_samples(info, audio_bytes)
+    if samples is None or len(samples) == 0:
+        return None
+    n = len(samples) // info.channels
+    x = samples[: n * info.channels].astype(np.float64, copy=False).reshape(n, info.channels)
+    power = (x * x).mean(axis=1)
+    starts = np.arange(0, n, frame_len)
+    lengths = np.diff(np.append(starts, n))
+    return np.sqrt(np.add.reduceat(power, starts) / lengths)
+
+
+def plan_cuts(
+    rms: Optional[np.ndarray], n_frames: int, window: int, overlap: int, search: int,
+) -> List[tuple]:
+    """(start, end) frame ranges covering n_frames; ends snapped to the quietest frame."""
+    # Windows shrink by at most a quarter and always advance past the previous one
+    overlap = min(overlap, window // 2)
+    search = min(search, window // 4)
+    ranges = []
+    start = 0
+    while n_frames - start > window:
+        target = start + window
+        end = target
+        if rms is not None and search > 0:
+            span = rms[target - search:target]
+            # The latest of equally quiet frames keeps windows as long as possible
+            end = target - search + (len(span) - 1 - int(np.argmin(span[::-1])))
+        ranges.append((start, end))
+        start = end - overlap
+    ranges.append((start, n_frames))
+    return ranges
+
+
+def split_wav(
+    audio_bytes: bytes,
+    window_s: float = 60.0,
+    overlap_s: float = 5.0,
+    search_s: float = 5.0,
+    info: Optional[WavInfo] = None,
+) -> List[Segment]:
+    """Split a WAV into overlapping segments; a single segment if it fits one window.
+
+    Segments keep the original sample format. Raises WavFormatError for
+    unreadable input.
+    """
+    if info is None:
+        info = parse_wav(audio_bytes)
+    frame_len = max(1, info.sample_rate * FRAME_MS // 1000)
+    frame_s = frame_len / info.sample_rate
+    n_frames = -(-info.frames // frame_len)
+    window = max(2, int(window_s / frame_s))
+    if n_frames <= window:
+        return [Segment(0, 0.0, info.duration_s, audio_bytes)]
+
+    rms = _frame_rms(info, audio_bytes, frame_len)
+    ranges = plan_cuts(rms, n_frames, window, int(overlap_s / frame_s), int(search_s / frame_s))
+    pcm = info.pcm(audio_bytes)
+    step = frame_len * info.block_align
+    segments = []
+    for index, (start, end) in enumerate(ranges):
+        segments.append(Segment(
+            index=index,
+            start_s=round(start * frame_s, 3),
+            end_s=round(min(end * frame_s, info.duration_s), 3),
+            audio_bytes=build_wav(
+                pcm[start * step:end * step], info.channels, info.sample_rate,
+                info.bits_per_sample, info.format_tag,
+            ),
+        ))
+    return segments
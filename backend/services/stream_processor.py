@@ -1,34 +1,91 @@
-import base64
-import json
-import asyncio
-import functools
-import struct
 import time
-import urllib.request
-from config import MISTRAL_API_KEY, AUDIO_MODEL
-from prompts.templates import SCAM_AUDIO_PROMPT
-from services.response_formatter import extract_json
+from dataclasses import dataclass
+from typing import Optional
+
+from config import (
+    FINGERPRINT_ENABLED,
+    STREAM_EARLY_VERDICT_CHUNKS,
+    STREAM_EARLY_VERDICT_THRESHOLD,
+    STREAM_EARLY_VERDICT_MODE,
+    STREAM_EARLY_SAMPLE_EVERY,
+    ADAPTIVE_SAMPLING_ENABLED,
+    ADAPTIVE_SAMPLE_EVERY,
+    ADAPTIVE_LOW_SCORE,
+    ADAPTIVE_WARMUP_CHUNKS,
+    AUDIO_NORMALIZE_ENABLED,
+    AUDIO_TARGET_RATE,
+    DEADLINE_STREAM_CHUNK_S,
+    VAD_ENABLED,
+    VAD_ENERGY_THRESHOLD,
+    VAD_MIN_SILENCE_MS,
+    VAD_PADDING_MS,
+)
+from services.adaptive_sampling import AdaptiveSampler
+from services.audio_features import extract_features
+from services.admission import admission
+from services.audio_analyzer import analyze_audio
+from services.backpressure import merge_wav_chunks
+from services.deadline import deadline
+from services.fingerprint import fingerprint_index, compute_fingerprint
+from services.result_cache import audio_cache_key
+from services.singleflight import upstream_flights
+from services.resilience import CircuitOpen
+from services.response_formatter import extract_json, peak_weighted_score, score_to_verdict, update_cumulative
+from services.audio_prep import prepare_audio
+from services.vad import speech_frames
+from services.wav import WavFormatError, parse_wav, pcm_samples
+from services.audio_usage import audio_usage
 
 
 def is_silent(audio_bytes: bytes, threshold=500) -> bool:
-    """Check if WAV audio chunk is silence by looking at PCM amplitude."""
-    # Skip 44-byte WAV header
-    pcm_data = audio_bytes[44:]
-    if len(pcm_data) < 2:
-        return True
+    """Check if WAV audio chunk is silence by looking at PCM amplitude.
+
+    This is the VAD with a single frame spanning the chunk and the energy
+    test only. threshold is an RMS in 16-bit full scale; 8-bit and float
+    chunks are scaled to match.
+    """
     try:
-        num_samples = len(pcm_data) // 2
-        if num_samples == 0:
-            return True
-        samples = struct.unpack(f"<{num_samples}h", pcm_data[:num_samples * 2])
-        rms = (sum(s * s for s in samples) / num_samples) ** 0.5
-        return rms < threshold
-    except (struct.error, ValueError):
+        samples = pcm_samples(audio_bytes)
+    except WavFormatError:
         # Corrupted header or invalid data - treat as silent
         return True
+    if samples is None:
+        # Valid WAV in a format we cannot measure; let the model decide
+        return False
+    return not speech_frames(samples, len(samples), threshold, zcr_threshold=None).any()
+
+
+def _duration_s(audio_chunk: bytes) -> float:
+    try:
+        return parse_wav(audio_chunk).duration_s
+    except WavFormatError:
+        return 0.0
+
+
+async def _analyze_admitted(audio_chunk: bytes) -> str:
+    """Voxtral call with the chunk counted against the in-flight audio budget."""
+    async with admission.admit(nbytes=len(audio_chunk)):
+        return await analyze_audio(audio_chunk)
+
+
+@dataclass
+class ChunkAnalysis:
+    data: Optional[dict]  # parsed Voxtral/fingerprint result; None for silence
+    decision_source: str
+    timestamp_ms: int
+    processing_ms: int
+    removed_ms: int = 0  # non-speech cut by the VAD before upstream
+
 
 class StreamProcessor:
-    def __init__(self):
+    def __init__(
+        self,
+        early_verdict_chunks: int = STREAM_EARLY_VERDICT_CHUNKS,
+        early_verdict_threshold: float = STREAM_EARLY_VERDICT_THRESHOLD,
+        early_verdict_mode: str = STREAM_EARLY_VERDICT_MODE,
+        early_sample_every: int = STREAM_EARLY_SAMPLE_EVERY,
+        sampler: Optional[AdaptiveSampler] = None,
+    ):
         self.chunk_index = 0
         self.cumulative_score = 0.0
         self.max_score = 0.0
@@ -38,89 +95,165 @@ class StreamProcessor:
         self.start_time = time.time()
         self.seen_signal_categories: set = set()
         self.prev_cumulative = 0.0
+        self.audio_removed_ms = 0
+        # Early verdict: N consecutive scored chunks at or above the threshold
+        # settle the call; later chunks are skipped ("stop") or sampled
+        self.early_verdict_chunks = early_verdict_chunks
+        self.early_verdict_threshold = early_verdict_threshold
+        self.early_verdict_mode = early_verdict_mode
+        self.early_sample_every = max(1, early_sample_every)
+        self.consecutive_high = 0
+        self.early_verdict_reason: Optional[str] = None
+        self._early_final_sent = False
+        self._chunks_after_verdict = 0
+        self.upstream_calls_saved = 0
+        self.sampler = sampler or AdaptiveSampler(
+            every=ADAPTIVE_SAMPLE_EVERY,
+            low_score=ADAPTIVE_LOW_SCORE,
+            warmup=ADAPTIVE_WARMUP_CHUNKS,
+            enabled=ADAPTIVE_SAMPLING_ENABLED,
+        )
+        self._held_chunks: list = []
 
-    async def process_chunk(self, audio_chunk: bytes) -> dict:
-        """Process a single audio chunk and return partial result."""
-        # Always increment chunk_index to avoid duplicates
+    def next_index(self) -> int:
+        """Reserve the chunk_index for the next received chunk."""
         self.chunk_index += 1
-        chunk_start_time = time.time()
+        return self.chunk_index
 
-        timestamp_ms = int((time.time() - self.start_time) * 1000)
+    async def analyze_chunk(self, audio_chunk: bytes, allow_upstream: bool = True) -> ChunkAnalysis:
+        """Score one chunk without touching session state; safe to run concurrently.
+
+        With allow_upstream=False only the local silence and fingerprint
+        checks run; anything they cannot settle comes back as "shed".
+        """
+        chunk_start_time = time.time()
+        timestamp_ms = int((chunk_start_time - self.start_time) * 1000)
 
         if is_silent(audio_chunk):
+            return ChunkAnalysis(None, "silence", timestamp_ms, int((time.time() - chunk_start_time) * 1000))
+
+        if self.early_verdict_reason is not None and not self._sample_after_verdict():
+            self.upstream_calls_saved += 1
+            return ChunkAnalysis(None, "early_verdict", timestamp_ms, int((time.time() - chunk_start_time) * 1000))
+
+        # Chunks are small, so normalizing and trimming runs inline
+        prepared = prepare_audio(
+            audio_chunk, AUDIO_NORMALIZE_ENABLED, AUDIO_TARGET_RATE,
+            VAD_ENABLED, VAD_ENERGY_THRESHOLD, VAD_MIN_SILENCE_MS, VAD_PADDING_MS,
+        )
+        audio_chunk = prepared.audio_bytes
+        removed_ms = int(round(prepared.removed_s * 1000))
+
+        if allow_upstream:
+            if self.sampler.decide(extract_features(audio_chunk), self.cumulative_score) is None:
+                self._held_chunks.append(audio_chunk)
+                return ChunkAnalysis(None, "sampling", timestamp_ms, int((time.time() - chunk_start_time) * 1000))
+            if self._held_chunks:
+                # Chunks held back by the sampler ride along in this window
+                merged = merge_wav_chunks(self._held_chunks + [audio_chunk])
+                self._held_chunks = []
+                audio_chunk = merged or audio_chunk
+
+        return await self._score(audio_chunk, allow_upstream, timestamp_ms, chunk_start_time, removed_ms)
+
+    async def flush_held(self) -> Optional[ChunkAnalysis]:
+        """Score the chunks the sampler still holds as one last window.
+
+        Call at end_stream once every queued chunk is applied, so the tail of
+        a sampled call is heard before the final verdict. Returns None when
+        nothing is held or an early verdict has already settled the call.
+        """
+        held, self._held_chunks = self._held_chunks, []
+        if not held or self.early_verdict_reason is not None:
+            return None
+        chunk_start_time = time.time()
+        timestamp_ms = int((chunk_start_time - self.start_time) * 1000)
+        audio_chunk = (merge_wav_chunks(held) if len(held) > 1 else None) or held[-1]
+        self.sampler.flushed(len(held))
+        return await self._score(audio_chunk, True, timestamp_ms, chunk_start_time)
+
+    async def _score(
+        self, audio_chunk: bytes, allow_upstream: bool, timestamp_ms: int, chunk_start_time: float,
+        removed_ms: int = 0,
+    ) -> ChunkAnalysis:
+        # A chunk of a known recording reuses its stored verdict without Voxtral
+        match = fingerprint_index.lookup(compute_fingerprint(audio_chunk), whole_recording=False) if FINGERPRINT_ENABLED else None
+        if match is not None and match.audio_result is not None:
+            data = match.audio_result.model_dump(mode="json")
+            decision_source = usage_source = "fingerprint"
+        elif not allow_upstream:
+            return ChunkAnalysis(None, "shed", timestamp_ms, int((time.time() - chunk_start_time) * 1000))
+        else:
+            # Concurrent sessions replaying the same chunk share one Voxtral call;
+            # a live chunk's result is stale after DEADLINE_STREAM_CHUNK_S
+            led = False
+
+            def analyze():
+                nonlocal led
+                led = True
+                return _analyze_admitted(audio_chunk)
+
+            try:
+                with deadline(DEADLINE_STREAM_CHUNK_S):
+                    raw = await upstream_flights.do("stream:" + audio_cache_key(audio_chunk), analyze)
+            except CircuitOpen:
+                return ChunkAnalysis(
+                    None, "upstream_unavailable", timestamp_ms, int((time.time() - chunk_start_time) * 1000),
+                )
+            data = extract_json(raw)
+            decision_source = "model"
+            # Only the session whose call went upstream counts "model" seconds
+            usage_source = "model" if led else "coalesced"
+        audio_usage.record(_duration_s(audio_chunk), usage_source)
+        return ChunkAnalysis(
+            data, decision_source, timestamp_ms, int((time.time() - chunk_start_time) * 1000), removed_ms,
+        )
+
+    def apply(self, chunk_index: int, analysis: ChunkAnalysis) -> dict:
+        """Fold an analysis into the session scores; call in chunk_index order."""
+        if analysis.data is None:
+            analyzed = False
+            if analysis.decision_source == "shed":
+                signal = {"category": "SHED", "detail": "Not analyzed: stream is behind real time", "severity": "low"}
+            elif analysis.decision_source == "sampling":
+                signal = {"category": "SAMPLING",
+                          "detail": (f"Held back: low-risk stream, analyzing every {self.sampler.every} chunks; "
+                                     "merged into the next analyzed window"),
+                          "severity": "low"}
+            elif analysis.decision_source == "upstream_unavailable":
+                signal = {"category": "UPSTREAM_UNAVAILABLE",
+                          "detail": "Not analyzed: the audio model is failing or slow; retrying shortly",
+                          "severity": "low"}
+            elif analysis.decision_source == "early_verdict":
+                signal = {"category": "EARLY_VERDICT", "detail": f"Not analyzed: {self.early_verdict_reason}",
+                          "severity": "low"}
+            else:
+                analyzed = True
+                signal = {"category": "SILENCE", "detail": "No speech detected in this chunk", "severity": "low"}
+            # A chunk the model never heard has no score of its own; it carries
+            # the session's running verdict instead of a fabricated SAFE.
             return {
                 "type": "partial_result",
-                "chunk_index": self.chunk_index,
-                "timestamp_ms": timestamp_ms,
+                "chunk_index": chunk_index,
+                "timestamp_ms": analysis.timestamp_ms,
                 "score_delta": 0.0,
                 "new_signals": [],
-                "chunk_processing_ms": int((time.time() - chunk_start_time) * 1000),
+                "chunk_processing_ms": analysis.processing_ms,
                 "vocal_stress": 0.0,
                 "background_noise": 0.0,
                 "synthetic_voice_probability": 0.0,
-                "scam_score": 0.0,
+                "scam_score": 0.0 if analyzed else None,
                 "cumulative_score": round(self.cumulative_score, 4),
-                "verdict": "SAFE",
-                "signals": [{"category": "SILENCE", "detail": "No speech detected in this chunk",
- "severity": "low"}],
+                "verdict": "SAFE" if analyzed else score_to_verdict(self.cumulative_score),
+                "signals": [signal],
+                "decision_source": analysis.decision_source,
+                "analyzed": analyzed,
             }
-        
-        audio_b64 = base64.b64encode(audio_chunk).decode("utf-8")
-
-        payload = json.dumps({
-            "model": AUDIO_MODEL,
-            "messages": [{
-                "role": "user",
-                "content": [
-                    {
-                        "type": "input_audio",
-                        "input_audio": {
-                            "data": audio_b64,
-                            "format": "wav",
-                        },
-                    },
-                    {
-                        "type": "text",
-                        "text": SCAM_AUDIO_PROMPT,
-                    },
-                ],
-            }],
-            "temperature": 0.3,
-            "top_p": 0.9,
-            "response_format": {"type": "json_object"},
-        }).encode()
-
-        req = urllib.request.Request(
-            "https://api.mistral.ai/v1/chat/completions",
-            data=payload,
-            headers={
-                "Authorization": f"Bearer {MISTRAL_API_KEY}",
-                "Content-Type": "application/json",
-            },
-        )
-
-        loop = asyncio.get_event_loop()
-        resp = await loop.run_in_executor(
-            None,
-            functools.partial(urllib.request.urlopen, req, timeout=120),
-        )
-
-        try:
-            body = json.loads(resp.read().decode())
-            choices = body.get("choices")
-            if not choices or not isinstance(choices, list) or len(choices) == 0:
-                raise ValueError(f"Unexpected API response structure: no choices")
-            raw = choices[0].get("message", {}).get("content", "")
-            if not raw:
-                raise ValueError("Empty content in API response")
-            data = extract_json(raw)
-        finally:
-            resp.close()
 
+        data = analysis.data
         vocal_stress = max(0.0, min(1.0, float(data.get("vocal_stress", 0.0))))
         background_noise = max(0.0, min(1.0, float(data.get("background_noise", 0.0))))
         synthetic_voice_probability = max(0.0, min(1.0, float(data.get("synthetic_voice_probability", 0.0))))
-        chunk_processing_ms = int((time.time() - chunk_start_time) * 1000)
 
         chunk_score = float(data.get("scam_score", 0.0))
         signals = data.get("signals", [])
@@ -139,17 +272,29 @@ class StreamProcessor:
             self.max_score = chunk_score
 
         # Exponential weighting: recent/severe chunks weighted more
-        self.cumulative_score = 0.7 * chunk_score + 0.3 * self.cumulative_score
+        self.cumulative_score = update_cumulative(self.cumulative_score, chunk_score)
         self.prev_cumulative = self.cumulative_score
         self.all_signals.extend(signals)
+        self.audio_removed_ms += analysis.removed_ms
+
+        if chunk_score >= self.early_verdict_threshold:
+            self.consecutive_high += 1
+        else:
+            self.consecutive_high = 0
+        if (self.early_verdict_reason is None and self.early_verdict_chunks > 0
+                and self.consecutive_high >= self.early_verdict_chunks):
+            self.early_verdict_reason = (
+                f"{self.consecutive_high} consecutive chunks scored at or above "
+                f"{self.early_verdict_threshold:.2f}"
+            )
 
         return {
             "type": "partial_result",
-            "chunk_index": self.chunk_index,
-            "timestamp_ms": timestamp_ms,
+            "chunk_index": chunk_index,
+            "timestamp_ms": analysis.timestamp_ms,
             "score_delta": round(score_delta, 4),
             "new_signals": new_signals,
-            "chunk_processing_ms": chunk_processing_ms,
+            "chunk_processing_ms": analysis.processing_ms,
             "vocal_stress": round(vocal_stress, 3),
             "background_noise": round(background_noise, 3),
             "synthetic_voice_probability": round(synthetic_voice_probability, 3),
@@ -161,8 +306,36 @@ class StreamProcessor:
             "signals": signals,
             "recommendation": data.get("recommendation", ""),
             "transcript_summary": data.get("transcript_summary", ""),
+            "decision_source": analysis.decision_source,
+            "analyzed": True,
+            "audio_removed_ms": analysis.removed_ms,
         }
 
+    def _sample_after_verdict(self) -> bool:
+        """After an early verdict, let only every Nth chunk through in "sample" mode."""
+        self._chunks_after_verdict += 1
+        if self.early_verdict_mode != "sample":
+            return False
+        return self._chunks_after_verdict % self.early_sample_every == 0
+
+    def take_early_final(self) -> Optional[dict]:
+        """Return the early verdict once, as soon as it is decided.
+
+        It carries the final_result fields under its own type,
+        "early_final_result", so clients keep the stream open; the closing
+        final_result still follows end_stream.
+        """
+        if self.early_verdict_reason is None or self._early_final_sent:
+            return None
+        self._early_final_sent = True
+        return {**self.get_final_result(), "type": "early_final_result"}
+
+    async def process_chunk(self, audio_chunk: bytes) -> dict:
+        """Process a single audio chunk and return partial result."""
+        # Always increment chunk_index to avoid duplicates
+        chunk_index = self.next_index()
+        return self.apply(chunk_index, await self.analyze_chunk(audio_chunk))
+
     def get_final_result(self) -> dict:
         """Return the final aggregated result.
 
@@ -171,8 +344,7 @@ class StreamProcessor:
         This ensures the final verdict is consistent with what the user saw
         during recording.
         """
-        from services.response_formatter import score_to_verdict
-        combined_score = round(0.6 * self.max_score + 0.4 * self.cumulative_score, 4)
+        combined_score = peak_weighted_score(self.max_score, self.cumulative_score)
         verdict = score_to_verdict(combined_score)
 
         in_band = 0.35 <= combined_score <= 0.65
@@ -183,7 +355,7 @@ class StreamProcessor:
             "Low model confidence" if low_conf else None
         )
 
-        return {
+        result = {
             "type": "final_result",
             "total_chunks": self.chunk_index,
             "combined_score": combined_score,
@@ -195,4 +367,13 @@ class StreamProcessor:
             "review_required": review_required,
             "review_reason": review_reason,
             "text_score": None,
+            "sampling": self.sampler.stats(),
+            "audio_removed_s": round(self.audio_removed_ms / 1000, 3),
         }
+        if self.early_verdict_reason is not None:
+            result["early_verdict"] = {
+                "reason": self.early_verdict_reason,
+                "after_verdict": "sampling" if self.early_verdict_mode == "sample" else "stopped",
+                "upstream_calls_saved": self.upstream_calls_saved,
+            }
+        return result
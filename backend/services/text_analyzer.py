@@ -1,26 +1,36 @@
-import asyncio
-import functools
-from config import client, TEXT_MODEL
+from config import TEXT_MODEL, UPSTREAM_TIMEOUT_S
 from prompts.templates import SCAM_TEXT_PROMPT
+from services.priority import INTERACTIVE, LIVE, current_priority
+from services.resilience import call_model
+from services.upstream import chat_completion
+
+
+def build_text_payload(transcript: str) -> dict:
+    """Build the Mistral Large chat completions payload for a transcript."""
+    return {
+        "model": TEXT_MODEL,
+        "messages": [
+            {
+                "role": "user",
+                "content": SCAM_TEXT_PROMPT + "\n\nTranscript:\n" + transcript,
+            }
+        ],
+        "response_format": {"type": "json_object"},
+    }
+
 
 async def analyze_transcript(transcript: str) -> str:
-    """Send transcript to Mistral chat completions and return raw response text."""
-    loop = asyncio.get_event_loop()
-    response = await asyncio.wait_for(
-        loop.run_in_executor(
-            None,
-            functools.partial(
-                client.chat.complete,
-                model=TEXT_MODEL,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": SCAM_TEXT_PROMPT + "\n\nTranscript:\n" + transcript,
-                    }
-                ],
-                response_format={"type": "json_object"},
-            ),
-        ),
-        timeout=120,
+    """Send transcript to Mistral chat completions and return raw response text.
+
+    Runs on the shared upstream pool as a native coroutine, so a timeout or a
+    cancelled caller aborts the HTTP request and frees its connection at once.
+    The call goes through services.resilience (admission slot, breaker,
+    deadline, retries, hedging) and may raise AdmissionRejected, CircuitOpen or
+    DeadlineExceeded. Only live and interactive callers are hedged; a duplicate
+    request buys nothing for bulk work that nobody is waiting on.
+    """
+    payload = build_text_payload(transcript)
+    return await call_model(
+        TEXT_MODEL, lambda: chat_completion(payload), timeout_s=UPSTREAM_TIMEOUT_S,
+        hedge=current_priority().klass in (LIVE, INTERACTIVE),
     )
-    return response.choices[0].message.content
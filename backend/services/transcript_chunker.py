@@ -0,0 +1,70 @@
+"""Split long transcripts into overlapping chunks at speaker turns or sentences.
+
+Transcripts up to MAX_TRANSCRIPT_LENGTH go to the text model in one call.
+Full call-center transcripts are often five to ten times that, so they are
+cut into chunks of at most max_chars that are scored concurrently and
+reduced into one verdict (see response_formatter.reduce_results).
+
+Each chunk ends at the last speaker turn in its second half, falling back
+to the last sentence end, then the last whitespace, then a hard cut. The
+next chunk starts at the first turn or sentence within overlap_chars before
+that end, so a scam script spanning the cut is read whole at least once.
+"""
+
+import bisect
+import re
+from typing import List
+
+# A new line that opens with a speaker label ("Agent:", "Caller 2:") or a blank line
+_TURN = re.compile(r"\n(?=[ \t]*[A-Za-z][\w .'-]{0,30}:)|\n[ \t]*\n")
+_SENTENCE = re.compile(r"[.!?][\"')\]]*\s+")
+_SPACE = re.compile(r"\s+")
+
+
+def _positions(pattern: re.Pattern, text: str) -> List[int]:
+    return [m.end() for m in pattern.finditer(text)]
+
+
+def _last_in(positions: List[int], low: int, high: int) -> int:
+    """Largest position in [low, high], or -1."""
+    i = bisect.bisect_right(positions, high) - 1
+    return positions[i] if i >= 0 and positions[i] >= low else -1
+
+
+def _first_in(positions: List[int], low: int, high: int) -> int:
+    """Smallest position in [low, high), or -1."""
+    i = bisect.bisect_left(positions, low)
+    return positions[i] if i < len(positions) and positions[i] < high else -1
+
+
+def split_transcript(text: str, max_chars: int, overlap_chars: int = 500) -> List[str]:
+    """Chunks of at most max_chars covering text in order; [text] if it already fits."""
+    if len(text) <= max_chars:
+        return [text]
+    overlap_chars = min(overlap_chars, max_chars // 4)
+    boundaries = [_positions(_TURN, text), _positions(_SENTENCE, text)]
+    spaces = _positions(_SPACE, text)
+
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        limit = start + max_chars
+        end = -1
+        for positions in boundaries + [spaces]:
+            end = _last_in(positions, start + max_chars // 2, limit)
+            if end > 0:
+                break
+        if end <= 0:
+            end = limit
+        chunks.append(text[start:end].strip())
+
+        next_start = -1
+        for positions in boundaries:
+            next_start = _first_in(positions, end - overlap_chars, end)
+            if next_start > 0:
+                break
+        if next_start <= start:
+            next_start = end
+        start = next_start
+    chunks.append(text[start:].strip())
+    return [chunk for chunk in chunks if chunk]
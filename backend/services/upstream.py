@@ -0,0 +1,168 @@
+"""Shared async HTTP client for Mistral API calls.
+
+A single pooled httpx.AsyncClient is opened at app startup and reused by
+every upstream call, so requests ride warm keep-alive connections instead of
+paying a TLS handshake each time and are not capped by the default executor's
+thread count.
+"""
+
+import json
+import logging
+from typing import AsyncIterator, Callable, Iterable, Optional, Union
+
+import httpx
+
+from config import (
+    MISTRAL_API_KEY,
+    MISTRAL_API_BASE_URL,
+    UPSTREAM_TIMEOUT_S,
+    UPSTREAM_MAX_CONNECTIONS,
+    UPSTREAM_MAX_KEEPALIVE,
+    UPSTREAM_KEEPALIVE_EXPIRY_S,
+    UPSTREAM_HTTP2,
+)
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Build a pooled client for the Mistral API.
+
+    HTTP/2 is only enabled when requested and the optional ``h2`` package is
+    installed. ``transport`` lets tests route requests to a stand-in.
+    """
+    http2 = UPSTREAM_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("UPSTREAM_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        base_url=MISTRAL_API_BASE_URL,
+        headers={"Authorization": f"Bearer {MISTRAL_API_KEY}"},
+        timeout=httpx.Timeout(UPSTREAM_TIMEOUT_S, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY_S,
+        ),
+        http2=http2,
+        transport=transport,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it if startup has not run (scripts, tests)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def startup() -> None:
+    """Open the shared client. Called from the app lifespan."""
+    get_client()
+
+
+async def shutdown() -> None:
+    """Close the shared client and release pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class StreamedJsonBody:
+    """A JSON request body sent in pieces instead of one serialized string.
+
+    prefix and suffix are constant, pre-encoded JSON around one large string
+    value whose contents (already JSON-safe) come from parts(). The body is
+    produced while httpx writes it, with a known Content-Length, so the full
+    document never exists in memory. parts is called once per send.
+    """
+
+    def __init__(self, prefix: bytes, parts: Callable[[], Iterable[bytes]], suffix: bytes, parts_length: int):
+        self.prefix = prefix
+        self.parts = parts
+        self.suffix = suffix
+        self.length = len(prefix) + parts_length + len(suffix)
+
+    @property
+    def headers(self) -> dict:
+        return {"Content-Type": "application/json", "Content-Length": str(self.length)}
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self.prefix
+        for part in self.parts():
+            yield part
+        yield self.suffix
+
+    def to_bytes(self) -> bytes:
+        return b"".join([self.prefix, *self.parts(), self.suffix])
+
+
+Payload = Union[dict, StreamedJsonBody]
+
+
+def _body_kwargs(payload: Payload) -> dict:
+    if isinstance(payload, StreamedJsonBody):
+        return {"content": payload, "headers": payload.headers}
+    return {"json": payload}
+
+
+async def chat_completion(payload: Payload) -> str:
+    """POST a chat completions payload and return the first choice's content."""
+    resp = await get_client().post(CHAT_COMPLETIONS_PATH, **_body_kwargs(payload))
+    resp.raise_for_status()
+
+    body = resp.json()
+    choices = body.get("choices")
+    if not choices or not isinstance(choices, list) or len(choices) == 0:
+        raise ValueError("Unexpected API response structure: no choices")
+    content = choices[0].get("message", {}).get("content", "")
+    if not content:
+        raise ValueError("Empty content in API response")
+    return content
+
+
+async def stream_chat_completion(payload: Payload, on_delta: Callable[[str], None]) -> str:
+    """POST a streaming chat completions request and return the full content.
+
+    ``on_delta`` is called with the accumulated content after every
+    server-sent delta, so callers can act on a response before it finishes.
+    A StreamedJsonBody must already carry ``"stream": true``.
+    """
+    if isinstance(payload, dict):
+        payload = {**payload, "stream": True}
+    parts = []
+    async with get_client().stream("POST", CHAT_COMPLETIONS_PATH, **_body_kwargs(payload)) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or []
+            if not choices:
+                continue
+            delta = (choices[0].get("delta") or {}).get("content") or ""
+            if delta:
+                parts.append(delta)
+                on_delta("".join(parts))
+
+    content = "".join(parts)
+    if not content:
+        raise ValueError("Empty content in API response")
+    return content
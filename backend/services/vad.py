@@ -0,0 +1,136 @@
+"""Frame-level voice activity detection that trims non-speech before Voxtral.
+
+Audio is cut into FRAME_MS frames and each frame is classified from two
+vectorized measures:
+- RMS energy at or above the energy threshold is speech (voiced sounds)
+- RMS at or above half the threshold with a high zero-crossing rate is also
+  speech (unvoiced fricatives such as "s" and "f" are quiet but noisy)
+
+Non-speech runs of at least min_silence_ms (ring-back gaps, hold silence,
+long pauses) are cut, keeping padding_ms next to the speech on either side
+so words are not clipped. Shorter pauses are left alone. The kept frames are
+re-encoded as a compact WAV in the original sample format.
+
+The whole-chunk silence gate (stream_processor.is_silent) is the special
+case of one frame spanning the chunk with the energy test only.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from services.wav import WavFormatError, WavInfo, build_wav, parse_wav, to_samples
+
+FRAME_MS = 30
+# Zero crossings per sample above which a quieter frame counts as unvoiced speech
+UNVOICED_ZCR = 0.3
+
+
+@dataclass
+class TrimResult:
+    audio_bytes: bytes
+    original_s: float
+    kept_s: float
+    segments_removed: int = 0
+
+    @property
+    def removed_s(self) -> float:
+        return self.original_s - self.kept_s
+
+
+def speech_frames(
+    samples: np.ndarray,
+    frame_len: int,
+    energy_threshold: float,
+    zcr_threshold: Optional[float] = UNVOICED_ZCR,
+) -> np.ndarray:
+    """Boolean speech mask, one entry per frame (the last frame may be short).
+
+    samples are mono in 16-bit full scale. With zcr_threshold=None only the
+    energy test is applied.
+    """
+    n = len(samples)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    x = samples.astype(np.float64, copy=False)
+    starts = np.arange(0, n, max(1, frame_len))
+    lengths = np.diff(np.append(starts, n))
+    rms = np.sqrt(np.add.reduceat(x * x, starts) / lengths)
+    # NaN from corrupt float audio compares False, i.e. non-speech
+    speech = rms >= energy_threshold
+    if zcr_threshold is not None and n > 1:
+        signs = np.signbit(x)
+        crossings = np.append(signs[1:] != signs[:-1], False).astype(np.float64)
+        zcr = np.add.reduceat(crossings, starts) / lengths
+        speech |= (rms >= energy_threshold / 2) & (zcr >= zcr_threshold)
+    return speech
+
+
+def keep_mask(speech: np.ndarray, min_silence_frames: int, padding_frames: int) -> np.ndarray:
+    """Frames to keep: everything except long non-speech runs minus their padding."""
+    keep = np.ones(len(speech), dtype=bool)
+    if not speech.any():
+        return ~keep
+    edges = np.diff(np.concatenate(([1], speech.astype(np.int8), [1])))
+    for start, end in zip(np.flatnonzero(edges == -1), np.flatnonzero(edges == 1)):
+        if end - start < min_silence_frames:
+            continue
+        cut_start = start + (padding_frames if start > 0 else 0)
+        cut_end = end - (padding_frames if end < len(speech) else 0)
+        if cut_end > cut_start:
+            keep[cut_start:cut_end] = False
+    return keep
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def trim_silence(
+    audio_bytes: bytes,
+    energy_threshold: float = 500.0,
+    min_silence_ms: int = 500,
+    padding_ms: int = 150,
+    info: Optional[WavInfo] = None,
+) -> Optional[TrimResult]:
+    """Cut long non-speech spans out of a WAV.
+
+    Returns None when the audio cannot be analyzed (not a readable WAV or an
+    unsupported sample format). When nothing worth cutting is found, or no
+    speech at all, audio_bytes is returned unchanged; kept_s is 0.0 in the
+    latter case so callers can tell.
+    """
+    try:
+        info = info or parse_wav(audio_bytes)
+    except WavFormatError:
+        return None
+    samples = to_samples(info, audio_bytes)
+    if samples is None:
+        return None
+    channels = info.channels
+    frames_total = len(samples) // channels
+    original_s = frames_total / info.sample_rate
+    if channels > 1:
+        samples = samples[: frames_total * channels].reshape(-1, channels).mean(axis=1)
+
+    frame_len = max(1, info.sample_rate * FRAME_MS // 1000)
+    speech = speech_frames(samples, frame_len, energy_threshold)
+    if not speech.any():
+        return TrimResult(audio_bytes, original_s, 0.0)
+
+    keep = keep_mask(speech, -(-min_silence_ms // FRAME_MS), padding_ms // FRAME_MS)
+    if keep.all():
+        return TrimResult(audio_bytes, original_s, original_s)
+
+    pcm = info.pcm(audio_bytes)
+    step = frame_len * info.block_align
+    kept = [pcm[start * step:end * step] for start, end in _runs(keep)]
+    kept_frames = sum(len(part) for part in kept) // info.block_align
+    trimmed = build_wav(
+        b"".join(kept), info.channels, info.sample_rate, info.bits_per_sample, info.format_tag,
+    )
+    return TrimResult(
+        trimmed, original_s, kept_frames / info.sample_rate, segments_removed=len(_runs(~keep)),
+    )
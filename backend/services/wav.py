@@ -0,0 +1,193 @@
+"""RIFF/WAVE parsing shared by uploads, live-stream chunks and the audio helpers.
+
+The parser walks the RIFF sub-chunks (fmt, LIST, fact, ..., data) and never
+copies the PCM payload: WavInfo records where the data chunk sits and
+WavInfo.pcm() returns a memoryview over it. WavParser accepts the bytes
+incrementally, so a malformed upload is rejected as soon as its header has
+arrived, before any base64 or upstream work.
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+# WAVE_FORMAT_* tags; EXTENSIBLE carries the real tag in its SubFormat GUID
+WAVE_PCM = 1
+WAVE_FLOAT = 3
+WAVE_EXTENSIBLE = 0xFFFE
+
+# Headers (fmt + LIST metadata etc.) larger than this are rejected
+MAX_HEADER_BYTES = 1 << 20
+# Streaming writers often leave the data size as 0 or 0xFFFFFFFF
+_UNKNOWN_SIZES = (0, 0xFFFFFFFF)
+
+
+class WavFormatError(ValueError):
+    """The bytes are not a WAV file this service can read."""
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    format_tag: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    block_align: int
+    data_offset: int
+    data_size: int
+    chunk_ids: Tuple[str, ...] = ()
+
+    @property
+    def frames(self) -> int:
+        return self.data_size // self.block_align
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames / self.sample_rate
+
+    def pcm(self, audio_bytes) -> memoryview:
+        """Zero-copy view of the data chunk."""
+        return memoryview(audio_bytes)[self.data_offset:self.data_offset + self.data_size]
+
+
+def _walk(buf: memoryview, final: bool) -> Optional[WavInfo]:
+    """Parse the header in buf; None if more bytes are needed (final=False only)."""
+    if len(buf) < 12:
+        if final:
+            raise WavFormatError("File is too short to be a WAV file.")
+        return None
+    if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        raise WavFormatError("File is not a valid WAV format.")
+
+    fmt = None
+    chunk_ids = []
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = bytes(buf[pos:pos + 4])
+        size = int.from_bytes(buf[pos + 4:pos + 8], "little")
+        body = pos + 8
+        chunk_ids.append(chunk_id.decode("latin-1"))
+
+        if chunk_id == b"data":
+            if fmt is None:
+                raise WavFormatError("WAV data chunk appears before the fmt chunk.")
+            available = len(buf) - body
+            if size in _UNKNOWN_SIZES or size > available:
+                if not final:
+                    # The data size is only known once the whole file is in
+                    return WavInfo(*fmt, data_offset=body, data_size=size, chunk_ids=tuple(chunk_ids))
+                size = available
+            return WavInfo(*fmt, data_offset=body, data_size=size, chunk_ids=tuple(chunk_ids))
+
+        if body + size > len(buf):
+            break
+        if chunk_id == b"fmt ":
+            fmt = _parse_fmt(buf[body:body + size])
+        pos = body + size + (size & 1)
+        if pos > MAX_HEADER_BYTES:
+            raise WavFormatError("WAV header is too large.")
+
+    if final:
+        raise WavFormatError("WAV file has no data chunk." if fmt else "WAV file has no fmt chunk.")
+    if len(buf) > MAX_HEADER_BYTES:
+        raise WavFormatError("WAV header is too large.")
+    return None
+
+
+def _parse_fmt(fmt: memoryview) -> Tuple[int, int, int, int, int]:
+    if len(fmt) < 16:
+        raise WavFormatError("WAV fmt chunk is truncated.")
+    tag = int.from_bytes(fmt[0:2], "little")
+    channels = int.from_bytes(fmt[2:4], "little")
+    rate = int.from_bytes(fmt[4:8], "little")
+    block_align = int.from_bytes(fmt[12:14], "little")
+    bits = int.from_bytes(fmt[14:16], "little")
+    if tag == WAVE_EXTENSIBLE and len(fmt) >= 26:
+        tag = int.from_bytes(fmt[24:26], "little")
+    if not channels or not rate or not bits or not block_align:
+        raise WavFormatError("WAV fmt chunk has zero channels, rate, bit depth or block size.")
+    return tag, channels, rate, bits, block_align
+
+
+def parse_wav(audio_bytes) -> WavInfo:
+    """Parse a complete WAV file; raises WavFormatError if it is malformed."""
+    return _walk(memoryview(audio_bytes), final=True)
+
+
+class WavParser:
+    """Incremental header parser for WAV bytes that arrive in pieces.
+
+    Only header bytes are buffered; once the data chunk header has been seen
+    feed() merely counts bytes. finish() fixes up the data size.
+    """
+
+    def __init__(self):
+        self._header = bytearray()
+        self.info: Optional[WavInfo] = None
+        self.total_bytes = 0
+
+    def feed(self, data: bytes) -> Optional[WavInfo]:
+        """Add bytes; returns WavInfo once the header is complete, raises WavFormatError early."""
+        self.total_bytes += len(data)
+        if self.info is None:
+            self._header += data
+            self.info = _walk(memoryview(self._header), final=False)
+            if self.info is not None:
+                self._header = bytearray()
+        return self.info
+
+    def finish(self) -> WavInfo:
+        """Final header with the data size clamped to the bytes actually received."""
+        if self.info is None:
+            return _walk(memoryview(self._header), final=True)
+        available = self.total_bytes - self.info.data_offset
+        size = self.info.data_size
+        if size in _UNKNOWN_SIZES or size > available:
+            size = available
+        return WavInfo(
+            self.info.format_tag, self.info.channels, self.info.sample_rate, self.info.bits_per_sample,
+            self.info.block_align, self.info.data_offset, size, self.info.chunk_ids,
+        )
+
+
+def build_wav(pcm: bytes, channels: int, sample_rate: int, bits_per_sample: int, format_tag: int = WAVE_PCM) -> bytes:
+    """Canonical 44-byte-header WAV around raw PCM (or float) frames."""
+    block_align = channels * bits_per_sample // 8
+    header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    header += b"fmt " + struct.pack(
+        "<IHHIIHH", 16, format_tag, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample,
+    )
+    header += b"data" + struct.pack("<I", len(pcm))
+    return header + pcm
+
+
+def pcm_samples(audio_bytes: bytes) -> Optional[np.ndarray]:
+    """Interleaved samples in 16-bit full scale, viewing the bytes without copying where possible.
+
+    Input that is not RIFF/WAVE is treated as 16-bit PCM after a 44-byte
+    header, as the live-stream path always has. Raises WavFormatError on a
+    malformed RIFF header; returns None for sample formats that cannot be
+    converted (e.g. 24-bit).
+    """
+    buf = memoryview(audio_bytes)
+    if len(buf) < 12 or buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        pcm = buf[44:]
+        return np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+
+    return to_samples(parse_wav(buf), buf)
+
+
+def to_samples(info: WavInfo, audio_bytes) -> Optional[np.ndarray]:
+    """Interleaved samples of a parsed WAV in 16-bit full scale; None for unsupported formats."""
+    pcm = info.pcm(audio_bytes)
+    if info.format_tag == WAVE_PCM and info.bits_per_sample == 8:
+        return (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) * 256.0
+    if info.format_tag == WAVE_PCM and info.bits_per_sample == 16:
+        return np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    if info.format_tag == WAVE_PCM and info.bits_per_sample == 32:
+        return np.frombuffer(pcm, dtype="<i4", count=len(pcm) // 4) / 65536.0
+    if info.format_tag == WAVE_FLOAT and info.bits_per_sample == 32:
+        return np.frombuffer(pcm, dtype="<f4", count=len(pcm) // 4) * 32768.0
+    return None
@@ -3,9 +3,11 @@
 import sys
 import os
 import types
+import json
 import struct
+import httpx
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import patch
 
 # ── Module stubs (must run before any backend imports) ────────────────────────
 
@@ -15,19 +17,94 @@ _config = types.ModuleType("config")
 _config.MISTRAL_API_KEY = "test-key"
 _config.AUDIO_MODEL = "voxtral-mini-latest"
 _config.TEXT_MODEL = "mistral-large-latest"
-_config.MAX_AUDIO_SIZE_MB = 25
+_config.MAX_AUDIO_SIZE_MB = 64
+_config.MAX_AUDIO_DURATION_S = 1800.0
+_config.AUDIO_COST_PER_MINUTE_USD = 0.001
 _config.MAX_TRANSCRIPT_LENGTH = 10000
+_config.MAX_TRANSCRIPT_TOTAL_LENGTH = 200000
+_config.TRANSCRIPT_CHUNK_OVERLAP = 500
+_config.TRANSCRIPT_MAX_PARALLEL = 4
 _config.THRESHOLD_SAFE = 0.30
 _config.THRESHOLD_SUSPICIOUS = 0.60
 _config.THRESHOLD_LIKELY_SCAM = 0.85
 _config.DEMO_MODE = False
-_config.client = MagicMock()
+_config.MISTRAL_API_BASE_URL = "https://api.mistral.ai"
+_config.UPSTREAM_TIMEOUT_S = 120.0
+_config.UPSTREAM_MAX_CONNECTIONS = 100
+_config.UPSTREAM_MAX_KEEPALIVE = 20
+_config.UPSTREAM_KEEPALIVE_EXPIRY_S = 30.0
+_config.UPSTREAM_HTTP2 = False
+_config.DEADLINE_AUDIO_S = 120.0
+_config.DEADLINE_TRANSCRIPT_S = 60.0
+_config.DEADLINE_STREAM_CHUNK_S = 20.0
+_config.UPSTREAM_RETRIES = 2
+_config.UPSTREAM_RETRY_BACKOFF_S = 0.01
+_config.UPSTREAM_RETRY_MIN_BUDGET_S = 5.0
+_config.BREAKER_ENABLED = True
+_config.BREAKER_WINDOW = 20
+_config.BREAKER_MIN_CALLS = 5
+_config.BREAKER_FAILURE_RATIO = 0.5
+_config.BREAKER_SLOW_CALL_S = 45.0
+_config.BREAKER_OPEN_S = 30.0
+_config.HEDGE_ENABLED = False
+_config.HEDGE_PERCENTILE = 90.0
+_config.HEDGE_MAX_RATE = 0.1
+_config.HEDGE_MIN_SAMPLES = 20
+_config.SECOND_OPINION_GATE = 0.5
+_config.SPECULATIVE_SECOND_OPINION = True
+_config.RESULT_CACHE_ENABLED = True
+_config.RESULT_CACHE_TTL_S = 3600.0
+_config.RESULT_CACHE_MAX_ENTRIES = 1024
+_config.RESULT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+_config.RESULT_CACHE_SHARED_DIR = ""
+_config.RESULT_CACHE_SHARED_MAX_BYTES = 256 * 1024 * 1024
+_config.FINGERPRINT_ENABLED = True
+_config.FINGERPRINT_MIN_MATCHES = 20
+_config.FINGERPRINT_MIN_MATCH_RATIO = 0.05
+_config.FINGERPRINT_MIN_COVERAGE = 0.8
+_config.FINGERPRINT_MAX_DURATION_DIFF = 0.2
+_config.FINGERPRINT_MAX_RECORDS = 500
+_config.RULE_ENGINE_ENABLED = True
+_config.RULES_PATH = ""
+_config.RULE_SCAM_THRESHOLD = 0.95
+_config.LOCAL_CLASSIFIER_ENABLED = True  # off in production; on here to exercise the cascade
+_config.LOCAL_CLASSIFIER_PATH = ""
+_config.LOCAL_SCAM_THRESHOLD = 0.95
+_config.LOCAL_SAFE_THRESHOLD = 0.05
+_config.STREAM_QUEUE_SIZE = 8
+_config.STREAM_MAX_IN_FLIGHT = 3
+_config.STREAM_BACKPRESSURE_POLICY = "merge"
+_config.STREAM_MAX_BACKLOG = 2
+_config.STREAM_EARLY_VERDICT_CHUNKS = 3
+_config.STREAM_EARLY_VERDICT_THRESHOLD = 0.85
+_config.STREAM_EARLY_VERDICT_MODE = "stop"
+_config.STREAM_EARLY_SAMPLE_EVERY = 6
+_config.AUDIO_NORMALIZE_ENABLED = True
+_config.AUDIO_TARGET_RATE = 16000
+_config.AUDIO_PREP_WORKERS = 0
+_config.STEREO_CHANNEL = "mix"
+_config.ADMISSION_MAX_AUDIO_MB = 200.0
+_config.ADMISSION_MAX_AUDIO_CALLS = 32
+_config.ADMISSION_MAX_TEXT_CALLS = 32
+_config.ADMISSION_QUEUE_SIZE = 64
+_config.ADMISSION_QUEUE_TIMEOUT_S = 10.0
+_config.ADMISSION_RETRY_AFTER_S = 5.0
+_config.PRIORITY_BULK_SHARE = 0.75
+_config.SEGMENTATION_ENABLED = True
+_config.SEGMENT_THRESHOLD_S = 120.0
+_config.SEGMENT_WINDOW_S = 60.0
+_config.SEGMENT_OVERLAP_S = 5.0
+_config.SEGMENT_MAX_PARALLEL = 4
+_config.VAD_ENABLED = True
+_config.VAD_ENERGY_THRESHOLD = 500.0
+_config.VAD_MIN_SILENCE_MS = 500
+_config.VAD_PADDING_MS = 150
+_config.ADAPTIVE_SAMPLING_ENABLED = True
+_config.ADAPTIVE_SAMPLE_EVERY = 3
+_config.ADAPTIVE_LOW_SCORE = 0.3
+_config.ADAPTIVE_WARMUP_CHUNKS = 2
 sys.modules["config"] = _config
 
-_mistralai = types.ModuleType("mistralai")
-_mistralai.Mistral = lambda **kw: None
-sys.modules.setdefault("mistralai", _mistralai)
-
 # ── Auth & rate-limit stubs (before app import) ──────────────────────────────
 
 # Stub slowapi so it works without installation during basic tests
@@ -64,6 +141,7 @@ _auth = types.ModuleType("auth")
 _auth.is_auth_enabled = lambda: False
 _auth.verify_api_key = lambda key: True
 _auth.verify_ws_api_key = lambda key: True
+_auth.api_key_weight = lambda key: 1.0
 
 
 async def _noop_require_api_key(api_key=None):
@@ -80,6 +158,26 @@ from fastapi.testclient import TestClient
 
 # ── Fixtures ──────────────────────────────────────────────────────────────────
 
+@pytest.fixture(autouse=True)
+def _clear_result_cache():
+    """Start every test with an empty result cache so mocked calls always run."""
+    from services.result_cache import result_cache
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_resilience():
+    """Failures (and latencies) injected by one test must not open a circuit or shape hedging for the next."""
+    from services.resilience import HEDGE_MAX_RATE, HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE, Hedger, breakers, hedgers
+    for breaker in breakers.values():
+        breaker.reset()
+    for model in hedgers:
+        hedgers[model] = Hedger(HEDGE_PERCENTILE, HEDGE_MAX_RATE, HEDGE_MIN_SAMPLES)
+    yield
+
+
 @pytest.fixture
 def client():
     """FastAPI TestClient for HTTP and WebSocket tests."""
@@ -112,3 +210,39 @@ def _make_valid_wav(pcm_samples=None):
 def make_valid_wav():
     """Fixture returning a WAV-builder function."""
     return _make_valid_wav
+
+
+class UpstreamStub:
+    """Records upstream requests and replays queued chat completion bodies."""
+
+    def __init__(self):
+        self.requests = []
+        self._responses = []
+
+    def reply(self, content=None, body=None, status_code=200):
+        """Queue a response; the last queued response repeats once the queue drains."""
+        if body is None:
+            body = {"choices": [{"message": {"content": content}}]}
+        self._responses.append((status_code, body))
+
+    def payloads(self):
+        return [json.loads(r.content) for r in self.requests]
+
+    def handler(self, request):
+        self.requests.append(request)
+        if len(self._responses) > 1:
+            status_code, body = self._responses.pop(0)
+        else:
+            status_code, body = self._responses[0]
+        return httpx.Response(status_code, json=body)
+
+
+@pytest.fixture
+def mock_upstream():
+    """Route the shared upstream client through an in-memory transport."""
+    from services import upstream
+
+    stub = UpstreamStub()
+    mock_client = upstream.create_client(transport=httpx.MockTransport(stub.handler))
+    with patch.object(upstream, "_client", mock_client):
+        yield stub
@@ -0,0 +1,178 @@
+"""Tests for services/audio_features.py, services/adaptive_sampling.py and sampling in StreamProcessor."""
+
+import asyncio
+import io
+import wave
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+
+from services.adaptive_sampling import AdaptiveSampler
+from services.audio_features import ChunkFeatures, extract_features
+from services.stream_processor import StreamProcessor
+
+RATE = 8000
+
+
+def _wav(samples, rate=RATE):
+    pcm = np.clip(np.asarray(samples), -32768, 32767).astype("<i2").tobytes()
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+def _tone(*freqs, amplitude=4000.0, seconds=0.5):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return sum(amplitude * np.sin(2 * np.pi * f * t) for f in freqs)
+
+
+def _voice(amplitude=4000.0, seed=0):
+    """Band-limited noise standing in for speech."""
+    noise = np.random.default_rng(seed).standard_normal(RATE // 2)
+    return amplitude * np.convolve(noise, np.ones(8) / 8, mode="same") * 3
+
+
+def _features(rms=1000.0, centroid=500.0, dtmf=None):
+    return ChunkFeatures(rms=rms, zcr=0.1, centroid_hz=centroid, dtmf=dtmf)
+
+
+def _model_json(score):
+    return (
+        f'{{"scam_score": {score}, "confidence": 0.9, "verdict": "SAFE", "signals": [], '
+        f'"recommendation": "ok", "transcript_summary": "window"}}'
+    )
+
+
+class TestFeatures:
+    def test_dtmf_key_is_detected(self):
+        # "5" is 770 Hz + 1336 Hz
+        assert extract_features(_wav(_tone(770, 1336))).dtmf == "5"
+
+    def test_short_key_press_in_a_long_chunk_is_detected(self):
+        # A 100 ms press is a small share of a 2 s chunk's energy, but holds its frames
+        chunk = np.concatenate([_voice(seed=1)] * 4)
+        press = _tone(770, 1336, amplitude=8000, seconds=0.1)
+        chunk[RATE:RATE + len(press)] = press
+        assert extract_features(_wav(chunk)).dtmf == "5"
+
+    def test_single_frame_blip_is_not_dtmf(self):
+        chunk = np.concatenate([_voice(seed=1)] * 4)
+        blip = _tone(770, 1336, amplitude=8000, seconds=0.03)
+        chunk[RATE:RATE + len(blip)] = blip
+        assert extract_features(_wav(chunk)).dtmf is None
+
+    def test_speech_like_audio_is_not_dtmf(self):
+        assert extract_features(_wav(_voice())).dtmf is None
+
+    def test_rms_tracks_amplitude(self):
+        quiet = extract_features(_wav(_tone(440, amplitude=1000)))
+        loud = extract_features(_wav(_tone(440, amplitude=8000)))
+        assert abs(loud.rms / quiet.rms - 8.0) < 0.01
+
+    def test_centroid_follows_pitch(self):
+        assert extract_features(_wav(_tone(1500))).centroid_hz > extract_features(_wav(_tone(300))).centroid_hz
+
+    def test_unreadable_chunk(self):
+        assert extract_features(b"not a wav") is None
+
+
+class TestSampler:
+    def test_low_stable_stream_is_sampled(self):
+        sampler = AdaptiveSampler(every=3, warmup=2)
+        decisions = [sampler.decide(_features(), 0.05) for _ in range(8)]
+        assert decisions == ["warmup", "warmup", None, None, "cadence", None, None, "cadence"]
+        assert sampler.stats()["upstream_calls_saved"] == 4
+        assert sampler.stats()["effective_rate"] == 0.5
+
+    def test_risky_stream_is_analyzed_every_chunk(self):
+        sampler = AdaptiveSampler(every=3, warmup=0, low_score=0.3)
+        assert all(sampler.decide(_features(), 0.4) == "risk" for _ in range(4))
+
+    def test_score_movement_escalates(self):
+        sampler = AdaptiveSampler(every=3, warmup=0)
+        sampler.decide(_features(), 0.05)
+        assert sampler.decide(_features(), 0.2) == "unstable"
+
+    def test_energy_jump_escalates(self):
+        sampler = AdaptiveSampler(every=3, warmup=0)
+        sampler.decide(_features(rms=1000), 0.05)
+        assert sampler.decide(_features(rms=5000), 0.05) == "energy"
+
+    def test_voice_change_escalates(self):
+        sampler = AdaptiveSampler(every=3, warmup=0)
+        sampler.decide(_features(centroid=400), 0.05)
+        assert sampler.decide(_features(centroid=900), 0.05) == "voice"
+
+    def test_dtmf_escalates(self):
+        sampler = AdaptiveSampler(every=3, warmup=0)
+        sampler.decide(_features(), 0.05)
+        assert sampler.decide(_features(dtmf="1"), 0.05) == "dtmf"
+        assert sampler.stats()["escalations"] == {"dtmf": 1}
+
+    def test_disabled(self):
+        sampler = AdaptiveSampler(enabled=False)
+        assert all(sampler.decide(_features(), 0.0) == "disabled" for _ in range(5))
+
+
+class TestProcessorSampling:
+    def test_held_chunks_are_merged_into_next_window(self):
+        sp = StreamProcessor(sampler=AdaptiveSampler(every=3, warmup=1))
+        windows = []
+
+        async def fake_analyze(audio_bytes, on_partial=None):
+            windows.append(len(audio_bytes))
+            return _model_json(0.05)
+
+        chunks = [_wav(_voice(seed=i)) for i in range(4)]
+        sources = []
+        with patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+            for chunk in chunks:
+                index = sp.next_index()
+                partial = sp.apply(index, asyncio.run(sp.analyze_chunk(chunk)))
+                sources.append(partial["decision_source"])
+
+        assert sources == ["model", "sampling", "sampling", "model"]
+        assert len(windows) == 2
+        assert windows[1] > 2.5 * len(chunks[0])
+        sampling = sp.get_final_result()["sampling"]
+        assert sampling["upstream_calls_saved"] == 2
+        assert sampling["effective_rate"] == 0.5
+
+    def test_chunks_held_at_end_are_flushed_as_one_window(self):
+        sp = StreamProcessor(sampler=AdaptiveSampler(every=3, warmup=1))
+        windows = []
+
+        async def fake_analyze(audio_bytes, on_partial=None):
+            windows.append(len(audio_bytes))
+            return _model_json(0.05 if len(windows) == 1 else 0.6)
+
+        chunks = [_wav(_voice(seed=i)) for i in range(3)]
+        with patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+            for chunk in chunks:
+                sp.apply(sp.next_index(), asyncio.run(sp.analyze_chunk(chunk)))
+            assert len(windows) == 1
+            flushed = asyncio.run(sp.flush_held())
+            sp.apply(sp.chunk_index, flushed)
+            assert asyncio.run(sp.flush_held()) is None
+
+        assert flushed.decision_source == "model"
+        assert windows[1] > 1.5 * len(chunks[0])
+        final = sp.get_final_result()
+        assert final["max_score"] == 0.6
+        assert final["total_chunks"] == 3
+        sampling = final["sampling"]
+        assert sampling["analyzed_chunks"] == 2
+        assert sampling["upstream_calls_saved"] == 1
+        assert sampling["flushed_chunks"] == 2
+
+    def test_nothing_flushed_after_early_verdict(self):
+        sp = StreamProcessor(sampler=AdaptiveSampler(every=3, warmup=0))
+        sp._held_chunks = [_wav(_voice(seed=0))]
+        sp.early_verdict_reason = "3 consecutive chunks scored at or above 0.85"
+        with patch("services.stream_processor.analyze_audio", new_callable=AsyncMock) as mock_audio:
+            assert asyncio.run(sp.flush_held()) is None
+        mock_audio.assert_not_called()
@@ -0,0 +1,126 @@
+"""Tests for services/admission.py and 503 handling of work beyond the budgets."""
+
+import asyncio
+import json
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from services.admission import AdmissionController, AdmissionRejected, admission
+from services.priority import Priority
+
+MODEL_JSON = json.dumps({
+    "scam_score": 0.2, "confidence": 0.9, "verdict": "SAFE", "signals": [],
+    "recommendation": "ok", "transcript_summary": "Friendly call.",
+})
+
+
+def _controller(**kwargs):
+    defaults = dict(max_bytes=100, call_limits={"m": 1}, queue_size=4, queue_timeout_s=1.0, retry_after_s=3.0)
+    defaults.update(kwargs)
+    return AdmissionController(**defaults)
+
+
+class TestController:
+    def test_call_slots_queue_in_order(self):
+        ctl = _controller(call_limits={"m": 1})
+        order = []
+
+        async def job(name, hold):
+            async with ctl.admit("m"):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        async def main():
+            await asyncio.gather(job("a", 0.02), job("b", 0), job("c", 0))
+
+        asyncio.run(main())
+        assert order == ["a", "b", "c"]
+        assert ctl.stats()["queued"] == 2
+        assert ctl.calls_in_flight["m"] == 0
+
+    def test_other_models_are_not_blocked(self):
+        ctl = _controller(call_limits={"m": 1, "n": 1})
+
+        async def main():
+            async with ctl.admit("m"):
+                waiter = asyncio.ensure_future(ctl._acquire("m", 0, Priority()))
+                await asyncio.sleep(0)
+                async with ctl.admit("n"):
+                    assert ctl.calls_in_flight["n"] == 1
+                waiter.cancel()
+                await asyncio.gather(waiter, return_exceptions=True)
+
+        asyncio.run(main())
+        assert ctl.stats()["waiting"] == 0
+
+    def test_full_queue_rejects_at_once(self):
+        ctl = _controller(queue_size=0)
+
+        async def main():
+            async with ctl.admit("m"):
+                with pytest.raises(AdmissionRejected) as exc:
+                    await ctl._acquire("m", 0, Priority())
+                assert exc.value.retry_after_s == 3.0
+
+        asyncio.run(main())
+        assert ctl.rejected == 1
+
+    def test_queue_timeout_rejects(self):
+        ctl = _controller(queue_timeout_s=0.01)
+
+        async def main():
+            async with ctl.admit("m"):
+                with pytest.raises(AdmissionRejected, match="queue timeout"):
+                    await ctl._acquire("m", 0, Priority())
+
+        asyncio.run(main())
+        assert ctl.timed_out == 1
+        assert ctl.stats()["waiting"] == 0
+
+    def test_byte_budget(self):
+        ctl = _controller(max_bytes=100)
+
+        async def main():
+            # Larger than the budget, but alone: admitted
+            async with ctl.admit(nbytes=150):
+                assert ctl.bytes_in_flight == 150
+                second = asyncio.ensure_future(ctl._acquire(None, 10, Priority()))
+                await asyncio.sleep(0)
+                assert not second.done()
+            await second
+            assert ctl.bytes_in_flight == 10
+            async with ctl.admit(nbytes=90):
+                assert ctl.bytes_in_flight == 100
+
+        asyncio.run(main())
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        ctl = _controller()
+
+        async def main():
+            async with ctl.admit("m"):
+                waiter = asyncio.ensure_future(ctl._acquire("m", 0, Priority()))
+                await asyncio.sleep(0)
+                waiter.cancel()
+                await asyncio.gather(waiter, return_exceptions=True)
+            assert ctl.calls_in_flight["m"] == 0
+
+        asyncio.run(main())
+        assert ctl.stats()["waiting"] == 0
+
+
+class TestEndpoints:
+    def test_transcript_over_budget_is_503(self, client):
+        with patch.dict(admission.call_limits, {"mistral-large-latest": 0}), \
+             patch.object(admission, "queue_size", 0), \
+             patch("services.text_analyzer.chat_completion", new_callable=AsyncMock, return_value=MODEL_JSON):
+            resp = client.post("/api/analyze/transcript", json={"transcript": "Did you get the package I sent?"})
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "5"
+        assert resp.json()["detail"]["error"] == "server_busy"
+
+    def test_health_reports_occupancy(self, client):
+        data = client.get("/api/health").json()["admission"]
+        assert data["audio_bytes_in_flight"] == 0
+        assert set(data["calls_in_flight"]) == {"voxtral-mini-latest", "mistral-large-latest"}
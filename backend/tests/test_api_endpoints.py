@@ -150,7 +150,7 @@ class TestTranscriptEndpoint:
     def test_transcript_too_long(self, client):
         resp = client.post(
             "/api/analyze/transcript",
-            json={"transcript": "a" * 10001},
+            json={"transcript": "a" * 200001},
         )
         assert resp.status_code == 422
 
@@ -183,8 +183,8 @@ class TestTranscriptEndpoint:
         assert detail["error"] == "parse_error"
 
     def test_transcript_exceeds_handler_limit(self, client):
-        """Patch MAX_TRANSCRIPT_LENGTH to 5 so an 8-char transcript passes Pydantic but fails handler."""
-        with patch("routers.analyze.MAX_TRANSCRIPT_LENGTH", 5), \
+        """Patch MAX_TRANSCRIPT_TOTAL_LENGTH to 5 so an 8-char transcript passes Pydantic but fails handler."""
+        with patch("routers.analyze.MAX_TRANSCRIPT_TOTAL_LENGTH", 5), \
              patch("routers.analyze.analyze_text", new_callable=AsyncMock) as mock_analyze:
             resp = client.post(
                 "/api/analyze/transcript",
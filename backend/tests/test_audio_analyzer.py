@@ -1,4 +1,4 @@
-"""Tests for services/audio_analyzer.py with mocked urllib."""
+"""Tests for services/audio_analyzer.py against a mocked upstream transport."""
 
 import sys
 import os
@@ -6,8 +6,9 @@ import types
 import json
 import base64
 import asyncio
+import tracemalloc
+import httpx
 import pytest
-from unittest.mock import patch, MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -20,89 +21,100 @@ _config.MAX_TRANSCRIPT_LENGTH = 10000
 _config.THRESHOLD_SAFE = 0.30
 _config.THRESHOLD_SUSPICIOUS = 0.60
 _config.THRESHOLD_LIKELY_SCAM = 0.85
-_config.client = MagicMock()
 sys.modules.setdefault("config", _config)
 
-_mistralai = types.ModuleType("mistralai")
-_mistralai.Mistral = lambda **kw: None
-sys.modules.setdefault("mistralai", _mistralai)
+from services.audio_analyzer import B64_CHUNK_BYTES, analyze_audio, build_audio_body, build_audio_payload
 
-from services.audio_analyzer import analyze_audio
 
+class TestAnalyzeAudio:
+    def test_payload_construction(self, mock_upstream):
+        mock_upstream.reply('{"scam_score": 0.1}')
+        asyncio.run(analyze_audio(b"fake wav bytes"))
 
-def _mock_api_response(body_dict):
-    """Create a mock urllib response with JSON body."""
-    mock_resp = MagicMock()
-    mock_resp.read.return_value = json.dumps(body_dict).encode()
-    return mock_resp
+        request = mock_upstream.requests[0]
+        assert str(request.url) == "https://api.mistral.ai/v1/chat/completions"
+        assert request.headers["Authorization"] == "Bearer test-key"
+        assert request.headers["Content-Type"] == "application/json"
 
+        payload = mock_upstream.payloads()[0]
+        assert payload["model"] == "voxtral-mini-latest"
+        assert payload["temperature"] == 0.3
+        assert payload["response_format"] == {"type": "json_object"}
 
-class TestAnalyzeAudio:
-    def test_payload_construction(self):
-        audio = b"fake wav bytes"
-        resp = _mock_api_response({
-            "choices": [{"message": {"content": '{"scam_score": 0.1}'}}]
-        })
-        with patch("urllib.request.urlopen", return_value=resp) as mock_urlopen:
-            asyncio.run(analyze_audio(audio))
-
-            call_args = mock_urlopen.call_args
-            request = call_args[0][0]
-            assert request.full_url == "https://api.mistral.ai/v1/chat/completions"
-            assert request.get_header("Authorization") == "Bearer test-key"
-            assert request.get_header("Content-type") == "application/json"
-
-            payload = json.loads(request.data)
-            assert payload["model"] == "voxtral-mini-latest"
-            assert payload["temperature"] == 0.3
-            assert payload["response_format"] == {"type": "json_object"}
-
-    def test_base64_encoding(self):
+    def test_base64_encoding(self, mock_upstream):
         audio = b"\x01\x02\x03\x04\x05"
         expected_b64 = base64.b64encode(audio).decode("utf-8")
-        resp = _mock_api_response({
-            "choices": [{"message": {"content": '{"ok": true}'}}]
-        })
-        with patch("urllib.request.urlopen", return_value=resp) as mock_urlopen:
-            asyncio.run(analyze_audio(audio))
-            payload = json.loads(mock_urlopen.call_args[0][0].data)
-            actual_b64 = payload["messages"][0]["content"][0]["input_audio"]["data"]
-            assert actual_b64 == expected_b64
-
-    def test_successful_response(self):
+        mock_upstream.reply('{"ok": true}')
+        asyncio.run(analyze_audio(audio))
+        payload = mock_upstream.payloads()[0]
+        actual_b64 = payload["messages"][0]["content"][0]["input_audio"]["data"]
+        assert actual_b64 == expected_b64
+
+    def test_successful_response(self, mock_upstream):
         content_str = '{"scam_score": 0.7, "verdict": "LIKELY_SCAM"}'
-        resp = _mock_api_response({
-            "choices": [{"message": {"content": content_str}}]
-        })
-        with patch("urllib.request.urlopen", return_value=resp):
-            result = asyncio.run(analyze_audio(b"audio"))
+        mock_upstream.reply(content_str)
+        result = asyncio.run(analyze_audio(b"audio"))
         assert result == content_str
 
-    def test_empty_choices_raises(self):
-        resp = _mock_api_response({"choices": []})
-        with patch("urllib.request.urlopen", return_value=resp):
-            with pytest.raises(ValueError, match="no choices"):
-                asyncio.run(analyze_audio(b"audio"))
-
-    def test_no_choices_key_raises(self):
-        resp = _mock_api_response({"result": "unexpected"})
-        with patch("urllib.request.urlopen", return_value=resp):
-            with pytest.raises(ValueError, match="no choices"):
-                asyncio.run(analyze_audio(b"audio"))
-
-    def test_empty_content_raises(self):
-        resp = _mock_api_response({
-            "choices": [{"message": {"content": ""}}]
-        })
-        with patch("urllib.request.urlopen", return_value=resp):
-            with pytest.raises(ValueError, match="Empty content"):
-                asyncio.run(analyze_audio(b"audio"))
-
-    def test_response_closed(self):
-        resp = _mock_api_response({"choices": []})
-        with patch("urllib.request.urlopen", return_value=resp):
-            try:
-                asyncio.run(analyze_audio(b"audio"))
-            except ValueError:
-                pass
-        resp.close.assert_called_once()
+    def test_empty_choices_raises(self, mock_upstream):
+        mock_upstream.reply(body={"choices": []})
+        with pytest.raises(ValueError, match="no choices"):
+            asyncio.run(analyze_audio(b"audio"))
+
+    def test_no_choices_key_raises(self, mock_upstream):
+        mock_upstream.reply(body={"result": "unexpected"})
+        with pytest.raises(ValueError, match="no choices"):
+            asyncio.run(analyze_audio(b"audio"))
+
+    def test_empty_content_raises(self, mock_upstream):
+        mock_upstream.reply("")
+        with pytest.raises(ValueError, match="Empty content"):
+            asyncio.run(analyze_audio(b"audio"))
+
+    def test_http_error_raises(self, mock_upstream):
+        mock_upstream.reply(body={"message": "rate limited"}, status_code=429)
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(analyze_audio(b"audio"))
+
+
+class TestStreamedBody:
+    def _audio(self, n):
+        return bytes(range(256)) * (n // 256) + bytes(n % 256)
+
+    @pytest.mark.parametrize("n", [0, 1, B64_CHUNK_BYTES, 2 * B64_CHUNK_BYTES + 5])
+    def test_matches_dict_payload(self, n):
+        audio = self._audio(n)
+        body = build_audio_body(audio)
+        raw = body.to_bytes()
+        assert len(raw) == body.length
+        assert json.loads(raw) == build_audio_payload(audio)
+
+    def test_stream_flag(self):
+        assert json.loads(build_audio_body(b"abc", stream=True).to_bytes())["stream"] is True
+
+    def test_sent_with_content_length(self, mock_upstream):
+        audio = self._audio(B64_CHUNK_BYTES + 7)
+        mock_upstream.reply('{"ok": true}')
+        asyncio.run(analyze_audio(audio))
+        request = mock_upstream.requests[0]
+        assert int(request.headers["Content-Length"]) == len(request.content)
+        data = mock_upstream.payloads()[0]["messages"][0]["content"][0]["input_audio"]["data"]
+        assert base64.b64decode(data) == audio
+
+    def test_streaming_memory_is_bounded(self):
+        audio = self._audio(8 * 1024 * 1024)
+        body = build_audio_body(audio)
+
+        async def drain():
+            size = 0
+            async for part in body:
+                size += len(part)
+            return size
+
+        tracemalloc.start()
+        size = asyncio.run(drain())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert size == body.length
+        # One base64 part at a time, not a full-size copy of the encoded audio
+        assert peak < len(audio) / 4
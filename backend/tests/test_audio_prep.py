@@ -0,0 +1,170 @@
+"""Tests for services/audio_prep.py, services/cpu_pool.py, upload normalization and channel isolation."""
+
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch, AsyncMock
+
+import numpy as np
+import pytest
+
+from services import cpu_pool
+from services.audio_prep import detect_caller_channel, prepare_audio, resample
+from services.wav import WAVE_FLOAT, build_wav, parse_wav, pcm_samples
+
+MODEL_JSON = json.dumps({
+    "scam_score": 0.2, "confidence": 0.9, "verdict": "SAFE", "signals": [],
+    "recommendation": "ok", "transcript_summary": "Friendly call.",
+})
+
+
+def _tone(freq, rate, seconds=1.0, amplitude=8000.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return amplitude * np.sin(2 * np.pi * freq * t)
+
+
+def _stereo_wav(rate=44100, seconds=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    left = _tone(440, rate, seconds) + rng.standard_normal(int(rate * seconds)) * 500
+    right = _tone(660, rate, seconds)
+    frames = np.stack([left, right], axis=1).astype("<i2")
+    return build_wav(frames.tobytes(), 2, rate, 16)
+
+
+def _peak_hz(samples, rate):
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.fft.rfftfreq(len(samples), 1.0 / rate)[np.argmax(spectrum)]
+
+
+class TestResample:
+    @pytest.mark.parametrize("src", [48000, 44100, 22050])
+    def test_tone_survives(self, src):
+        out = resample(_tone(1000, src), src, 16000)
+        assert len(out) == 16000
+        assert _peak_hz(out, 16000) == pytest.approx(1000, abs=2)
+        # Amplitude is preserved away from the edges
+        assert np.abs(out[1000:-1000]).max() == pytest.approx(8000, rel=0.02)
+
+    def test_above_nyquist_is_filtered_not_aliased(self):
+        out = resample(_tone(11000, 48000), 48000, 16000)
+        # 11 kHz would alias to 5 kHz without the anti-aliasing filter
+        assert np.sqrt(np.mean(out[1000:-1000] ** 2)) < 8000 * 0.05
+
+
+class TestPrepare:
+    def test_stereo_44k_is_downmixed_and_resampled(self):
+        audio = _stereo_wav()
+        prepared = prepare_audio(audio, vad=False)
+        info = parse_wav(prepared.audio_bytes)
+        assert (info.channels, info.sample_rate, info.bits_per_sample) == (1, 16000, 16)
+        assert prepared.normalized
+        assert len(audio) / len(prepared.audio_bytes) > 5
+        assert info.duration_s == pytest.approx(1.0, abs=0.001)
+
+    def test_float_is_converted_to_16_bit(self):
+        samples = (_tone(300, 16000) / 32768.0).astype("<f4")
+        prepared = prepare_audio(build_wav(samples.tobytes(), 1, 16000, 32, WAVE_FLOAT), vad=False)
+        assert parse_wav(prepared.audio_bytes).bits_per_sample == 16
+        assert np.abs(pcm_samples(prepared.audio_bytes)).max() == pytest.approx(8000, abs=2)
+
+    def test_compact_audio_is_untouched(self):
+        audio = build_wav(_tone(300, 8000).astype("<i2").tobytes(), 1, 8000, 16)
+        prepared = prepare_audio(audio, vad=False)
+        assert prepared.audio_bytes is audio
+        assert not prepared.normalized
+
+    def test_unreadable_passes_through(self):
+        assert prepare_audio(b"garbage").audio_bytes == b"garbage"
+
+
+class TestCpuPool:
+    def test_process_pool(self):
+        audio = _stereo_wav(seconds=0.5)
+        with patch.object(cpu_pool, "_executor", ProcessPoolExecutor(max_workers=1)) as executor:
+            prepared = asyncio.run(cpu_pool.run_cpu(prepare_audio, audio, vad=False))
+            executor.shutdown()
+        assert parse_wav(prepared.audio_bytes).sample_rate == 16000
+
+
+class TestUploadNormalization:
+    def test_upstream_gets_16k_mono(self, client):
+        audio = _stereo_wav(rate=48000, seed=3)
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")})
+        assert resp.status_code == 200
+        info = parse_wav(mock_audio.call_args.args[0])
+        assert (info.channels, info.sample_rate) == (1, 16000)
+        usage = client.get("/api/health").json()["audio_usage"]
+        assert usage["payload_bytes_out"] < usage["payload_bytes_in"]
+
+
+def _call_recording(caller="right", seconds=2.0, seed=0, leak=0.05):
+    """Stereo call: the caller talks most of the time, the customer briefly, with a little crosstalk."""
+    rng = np.random.default_rng(seed)
+    n = int(16000 * seconds)
+    caller_voice = rng.standard_normal(n) * 3000
+    customer_voice = np.zeros(n)
+    customer_voice[: n // 5] = rng.standard_normal(n // 5) * 3000
+    caller_voice[: n // 5] = 0
+    a, b = customer_voice + leak * caller_voice, caller_voice + leak * customer_voice
+    left, right = (a, b) if caller == "right" else (b, a)
+    return build_wav(np.stack([left, right], axis=1).astype("<i2").tobytes(), 2, 16000, 16)
+
+
+class TestChannelIsolation:
+    @pytest.mark.parametrize("caller", ["left", "right"])
+    def test_detects_the_talkative_channel(self, caller):
+        assert detect_caller_channel(_call_recording(caller)) == caller
+
+    def test_duplicated_mono_is_mixed(self):
+        mono = np.random.default_rng(0).standard_normal(16000) * 3000
+        audio = build_wav(np.stack([mono, mono], axis=1).astype("<i2").tobytes(), 2, 16000, 16)
+        assert detect_caller_channel(audio) == "mix"
+
+    def test_prepare_keeps_only_the_chosen_channel(self):
+        audio = _call_recording("right")
+        prepared = prepare_audio(audio, vad=False, channel="right")
+        assert prepared.channel == "right"
+        kept = pcm_samples(prepared.audio_bytes)
+        stereo = pcm_samples(audio).reshape(-1, 2)
+        assert np.array_equal(kept, stereo[:, 1])
+        assert len(prepared.audio_bytes) < len(audio) / 1.9
+
+    def test_mono_ignores_channel(self):
+        audio = build_wav(_tone(300, 16000).astype("<i2").tobytes(), 1, 16000, 16)
+        assert prepare_audio(audio, vad=False, channel="left").channel is None
+
+
+class TestUploadChannel:
+    def test_auto_channel_is_reported(self, client):
+        audio = _call_recording("left", seed=4)
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_audio:
+            resp = client.post(
+                "/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")}, data={"channel": "auto"},
+            )
+        assert resp.json()["scored_channel"] == "left"
+        assert parse_wav(mock_audio.call_args.args[0]).channels == 1
+
+    def test_channel_verdicts_are_cached_apart(self, client):
+        audio = _call_recording("right", seed=5)
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_audio:
+            for channel in ("left", "right", "right"):
+                resp = client.post(
+                    "/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")}, data={"channel": channel},
+                )
+        assert resp.json()["decision_source"] == "cache"
+        assert resp.json()["scored_channel"] == "right"
+        assert mock_audio.await_count == 2
+
+    def test_default_scores_the_mix(self, client):
+        audio = _call_recording("right", seed=6)
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON):
+            resp = client.post("/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")})
+        assert resp.json()["scored_channel"] == "mix"
+
+    def test_invalid_channel(self, client):
+        resp = client.post(
+            "/api/analyze/audio", files={"file": ("a.wav", _call_recording(), "audio/wav")}, data={"channel": "centre"},
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["error"] == "invalid_channel"
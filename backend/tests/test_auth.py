@@ -84,3 +84,18 @@ class TestWebSocketAuth:
         f.write_text(json.dumps(keys))
         with patch.object(auth, "API_KEYS_FILE", str(f)):
             assert auth.verify_ws_api_key("cs_bad_key") is False
+
+
+class TestKeyWeight:
+    def test_weight_from_key_entry(self, tmp_path):
+        f = tmp_path / "keys.json"
+        f.write_text(json.dumps({
+            "cs_heavy": {"name": "batch", "active": True, "weight": 3},
+            "cs_plain": {"name": "plain", "active": True},
+            "cs_bad": {"name": "bad", "active": True, "weight": "lots"},
+        }))
+        with patch.object(auth, "API_KEYS_FILE", str(f)):
+            assert auth.api_key_weight("cs_heavy") == 3.0
+            assert auth.api_key_weight("cs_plain") == 1.0
+            assert auth.api_key_weight("cs_bad") == 1.0
+            assert auth.api_key_weight(None) == 1.0
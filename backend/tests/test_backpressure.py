@@ -0,0 +1,134 @@
+"""Tests for services/backpressure.py and backlog handling on /ws/stream."""
+
+import asyncio
+import io
+import wave
+from unittest.mock import patch
+
+from services.backpressure import merge_wav_chunks, plan_dispatch
+
+
+def _wav(frames: bytes, rate=16000, channels=1):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+def _batch(n):
+    return [(i, _wav(bytes([i, 0]) * 10)) for i in range(1, n + 1)]
+
+
+class TestMergeWav:
+    def test_frames_are_concatenated(self):
+        merged = merge_wav_chunks([_wav(b"\x01\x00" * 4), _wav(b"\x02\x00" * 6)])
+        with wave.open(io.BytesIO(merged)) as w:
+            assert w.getnframes() == 10
+            assert w.readframes(10) == b"\x01\x00" * 4 + b"\x02\x00" * 6
+
+    def test_mismatched_formats(self):
+        assert merge_wav_chunks([_wav(b"\x00\x00", rate=16000), _wav(b"\x00\x00", rate=8000)]) is None
+
+    def test_unreadable_chunk(self):
+        assert merge_wav_chunks([_wav(b"\x00\x00"), b"not a wav"]) is None
+
+
+class TestPlanDispatch:
+    def test_backlog_within_limit_is_untouched(self):
+        steps = plan_dispatch(_batch(2), "drop", max_backlog=2)
+        assert [(s.chunk_index, s.upstream, s.report) for s in steps] == [(1, True, None), (2, True, None)]
+
+    def test_block_analyzes_everything(self):
+        steps = plan_dispatch(_batch(5), "block", max_backlog=2)
+        assert len(steps) == 5
+        assert all(s.report is None for s in steps)
+
+    def test_merge(self):
+        steps = plan_dispatch(_batch(3), "merge", max_backlog=2)
+        assert len(steps) == 1
+        assert steps[0].chunk_index == 3
+        assert steps[0].report == {"policy": "merge", "backlog": 3, "merged_chunks": [1, 2, 3]}
+        with wave.open(io.BytesIO(steps[0].audio_chunk)) as w:
+            assert w.getnframes() == 30
+
+    def test_merge_falls_back_to_drop(self):
+        batch = _batch(2) + [(3, b"garbage")]
+        steps = plan_dispatch(batch, "merge", max_backlog=2)
+        assert len(steps) == 1
+        assert steps[0].audio_chunk == b"garbage"
+        assert steps[0].report["policy"] == "drop"
+        assert steps[0].report["requested_policy"] == "merge"
+
+    def test_drop_keeps_newest(self):
+        batch = _batch(4)
+        steps = plan_dispatch(batch, "drop", max_backlog=2)
+        assert len(steps) == 1
+        assert steps[0].audio_chunk == batch[-1][1]
+        assert steps[0].report == {"policy": "drop", "backlog": 4, "dropped_chunks": [1, 2, 3]}
+
+    def test_shed_keeps_only_newest_upstream(self):
+        steps = plan_dispatch(_batch(3), "shed", max_backlog=2)
+        assert [(s.chunk_index, s.upstream) for s in steps] == [(1, False), (2, False), (3, True)]
+        assert steps[-1].report["shed_chunks"] == [1, 2]
+
+
+def _model_json(score):
+    return (
+        f'{{"scam_score": {score}, "confidence": 0.9, "verdict": "SAFE", "signals": [], '
+        f'"recommendation": "ok", "transcript_summary": "window"}}'
+    )
+
+
+def _run_backlogged_stream(client, make_valid_wav, policy):
+    """Block the only analysis slot on chunk 1 while chunks 2-5 arrive."""
+    analyzed = []
+
+    async def fake_analyze(audio_bytes, on_partial=None):
+        analyzed.append(len(audio_bytes))
+        if len(analyzed) == 1:
+            await asyncio.sleep(0.3)
+        return _model_json(0.4)
+
+    chunks = [make_valid_wav([2000 + i, -2000] * 50) for i in range(5)]
+    with patch("routers.stream.STREAM_MAX_IN_FLIGHT", 1), \
+         patch("routers.stream.STREAM_BACKPRESSURE_POLICY", policy), \
+         patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+        with client.websocket_connect("/ws/stream") as ws:
+            ws.receive_json()  # connected
+            for chunk in chunks:
+                ws.send_bytes(chunk)
+            ws.send_json({"type": "end_stream"})
+            messages = []
+            while True:
+                message = ws.receive_json()
+                messages.append(message)
+                if message["type"] == "final_result":
+                    break
+    partials = [m for m in messages if m["type"] == "partial_result"]
+    return partials, analyzed, len(chunks[0])
+
+
+class TestStreamBackpressure:
+    def test_merge_policy(self, client, make_valid_wav):
+        partials, analyzed, chunk_size = _run_backlogged_stream(client, make_valid_wav, "merge")
+        assert [p["chunk_index"] for p in partials] == [1, 5]
+        assert partials[1]["backpressure"]["merged_chunks"] == [2, 3, 4, 5]
+        assert len(analyzed) == 2
+        assert analyzed[1] > 3 * chunk_size
+
+    def test_drop_policy(self, client, make_valid_wav):
+        partials, analyzed, _ = _run_backlogged_stream(client, make_valid_wav, "drop")
+        assert [p["chunk_index"] for p in partials] == [1, 5]
+        assert partials[1]["backpressure"]["dropped_chunks"] == [2, 3, 4]
+        assert len(analyzed) == 2
+
+    def test_shed_policy(self, client, make_valid_wav):
+        partials, analyzed, _ = _run_backlogged_stream(client, make_valid_wav, "shed")
+        assert [p["chunk_index"] for p in partials] == [1, 2, 3, 4, 5]
+        assert [p["decision_source"] for p in partials] == ["model", "shed", "shed", "shed", "model"]
+        assert partials[1]["signals"][0]["category"] == "SHED"
+        assert all(p["backpressure"]["policy"] == "shed" for p in partials[1:])
+        assert len(analyzed) == 2
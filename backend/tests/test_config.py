@@ -6,7 +6,7 @@ import types
 import importlib
 import tempfile
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 
 # Backend root for path manipulation
@@ -20,11 +20,6 @@ def _reload_config(env_vars=None, secrets_content=None):
     Temporarily removes the config stub from sys.modules, sets up env vars
     and optionally a secrets file, then imports config fresh.
     """
-    # Ensure mistralai is stubbed so `Mistral(api_key=...)` doesn't fail
-    _mistralai = types.ModuleType("mistralai")
-    _mistralai.Mistral = MagicMock()
-    sys.modules["mistralai"] = _mistralai
-
     # Stub dotenv so load_dotenv() is a no-op
     _dotenv = types.ModuleType("dotenv")
     _dotenv.load_dotenv = lambda: None
@@ -73,10 +68,6 @@ class TestConfigLoadsFromEnvVar:
     def test_config_loads_from_env_var(self):
         """When MISTRAL_API_KEY is in env, config picks it up."""
         # Stub out dependencies
-        _mistralai = types.ModuleType("mistralai")
-        _mistralai.Mistral = MagicMock()
-        sys.modules["mistralai"] = _mistralai
-
         _dotenv = types.ModuleType("dotenv")
         _dotenv.load_dotenv = lambda: None
         sys.modules["dotenv"] = _dotenv
@@ -96,13 +87,35 @@ class TestConfigLoadsFromEnvVar:
                 sys.modules["config"] = saved
 
 
+class TestUploadLimitsFollowSegmentation:
+    @pytest.mark.parametrize("flag, duration_s, size_mb", [("true", 1800.0, 64.0), ("false", 600.0, 25.0)])
+    def test_defaults(self, flag, duration_s, size_mb):
+        """Segmented scoring raises the default upload limits to 30 minutes."""
+        _dotenv = types.ModuleType("dotenv")
+        _dotenv.load_dotenv = lambda: None
+        sys.modules["dotenv"] = _dotenv
+
+        saved = sys.modules.pop("config", None)
+        env = {"MISTRAL_API_KEY": "test-env-key", "SEGMENTATION_ENABLED": flag}
+        try:
+            with patch.dict(os.environ, env, clear=False):
+                for name in ("MAX_AUDIO_DURATION_S", "MAX_AUDIO_SIZE_MB"):
+                    os.environ.pop(name, None)
+                import config
+                importlib.reload(config)
+                assert config.MAX_AUDIO_DURATION_S == duration_s
+                assert config.MAX_AUDIO_SIZE_MB == size_mb
+                # 20 minutes of 16 kHz mono 16-bit audio fits when segmenting
+                assert (20 * 60 * 16000 * 2 / (1024 * 1024) <= config.MAX_AUDIO_SIZE_MB) == (flag == "true")
+        finally:
+            sys.modules.pop("config", None)
+            if saved is not None:
+                sys.modules["config"] = saved
+
+
 class TestConfigLoadsFromSecretsFile:
     def test_config_loads_from_secrets_file(self):
         """When env var is unset, config reads from .secrets/mistral_api_key."""
-        _mistralai = types.ModuleType("mistralai")
-        _mistralai.Mistral = MagicMock()
-        sys.modules["mistralai"] = _mistralai
-
         _dotenv = types.ModuleType("dotenv")
         _dotenv.load_dotenv = lambda: None
         sys.modules["dotenv"] = _dotenv
@@ -146,10 +159,6 @@ class TestConfigLoadsFromSecretsFile:
 class TestConfigEntersDemoWhenNoKey:
     def test_config_enters_demo_mode_when_no_key(self):
         """When no env var and no secrets file, config activates demo mode."""
-        _mistralai = types.ModuleType("mistralai")
-        _mistralai.Mistral = MagicMock()
-        sys.modules["mistralai"] = _mistralai
-
         _dotenv = types.ModuleType("dotenv")
         _dotenv.load_dotenv = lambda: None
         sys.modules["dotenv"] = _dotenv
@@ -174,7 +183,6 @@ class TestConfigEntersDemoWhenNoKey:
                         importlib.reload(config)
                         assert config.DEMO_MODE is True
                         assert config.MISTRAL_API_KEY == "demo"
-                        assert config.client is None
         finally:
             sys.modules.pop("config", None)
             if saved is not None:
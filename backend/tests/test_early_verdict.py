@@ -0,0 +1,120 @@
+"""Tests for early-verdict mode in StreamProcessor and on /ws/stream."""
+
+import asyncio
+from unittest.mock import patch
+
+from services.stream_processor import ChunkAnalysis, StreamProcessor
+
+
+def _scored(score):
+    return ChunkAnalysis(
+        {"scam_score": score, "confidence": 0.9, "verdict": "SCAM", "signals": [],
+         "recommendation": "Hang up.", "transcript_summary": "scam"},
+        "model", 0, 1,
+    )
+
+
+def _model_json(score):
+    return (
+        f'{{"scam_score": {score}, "confidence": 0.9, "verdict": "SCAM", "signals": [], '
+        f'"recommendation": "Hang up.", "transcript_summary": "window"}}'
+    )
+
+
+class TestProcessorEarlyVerdict:
+    def test_verdict_after_consecutive_high_chunks(self):
+        sp = StreamProcessor(early_verdict_chunks=3, early_verdict_threshold=0.85)
+        for score in (0.9, 0.95):
+            sp.apply(sp.next_index(), _scored(score))
+            assert sp.take_early_final() is None
+        sp.apply(sp.next_index(), _scored(0.9))
+        final = sp.take_early_final()
+        assert final["type"] == "early_final_result"
+        assert final["early_verdict"]["after_verdict"] == "stopped"
+        assert "3 consecutive chunks" in final["early_verdict"]["reason"]
+        assert sp.take_early_final() is None
+
+    def test_lower_score_resets_the_run(self):
+        sp = StreamProcessor(early_verdict_chunks=3, early_verdict_threshold=0.85)
+        for score in (0.9, 0.9, 0.5, 0.9, 0.9):
+            sp.apply(sp.next_index(), _scored(score))
+        assert sp.early_verdict_reason is None
+
+    def test_silence_does_not_break_the_run(self):
+        sp = StreamProcessor(early_verdict_chunks=2, early_verdict_threshold=0.85)
+        sp.apply(sp.next_index(), _scored(0.9))
+        sp.apply(sp.next_index(), ChunkAnalysis(None, "silence", 0, 1))
+        sp.apply(sp.next_index(), _scored(0.9))
+        assert sp.early_verdict_reason is not None
+
+    def test_disabled_with_zero_chunks(self):
+        sp = StreamProcessor(early_verdict_chunks=0)
+        for _ in range(5):
+            sp.apply(sp.next_index(), _scored(0.99))
+        assert sp.take_early_final() is None
+        assert "early_verdict" not in sp.get_final_result()
+
+    def test_stop_mode_skips_upstream(self, make_valid_wav):
+        sp = StreamProcessor(early_verdict_chunks=1, early_verdict_threshold=0.85)
+        sp.apply(sp.next_index(), _scored(0.9))
+        with patch("services.stream_processor.analyze_audio") as mock_analyze:
+            analysis = asyncio.run(sp.analyze_chunk(make_valid_wav([3000, -3000] * 50)))
+        mock_analyze.assert_not_called()
+        assert analysis.decision_source == "early_verdict"
+        partial = sp.apply(sp.next_index(), analysis)
+        assert partial["signals"][0]["category"] == "EARLY_VERDICT"
+        assert sp.get_final_result()["early_verdict"]["upstream_calls_saved"] == 1
+
+    def test_sample_mode_analyzes_every_nth_chunk(self, make_valid_wav):
+        sp = StreamProcessor(early_verdict_chunks=1, early_verdict_threshold=0.85,
+                             early_verdict_mode="sample", early_sample_every=3)
+        sp.apply(sp.next_index(), _scored(0.9))
+        calls = []
+
+        async def fake_analyze(audio_bytes, on_partial=None):
+            calls.append(audio_bytes)
+            return _model_json(0.9)
+
+        with patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+            sources = [
+                asyncio.run(sp.analyze_chunk(make_valid_wav([3000 + i, -3000] * 50))).decision_source
+                for i in range(6)
+            ]
+        assert sources == ["early_verdict", "early_verdict", "model"] * 2
+        assert len(calls) == 2
+        assert sp.get_final_result()["early_verdict"]["after_verdict"] == "sampling"
+
+
+class TestStreamEarlyVerdict:
+    def test_early_final_is_sent_before_end_stream(self, client, make_valid_wav):
+        analyzed = []
+
+        async def fake_analyze(audio_bytes, on_partial=None):
+            analyzed.append(audio_bytes)
+            return _model_json(0.95)
+
+        with patch("routers.stream.STREAM_MAX_IN_FLIGHT", 1), \
+             patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+            with client.websocket_connect("/ws/stream") as ws:
+                ws.receive_json()  # connected
+                messages = []
+                for i in range(3):
+                    ws.send_bytes(make_valid_wav([3000 + i, -3000] * 50))
+                while not any(m["type"] == "early_final_result" for m in messages):
+                    messages.append(ws.receive_json())
+                early = messages[-1]
+
+                ws.send_bytes(make_valid_wav([4000, -4000] * 50))
+                ws.send_json({"type": "end_stream"})
+                while True:
+                    message = ws.receive_json()
+                    messages.append(message)
+                    if message["type"] == "final_result":
+                        break
+
+        assert early["early_verdict"]["after_verdict"] == "stopped"
+        assert early["verdict"] == "SCAM"
+        partials = [m for m in messages if m["type"] == "partial_result"]
+        assert [p["decision_source"] for p in partials] == ["model", "model", "model", "early_verdict"]
+        assert len(analyzed) == 3
+        assert messages[-1]["early_verdict"]["upstream_calls_saved"] == 1
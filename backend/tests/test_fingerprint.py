@@ -0,0 +1,187 @@
+"""Tests for services/fingerprint.py — landmark hashing, index matching, endpoint and stream use."""
+
+import asyncio
+import io
+import os
+import wave
+import numpy as np
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from models.schemas import AnalysisResult
+from services.fingerprint import (
+    FingerprintIndex,
+    compute_fingerprint,
+    seed_from_demo,
+    _decode_wav,
+)
+from services.stream_processor import StreamProcessor
+
+DEMO_AUDIO = os.path.join(os.path.dirname(__file__), "..", "..", "demo", "sample_calls", "audio")
+
+
+def _encode(samples, rate, width=2, channels=1):
+    samples = np.clip(samples, -1.0, 1.0)
+    if channels == 2:
+        samples = np.repeat(samples[:, None], 2, axis=1).ravel()
+    if width == 1:
+        raw = (samples * 127 + 128).astype(np.uint8).tobytes()
+    else:
+        raw = (samples * 32767).astype("<i2").tobytes()
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(raw)
+    return buf.getvalue()
+
+
+def _demo(name):
+    with open(os.path.join(DEMO_AUDIO, f"{name}.wav"), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def seeded_index():
+    index = FingerprintIndex()
+    assert seed_from_demo(index) == 5
+    return index
+
+
+@pytest.fixture(scope="module")
+def medicare():
+    return _decode_wav(_demo("medicare_robocall"))
+
+
+class TestMatching:
+    def test_exact_recording_matches(self, seeded_index):
+        match = seeded_index.lookup(compute_fingerprint(_demo("ssn_fraud_robocall")))
+        assert match.name == "ssn_fraud_robocall"
+        assert match.offset_s == 0.0
+
+    def test_gain_and_leading_silence(self, seeded_index, medicare):
+        samples, rate = medicare
+        variant = np.concatenate([np.zeros(int(1.5 * rate)), samples * 0.3])
+        match = seeded_index.lookup(compute_fingerprint(_encode(variant, rate)))
+        assert match.name == "medicare_robocall"
+        assert match.offset_s == pytest.approx(-1.5, abs=0.1)
+
+    def test_eight_bit_reencode(self, seeded_index, medicare):
+        samples, rate = medicare
+        match = seeded_index.lookup(compute_fingerprint(_encode(samples, rate, width=1)))
+        assert match.name == "medicare_robocall"
+
+    def test_resampled_stereo(self, seeded_index, medicare):
+        samples, rate = medicare
+        resampled = np.interp(np.arange(0, len(samples), rate / 44100), np.arange(len(samples)), samples)
+        match = seeded_index.lookup(compute_fingerprint(_encode(resampled, 44100, channels=2)))
+        assert match.name == "medicare_robocall"
+
+    def test_five_second_excerpt(self, seeded_index, medicare):
+        samples, rate = medicare
+        excerpt = compute_fingerprint(_encode(samples[int(7 * rate):int(12 * rate)], rate))
+        match = seeded_index.lookup(excerpt, whole_recording=False)
+        assert match.name == "medicare_robocall"
+        assert match.offset_s == pytest.approx(7.0, abs=0.1)
+        # An excerpt does not stand for the whole call's verdict
+        assert seeded_index.lookup(excerpt) is None
+
+    def test_known_clip_plus_new_audio_does_not_match(self, seeded_index):
+        known, rate = _decode_wav(_demo("ssn_fraud_robocall"))
+        other, other_rate = _decode_wav(_demo("warranty_robocall"))
+        assert other_rate == rate
+        spliced = compute_fingerprint(_encode(np.concatenate([known, np.tile(other, 3)]), rate))
+        assert seeded_index.lookup(spliced) is None
+        assert seeded_index.lookup(spliced, whole_recording=False) is None
+
+    def test_unrelated_audio_does_not_match(self, seeded_index):
+        noise = np.random.default_rng(0).standard_normal(16000 * 5) * 0.2
+        assert seeded_index.lookup(compute_fingerprint(_encode(noise, 16000))) is None
+
+    def test_stored_verdict_returned(self, seeded_index):
+        match = seeded_index.lookup(compute_fingerprint(_demo("medicare_robocall")))
+        assert match.audio_result.verdict.value == "SUSPICIOUS"
+
+    def test_undecodable_bytes(self, seeded_index):
+        assert compute_fingerprint(b"not a wav") is None
+        assert seeded_index.lookup(None) is None
+
+
+class TestIndexBounds:
+    def test_eviction_keeps_seeded_records(self, medicare):
+        samples, rate = medicare
+        index = FingerprintIndex(max_records=2)
+        result = AnalysisResult(scam_score=0.1, confidence=0.9, verdict="SAFE", recommendation="ok")
+        index.add(compute_fingerprint(_demo("medicare_robocall")), result, name="seed", seeded=True)
+        index.add(compute_fingerprint(_demo("ssn_fraud_robocall")), result, name="first")
+        index.add(compute_fingerprint(_demo("warranty_robocall")), result, name="second")
+        assert len(index) == 2
+        assert index.lookup(compute_fingerprint(_demo("medicare_robocall"))).name == "seed"
+        assert index.lookup(compute_fingerprint(_demo("ssn_fraud_robocall"))) is None
+        assert index.lookup(compute_fingerprint(_demo("warranty_robocall"))).name == "second"
+
+
+VOXTRAL_JSON = (
+    '{"scam_score": 0.2, "confidence": 0.9, "verdict": "SAFE", "signals": [], '
+    '"recommendation": "ok", "transcript_summary": "Routine call."}'
+)
+
+
+class TestEndpointUse:
+    def test_upload_of_known_recording_skips_voxtral(self, client, seeded_index, medicare):
+        samples, rate = medicare
+        variant = _encode(samples * 0.5, rate, width=1)
+        with patch("routers.analyze.fingerprint_index", seeded_index), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("m.wav", variant, "audio/wav")})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["decision_source"] == "fingerprint"
+        assert data["audio_analysis"]["verdict"] == "SUSPICIOUS"
+        mock_audio.assert_not_called()
+
+    def test_stereo_match_reports_the_scored_channel(self, client, seeded_index, medicare):
+        samples, rate = medicare
+        stereo = _encode(samples * 0.5, rate, channels=2)
+        with patch("routers.analyze.fingerprint_index", seeded_index), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("m.wav", stereo, "audio/wav")})
+        data = resp.json()
+        assert data["decision_source"] == "fingerprint"
+        assert data["scored_channel"] == "mix"
+        mock_audio.assert_not_called()
+
+    def test_known_clip_plus_new_audio_goes_to_voxtral(self, client, seeded_index):
+        known, rate = _decode_wav(_demo("ssn_fraud_robocall"))
+        other, _ = _decode_wav(_demo("legal_threat_robocall"))
+        upload = _encode(np.concatenate([known, np.tile(other, 2)]), rate)
+        with patch("routers.analyze.fingerprint_index", seeded_index), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=VOXTRAL_JSON) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("s.wav", upload, "audio/wav")})
+        assert resp.json()["decision_source"] == "model"
+        mock_audio.assert_awaited()
+
+    def test_scored_upload_is_indexed(self, client, medicare):
+        samples, rate = medicare
+        index = FingerprintIndex()
+        with patch("routers.analyze.fingerprint_index", index), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=VOXTRAL_JSON) as mock_audio:
+            first = client.post("/api/analyze/audio", files={"file": ("a.wav", _encode(samples, rate), "audio/wav")})
+            replay = _encode(np.concatenate([np.zeros(rate), samples * 0.4]), rate)
+            second = client.post("/api/analyze/audio", files={"file": ("b.wav", replay, "audio/wav")})
+        assert first.json()["decision_source"] == "model"
+        assert second.json()["decision_source"] == "fingerprint"
+        assert mock_audio.await_count == 1
+
+    def test_stream_chunk_of_known_recording(self, seeded_index, medicare):
+        samples, rate = medicare
+        chunk = _encode(samples[int(3 * rate):int(8 * rate)], rate)
+        sp = StreamProcessor()
+        with patch("services.stream_processor.fingerprint_index", seeded_index), \
+             patch("services.stream_processor.analyze_audio", new_callable=AsyncMock) as mock_audio:
+            result = asyncio.run(sp.process_chunk(chunk))
+        mock_audio.assert_not_called()
+        assert result["decision_source"] == "fingerprint"
+        assert result["scam_score"] == 0.4
+        assert sp.max_score == 0.4
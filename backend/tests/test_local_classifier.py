@@ -0,0 +1,119 @@
+"""Tests for services/local_classifier.py and the cascade stage in the transcript endpoint."""
+
+import json
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from services.local_classifier import (
+    DEFAULT_MODEL_PATH,
+    LocalClassifier,
+    ngrams,
+    train,
+)
+
+SCAM = [
+    "buy gift cards and read me the codes or you will be arrested",
+    "your social security number is suspended pay now with gift cards",
+    "press one now to claim your prize before the offer expires",
+]
+SAFE = [
+    "hey it is mom are you coming to dinner on sunday",
+    "just checking in about the barbecue on saturday talk soon",
+    "your dentist appointment is tomorrow at ten see you then",
+]
+
+MODEL_JSON = json.dumps({
+    "scam_score": 0.5, "confidence": 0.7, "verdict": "SUSPICIOUS", "signals": [],
+    "recommendation": "Be careful.", "transcript_summary": "Unclear call.",
+})
+
+
+@pytest.fixture(scope="module")
+def model():
+    return train(SCAM + SAFE, [1] * len(SCAM) + [0] * len(SAFE), buckets=1 << 10)
+
+
+class TestFeatures:
+    def test_unigrams_and_bigrams_are_distinct(self):
+        assert ngrams("Press 1, press 1") == ["press", "1", "press 1", "1 press"]
+
+    def test_normalization_matches(self):
+        assert ngrams("GIFT   Cards") == ngrams("gift cards")
+
+
+class TestModel:
+    def test_training_separates_classes(self, model):
+        assert all(model.predict_proba(t) > 0.9 for t in SCAM)
+        assert all(model.predict_proba(t) < 0.1 for t in SAFE)
+
+    def test_save_and_load_round_trip(self, model, tmp_path):
+        path = str(tmp_path / "model.npz")
+        model.save(path)
+        loaded = LocalClassifier.load(path)
+        assert loaded.buckets == 1 << 10
+        assert loaded.predict_proba(SCAM[0]) == pytest.approx(model.predict_proba(SCAM[0]), abs=1e-6)
+
+    def test_missing_model_file(self, tmp_path):
+        assert LocalClassifier.load(str(tmp_path / "missing.npz")) is None
+
+    def test_bundled_model_loads(self):
+        bundled = LocalClassifier.load(DEFAULT_MODEL_PATH)
+        assert bundled is not None
+        assert bundled.predict_proba("purchase google play gift cards to avoid arrest") > 0.5
+
+
+class TestCascade:
+    def test_confident_scam(self, model):
+        cascade = LocalClassifier(model.weights, model.bias, scam_threshold=0.9, safe_threshold=0.1)
+        result = cascade.decide(SCAM[0])
+        assert result.verdict.value == "SCAM"
+        assert "gift" in result.signals[0].detail or "codes" in result.signals[0].detail
+
+    def test_confident_safe(self, model):
+        cascade = LocalClassifier(model.weights, model.bias, scam_threshold=0.9, safe_threshold=0.1)
+        assert cascade.decide(SAFE[0]).verdict.value == "SAFE"
+
+    def test_uncertain_band_falls_through(self, model):
+        cascade = LocalClassifier(model.weights, model.bias, scam_threshold=0.999999, safe_threshold=0.000001)
+        assert cascade.decide(SCAM[0]) is None
+        assert cascade.decide(SAFE[0]) is None
+        assert cascade.stats()["skip_rate"] == 0.0
+
+    def test_safe_verdict_can_be_withheld(self, model):
+        cascade = LocalClassifier(model.weights, model.bias, scam_threshold=0.9, safe_threshold=0.1)
+        assert cascade.decide(SAFE[0], allow_safe=False) is None
+        assert cascade.decide(SCAM[0], allow_safe=False).verdict.value == "SCAM"
+
+
+class TestEndpoint:
+    def test_confident_prediction_skips_model(self, client, model):
+        cascade = LocalClassifier(model.weights, model.bias, scam_threshold=0.9, safe_threshold=0.1)
+        with patch("routers.analyze.local_classifier", cascade), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock) as mock_text:
+            resp = client.post("/api/analyze/transcript", json={"transcript": SAFE[1]})
+        data = resp.json()
+        assert data["decision_source"] == "local_classifier"
+        assert data["text_analysis"]["verdict"] == "SAFE"
+        mock_text.assert_not_called()
+
+    def test_uncertain_prediction_reaches_model(self, client, model):
+        cascade = LocalClassifier(model.weights, model.bias, scam_threshold=0.999999, safe_threshold=0.000001)
+        with patch("routers.analyze.local_classifier", cascade), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_text:
+            resp = client.post("/api/analyze/transcript", json={"transcript": "who is calling please"})
+        assert resp.json()["decision_source"] == "model"
+        mock_text.assert_awaited_once()
+
+    def test_health_reports_cascade_stats(self, client):
+        data = client.get("/api/health").json()
+        assert "skip_rate" in data["local_classifier"]
+
+    def test_scam_phrase_blocks_a_local_safe_verdict(self, client, model):
+        cascade = LocalClassifier(model.weights, model.bias, scam_threshold=0.9, safe_threshold=0.1)
+        transcript = SAFE[1] + ". read me the code we just sent and buy gift cards"
+        with patch("routers.analyze.local_classifier", cascade), \
+             patch.object(cascade, "predict_proba", return_value=0.02), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_text:
+            resp = client.post("/api/analyze/transcript", json={"transcript": transcript})
+        assert resp.json()["decision_source"] == "model"
+        mock_text.assert_awaited_once()
@@ -0,0 +1,91 @@
+"""Tests for priority classes and weighted fair queuing in services/admission.py."""
+
+import asyncio
+
+from services.admission import AdmissionController
+from services.priority import BULK, INTERACTIVE, LIVE, Priority, current_priority, set_priority
+
+
+def _controller(**kwargs):
+    defaults = dict(max_bytes=100, call_limits={"m": 1}, queue_size=32, queue_timeout_s=2.0)
+    defaults.update(kwargs)
+    return AdmissionController(**defaults)
+
+
+def _run_queue(ctl, waiters):
+    """Hold the only slot, queue `waiters` (name, Priority), then release; return admission order."""
+    order = []
+
+    async def job(name, priority):
+        async with ctl.admit("m", priority=priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def main():
+        async with ctl.admit("m", priority=Priority(LIVE)):
+            tasks = [asyncio.ensure_future(job(name, p)) for name, p in waiters]
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    return order
+
+
+class TestClasses:
+    def test_live_goes_first(self):
+        order = _run_queue(_controller(), [
+            ("bulk", Priority(BULK)), ("interactive", Priority(INTERACTIVE)), ("live", Priority(LIVE)),
+        ])
+        assert order == ["live", "interactive", "bulk"]
+
+    def test_bulk_share_keeps_headroom(self):
+        ctl = _controller(call_limits={"m": 4}, bulk_share=0.5)
+
+        async def main():
+            async with ctl.admit("m", priority=Priority(BULK)), ctl.admit("m", priority=Priority(BULK)):
+                third_bulk = asyncio.ensure_future(ctl._acquire("m", 0, Priority(BULK)))
+                await asyncio.sleep(0)
+                assert not third_bulk.done()
+                # Live work still gets the reserved slots at once
+                async with ctl.admit("m", priority=Priority(LIVE)):
+                    assert ctl.calls_in_flight["m"] == 3
+                third_bulk.cancel()
+                await asyncio.gather(third_bulk, return_exceptions=True)
+
+        asyncio.run(main())
+
+    def test_wait_is_reported_per_class(self):
+        ctl = _controller()
+        _run_queue(ctl, [("a", Priority(BULK)), ("b", Priority(LIVE))])
+        classes = ctl.stats()["classes"]
+        assert classes[BULK]["admitted"] == 1
+        assert classes[LIVE]["admitted"] == 2
+        assert classes[BULK]["queue_wait_p50_ms"] >= classes[LIVE]["queue_wait_p50_ms"]
+        assert classes[INTERACTIVE]["queue_wait_p50_ms"] is None
+
+
+class TestFairQueuing:
+    def test_tenants_interleave(self):
+        backfill = [(f"a{i}", Priority(BULK, "key-a")) for i in range(4)]
+        order = _run_queue(_controller(), backfill + [("b0", Priority(BULK, "key-b")), ("b1", Priority(BULK, "key-b"))])
+        assert order == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+    def test_weights(self):
+        heavy = [(f"h{i}", Priority(BULK, "heavy", weight=2.0)) for i in range(4)]
+        light = [(f"l{i}", Priority(BULK, "light")) for i in range(2)]
+        order = _run_queue(_controller(), light + heavy)
+        # Weight 2 advances the heavy key's tags half as fast: two of its calls per light one
+        assert order == ["h0", "l0", "h1", "h2", "l1", "h3"]
+
+
+class TestContext:
+    def test_tasks_inherit_priority(self):
+        async def main():
+            set_priority(LIVE, "key", 2.0)
+            return await asyncio.ensure_future(_read())
+
+        async def _read():
+            return current_priority()
+
+        assert asyncio.run(main()) == Priority(LIVE, "key", 2.0)
+        assert current_priority() == Priority()
@@ -0,0 +1,333 @@
+"""Tests for services/resilience.py (breakers, retries, hedging), services/deadline.py and their use by the endpoints."""
+
+import asyncio
+import json
+import struct
+from unittest.mock import patch, AsyncMock
+
+import httpx
+import pytest
+
+from services import upstream
+from services.deadline import DeadlineExceeded, deadline, remaining_s, set_deadline
+from services.local_classifier import local_classifier
+from services.admission import AdmissionRejected, admission
+from services.audio_analyzer import analyze_audio
+from services.priority import BULK, INTERACTIVE, LIVE, set_priority
+from services.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, Hedger, breakers, call_model, hedgers,
+)
+from services.stream_processor import StreamProcessor
+from services.text_analyzer import analyze_transcript
+
+TEXT_MODEL = "mistral-large-latest"
+AUDIO_MODEL = "voxtral-mini-latest"
+
+MODEL_JSON = json.dumps({
+    "scam_score": 0.2, "confidence": 0.9, "verdict": "SAFE", "signals": [],
+    "recommendation": "ok", "transcript_summary": "Friendly call.",
+})
+
+
+def _hanging_client():
+    async def handler(request):
+        await asyncio.sleep(30)
+        return httpx.Response(200, json={})
+
+    return upstream.create_client(transport=httpx.MockTransport(handler))
+
+
+class TestBreaker:
+    def _breaker(self, **kwargs):
+        defaults = dict(window=4, min_calls=4, failure_ratio=0.5, slow_call_s=1.0, open_s=30.0)
+        defaults.update(kwargs)
+        return CircuitBreaker("m", **defaults)
+
+    def test_opens_at_failure_ratio(self):
+        breaker = self._breaker()
+        for ok in (True, False, True):
+            breaker.record(ok, 0.1)
+        assert breaker.state == CLOSED  # under min_calls
+        breaker.record(False, 0.1)
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpen) as exc:
+            breaker.before_call()
+        assert 0 < exc.value.retry_after_s <= 30
+        assert breaker.stats()["fast_failures"] == 1
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = self._breaker()
+        for _ in range(4):
+            breaker.record(True, 2.0)
+        assert breaker.state == OPEN
+
+    def test_half_open_probe(self):
+        breaker = self._breaker(open_s=0.0)
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        breaker.before_call()  # the probe goes through
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpen):
+            breaker.before_call()  # others still fail fast
+        breaker.record(True, 0.1)
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = self._breaker(open_s=0.0)
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        breaker.before_call()
+        breaker.record(False, 0.1)
+        assert breaker.state == OPEN
+        assert breaker.trips == 2
+
+
+class TestRetries:
+    def test_server_error_is_retried(self, mock_upstream):
+        mock_upstream.reply(body={"message": "overloaded"}, status_code=503)
+        mock_upstream.reply(MODEL_JSON)
+        assert asyncio.run(analyze_transcript("hello")) == MODEL_JSON
+        assert len(mock_upstream.requests) == 2
+
+    def test_client_error_is_not_retried(self, mock_upstream):
+        mock_upstream.reply(body={"message": "bad request"}, status_code=400)
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(analyze_transcript("hello"))
+        assert len(mock_upstream.requests) == 1
+        assert breakers[TEXT_MODEL].stats()["recent_failures"] == 0
+
+    def test_retries_give_up(self, mock_upstream):
+        mock_upstream.reply(body={"message": "overloaded"}, status_code=503)
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(analyze_transcript("hello"))
+        assert len(mock_upstream.requests) == 3  # one call plus UPSTREAM_RETRIES
+
+    def test_no_retry_without_budget(self, mock_upstream):
+        mock_upstream.reply(body={"message": "overloaded"}, status_code=503)
+
+        async def run():
+            set_deadline(2.0)  # under UPSTREAM_RETRY_MIN_BUDGET_S
+            return await analyze_transcript("hello")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(run())
+        assert len(mock_upstream.requests) == 1
+
+    def test_stream_is_not_replayed_after_partial_output(self):
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            raise httpx.ConnectError("reset")
+
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(call_model(AUDIO_MODEL, flaky, can_retry=lambda: False))
+        assert len(attempts) == 1
+
+    def test_open_circuit_fails_fast(self, mock_upstream):
+        mock_upstream.reply(MODEL_JSON)
+        breakers[TEXT_MODEL]._open()
+        with pytest.raises(CircuitOpen):
+            asyncio.run(analyze_transcript("hello"))
+        assert mock_upstream.requests == []
+
+
+class TestDeadline:
+    def test_nested_deadline_only_tightens(self):
+        async def run():
+            set_deadline(1.0)
+            with deadline(60.0):
+                inner = remaining_s()
+            return inner, remaining_s()
+
+        inner, outer = asyncio.run(run())
+        assert inner <= 1.0 and outer <= 1.0
+        assert remaining_s() is None
+
+    def test_attempt_is_cut_at_the_deadline(self):
+        async def run():
+            set_deadline(0.05)
+            return await analyze_transcript("slow upstream")
+
+        with patch.object(upstream, "_client", _hanging_client()):
+            with pytest.raises(DeadlineExceeded):
+                asyncio.run(run())
+        # A short budget running out says nothing about the model's health
+        assert breakers[TEXT_MODEL].stats()["recent_failures"] == 0
+
+    def test_spent_budget_skips_the_call(self, mock_upstream):
+        mock_upstream.reply(MODEL_JSON)
+
+        async def run():
+            set_deadline(-1.0)
+            return await analyze_transcript("hello")
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run())
+        assert mock_upstream.requests == []
+
+
+class TestEndpoints:
+    def test_transcript_falls_back_to_local_classifier(self, client):
+        breakers[TEXT_MODEL]._open()
+        with patch.object(local_classifier, "decide", return_value=None):
+            resp = client.post("/api/analyze/transcript", json={"transcript": "Hi, is this a good time to talk?"})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["decision_source"] == "local_fallback"
+        assert "unavailable" in data["text_analysis"]["transcript_summary"]
+        assert data["review_required"] is True
+
+    def test_fallback_is_capped_at_suspicious(self, client):
+        breakers[TEXT_MODEL]._open()
+        with patch.object(local_classifier, "decide", return_value=None), \
+             patch.object(local_classifier, "predict_proba", return_value=0.97):
+            resp = client.post("/api/analyze/transcript", json={"transcript": "ok thanks bye"})
+        data = resp.json()
+        assert data["text_analysis"]["verdict"] == "SUSPICIOUS"
+        assert data["combined_score"] < 0.6
+
+    def test_fallback_is_not_safe_when_a_scam_rule_matched(self, client):
+        breakers[TEXT_MODEL]._open()
+        with patch.object(local_classifier, "decide", return_value=None), \
+             patch.object(local_classifier, "predict_proba", return_value=0.02):
+            resp = client.post("/api/analyze/transcript", json={"transcript": "see you sunday, and buy gift cards"})
+        assert resp.json()["text_analysis"]["verdict"] == "SUSPICIOUS"
+
+    def test_audio_with_open_circuit_is_503(self, client, make_valid_wav):
+        breakers[AUDIO_MODEL]._open()
+        audio = make_valid_wav([8000, -8000] * 4000)
+        resp = client.post("/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")})
+        assert resp.status_code == 503
+        assert resp.json()["detail"]["error"] == "upstream_unavailable"
+        assert int(resp.headers["Retry-After"]) >= 1
+
+    def test_deadline_is_504(self, client):
+        with patch.object(local_classifier, "decide", return_value=None), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, side_effect=DeadlineExceeded("late")):
+            resp = client.post("/api/analyze/transcript", json={"transcript": "Hi, is this a good time to talk?"})
+        assert resp.status_code == 504
+        assert resp.json()["detail"]["error"] == "deadline_exceeded"
+
+    def test_stream_chunk_with_open_circuit(self, mock_upstream):
+        mock_upstream.reply(MODEL_JSON)
+        breakers[AUDIO_MODEL]._open()
+        chunk = b"\x00" * 44 + struct.pack("<200h", *([20000, -20000] * 100))
+        with patch("services.stream_processor.FINGERPRINT_ENABLED", False):
+            result = asyncio.run(StreamProcessor().process_chunk(chunk))
+        assert result["decision_source"] == "upstream_unavailable"
+        assert result["signals"][0]["category"] == "UPSTREAM_UNAVAILABLE"
+        assert mock_upstream.requests == []
+
+    def test_health_reports_breakers(self, client):
+        data = client.get("/api/health").json()["upstream"]
+        assert set(data["breakers"]) == {AUDIO_MODEL, TEXT_MODEL}
+        assert data["breakers"][TEXT_MODEL]["state"] == CLOSED
+
+
+class TestHedging:
+    def _warm(self, model, seconds=0.01, samples=20):
+        hedger = hedgers[model]
+        for _ in range(samples):
+            hedger.record(seconds, hedged=False, hedge_won=False)
+        return hedger
+
+    def _slow_first(self, calls):
+        async def attempt():
+            calls.append(1)
+            if len(calls) == 1:
+                try:
+                    await asyncio.sleep(30)
+                except asyncio.CancelledError:
+                    calls.append("cancelled")
+                    raise
+            return "answer"
+
+        return attempt
+
+    def test_slow_call_is_hedged(self):
+        hedger = self._warm(TEXT_MODEL)
+        calls = []
+        with patch("services.resilience.HEDGE_ENABLED", True):
+            result = asyncio.run(call_model(TEXT_MODEL, self._slow_first(calls), hedge=True))
+        assert result == "answer"
+        assert calls == [1, 1, "cancelled"]  # the loser is cancelled
+        stats = hedger.stats()
+        assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+        assert stats["hedge_rate"] == round(1 / 21, 4)
+
+    def test_rate_cap(self):
+        hedger = self._warm(TEXT_MODEL)
+        hedger.max_rate = 0.0
+        calls = []
+
+        async def run():
+            return await asyncio.wait_for(call_model(TEXT_MODEL, self._slow_first(calls), hedge=True), 0.2)
+
+        with patch("services.resilience.HEDGE_ENABLED", True):
+            with pytest.raises(asyncio.TimeoutError):
+                asyncio.run(run())
+        assert calls == [1, "cancelled"]
+        assert hedger.hedged == 0
+
+    def test_no_hedge_without_samples(self):
+        assert hedgers[AUDIO_MODEL].delay_s() is None
+        assert Hedger(min_samples=2).delay_s() is None
+
+    def test_hedge_waits_for_a_free_slot(self):
+        self._warm(TEXT_MODEL)
+        calls = []
+
+        async def run():
+            return await asyncio.wait_for(call_model(TEXT_MODEL, self._slow_first(calls), hedge=True), 0.2)
+
+        with patch("services.resilience.HEDGE_ENABLED", True), \
+             patch.dict(admission.call_limits, {TEXT_MODEL: 1}):
+            with pytest.raises(asyncio.TimeoutError):
+                asyncio.run(run())
+        assert calls == [1, "cancelled"]
+
+    def test_live_chunks_hedge_uploads_do_not(self, mock_upstream):
+        mock_upstream.reply(MODEL_JSON)
+        with patch("services.audio_analyzer.call_model", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_call:
+            async def run(klass):
+                set_priority(klass)
+                await analyze_audio(b"RIFF")
+                return mock_call.call_args.kwargs["hedge"]
+
+            assert asyncio.run(run(LIVE)) is True
+            assert asyncio.run(run(BULK)) is False
+
+    def test_bulk_transcripts_are_not_hedged(self):
+        with patch("services.text_analyzer.call_model", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_call:
+            async def run(klass):
+                set_priority(klass)
+                await analyze_transcript("Hello?")
+                return mock_call.call_args.kwargs["hedge"]
+
+            assert asyncio.run(run(LIVE)) is True
+            assert asyncio.run(run(INTERACTIVE)) is True
+            assert asyncio.run(run(BULK)) is False
+
+    def test_health_reports_hedging(self, client):
+        data = client.get("/api/health").json()["upstream"]["hedging"]
+        assert data["enabled"] is False
+        assert set(data[TEXT_MODEL]) >= {"hedge_rate", "win_rate", "delay_ms"}
+
+
+class TestHalfOpenAdmission:
+    def test_rejected_probe_is_handed_back(self):
+        breaker = breakers[TEXT_MODEL]
+
+        async def ok():
+            return "answer"
+
+        with patch.object(breaker, "open_s", 0.0):
+            breaker._open()
+            with patch.dict(admission.call_limits, {TEXT_MODEL: 0}), patch.object(admission, "queue_size", 0):
+                with pytest.raises(AdmissionRejected):
+                    asyncio.run(call_model(TEXT_MODEL, ok))
+            assert breaker.state == HALF_OPEN
+            # The next call may still probe, and its success closes the circuit
+            assert asyncio.run(call_model(TEXT_MODEL, ok)) == "answer"
+        assert breaker.state == CLOSED
@@ -22,11 +22,6 @@ _config.THRESHOLD_SUSPICIOUS = 0.60
 _config.THRESHOLD_LIKELY_SCAM = 0.85
 sys.modules["config"] = _config
 
-# Stub mistralai so importing config doesn't blow up
-_mistralai = types.ModuleType("mistralai")
-_mistralai.Mistral = lambda **kw: None
-sys.modules["mistralai"] = _mistralai
-
 from services.response_formatter import (
     extract_json,
     score_to_verdict,
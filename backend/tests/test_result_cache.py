@@ -0,0 +1,216 @@
+"""Tests for services/result_cache.py and cache use in the analyze endpoints."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from unittest.mock import patch, AsyncMock
+
+from models.schemas import AnalysisResult
+from services import result_cache as result_cache_module
+from services.result_cache import (
+    ResultCache,
+    DirectoryTier,
+    normalize_transcript,
+    transcript_cache_key,
+    audio_cache_key,
+    result_cache,
+)
+
+
+def _result(score=0.8, verdict="LIKELY_SCAM"):
+    return AnalysisResult(scam_score=score, confidence=0.9, verdict=verdict, recommendation="Hang up.")
+
+
+class TestKeys:
+    def test_normalization_folds_case_and_whitespace(self):
+        assert normalize_transcript("  Press   1\nNOW ") == "press 1 now"
+        assert transcript_cache_key("Press 1 now") == transcript_cache_key("press  1\tnow")
+
+    def test_different_transcripts_differ(self):
+        assert transcript_cache_key("press 1") != transcript_cache_key("press 2")
+
+    def test_audio_key_is_exact_bytes(self):
+        assert audio_cache_key(b"RIFF1") == audio_cache_key(b"RIFF1")
+        assert audio_cache_key(b"RIFF1") != audio_cache_key(b"RIFF2")
+
+    def test_prompt_version_changes_key(self):
+        before = transcript_cache_key("hello")
+        with patch.object(result_cache_module, "TEXT_PROMPT_VERSION", "changed"):
+            assert transcript_cache_key("hello") != before
+
+    def test_model_changes_key(self):
+        before = transcript_cache_key("hello")
+        with patch.object(result_cache_module, "TEXT_MODEL", "other-model"):
+            assert transcript_cache_key("hello") != before
+
+
+class TestMemoryTier:
+    def test_round_trip_and_counters(self):
+        cache = ResultCache()
+        assert asyncio.run(cache.get("k")) is None
+        asyncio.run(cache.put("k", text_result=_result()))
+        audio, text = asyncio.run(cache.get("k"))
+        assert audio is None
+        assert text.scam_score == 0.8
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction_by_count(self):
+        cache = ResultCache(max_entries=2)
+        asyncio.run(cache.put("a", text_result=_result()))
+        asyncio.run(cache.put("b", text_result=_result()))
+        asyncio.run(cache.get("a"))  # a is now most recent
+        asyncio.run(cache.put("c", text_result=_result()))
+        assert asyncio.run(cache.get("b")) is None
+        assert asyncio.run(cache.get("a")) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_eviction_by_bytes(self):
+        probe = ResultCache()
+        asyncio.run(probe.put("x", text_result=_result()))
+        entry_size = probe.stats()["bytes"]
+
+        cache = ResultCache(max_bytes=entry_size * 2)
+        for key in ("a", "b", "c"):
+            asyncio.run(cache.put(key, text_result=_result()))
+        assert cache.stats()["entries"] == 2
+        assert cache.stats()["bytes"] <= entry_size * 2
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl=10)
+        with patch("services.result_cache.time.monotonic", return_value=1000.0):
+            asyncio.run(cache.put("k", text_result=_result()))
+        with patch("services.result_cache.time.monotonic", return_value=1011.0):
+            assert asyncio.run(cache.get("k")) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_disabled_cache_never_hits(self):
+        cache = ResultCache(enabled=False)
+        asyncio.run(cache.put("k", text_result=_result()))
+        assert asyncio.run(cache.get("k")) is None
+
+
+class TestSharedTier:
+    def test_shared_hit_across_instances(self, tmp_path):
+        worker_a = ResultCache(shared=DirectoryTier(str(tmp_path)))
+        worker_b = ResultCache(shared=DirectoryTier(str(tmp_path)))
+        asyncio.run(worker_a.put("audio:abc", audio_result=_result(0.9, "SCAM")))
+
+        audio, _ = asyncio.run(worker_b.get("audio:abc"))
+        assert audio.verdict.value == "SCAM"
+        assert worker_b.stats()["shared_hits"] == 1
+        # Promoted into worker B's memory tier
+        asyncio.run(worker_b.get("audio:abc"))
+        assert worker_b.stats()["hits"] == 1
+
+    def test_shared_entry_expires(self, tmp_path):
+        tier = DirectoryTier(str(tmp_path))
+        with patch("services.result_cache.time.time", return_value=1000.0):
+            tier.set("k", "value", ttl=5)
+        with patch("services.result_cache.time.time", return_value=1006.0):
+            assert tier.get("k") is None
+
+    def test_file_io_runs_off_the_event_loop(self, tmp_path):
+        threads = []
+
+        class RecordingTier(DirectoryTier):
+            def get(self, key):
+                threads.append(threading.get_ident())
+                return super().get(key)
+
+            def set(self, key, value, ttl):
+                threads.append(threading.get_ident())
+                super().set(key, value, ttl)
+
+        async def round_trip():
+            loop_thread = threading.get_ident()
+            cache = ResultCache(shared=RecordingTier(str(tmp_path)))
+            await cache.put("k", text_result=_result())
+            cache.clear()
+            assert await cache.get("k") is not None
+            return loop_thread
+
+        loop_thread = asyncio.run(round_trip())
+        assert len(threads) == 2
+        assert loop_thread not in threads
+
+    def test_prune_drops_expired_then_oldest(self, tmp_path):
+        tier = DirectoryTier(str(tmp_path), max_bytes=10 ** 6)
+        now = time.time()
+        for key, age in (("expired", 500), ("old", 50), ("mid", 20), ("new", 0)):
+            tier.set(key, "x" * 100, ttl=100)
+            os.utime(tier._file(key), (now - age, now - age))
+
+        assert tier.prune(ttl=100) == 1
+        assert tier.get("expired") is None
+        assert tier.get("old") is not None
+
+        tier.max_bytes = os.path.getsize(tier._file("mid")) + os.path.getsize(tier._file("new"))
+        assert tier.prune(ttl=100) == 1
+        assert tier.get("old") is None
+        assert tier.get("mid") is not None and tier.get("new") is not None
+        assert tier.evictions == 2
+
+    def test_writes_keep_the_directory_under_its_limit(self, tmp_path):
+        tier = DirectoryTier(str(tmp_path), max_bytes=4000)
+        for i in range(40):
+            tier.set(f"k{i}", "x" * 100, ttl=3600)
+        total = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(tmp_path) for name in names
+        )
+        # Pruning runs every max_bytes / PRUNE_FRACTION written bytes, so the
+        # overshoot is at most that much plus one entry
+        assert total <= 4000 + 4000 // DirectoryTier.PRUNE_FRACTION + 200
+        assert tier.evictions > 0
+
+
+ANALYSIS_JSON = json.dumps({
+    "scam_score": 0.4,
+    "confidence": 0.8,
+    "verdict": "SUSPICIOUS",
+    "signals": [],
+    "recommendation": "Be cautious.",
+    "transcript_summary": "Test call.",
+})
+
+
+class TestEndpointCaching:
+    def test_repeated_transcript_served_from_cache(self, client):
+        with patch("routers.analyze.analyze_text", new_callable=AsyncMock, return_value=ANALYSIS_JSON) as mock_text:
+            first = client.post("/api/analyze/transcript", json={"transcript": "Your car warranty expires"})
+            second = client.post("/api/analyze/transcript", json={"transcript": "your car  WARRANTY expires"})
+        assert mock_text.await_count == 1
+        assert first.json()["decision_source"] == "model"
+        assert second.json()["decision_source"] == "cache"
+        assert second.json()["text_analysis"] == first.json()["text_analysis"]
+        assert second.json()["id"] != first.json()["id"]
+
+    def test_repeated_audio_served_from_cache(self, client, make_valid_wav):
+        wav = make_valid_wav([1000, -1000] * 50)
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=ANALYSIS_JSON) as mock_audio:
+            first = client.post("/api/analyze/audio", files={"file": ("a.wav", wav, "audio/wav")})
+            second = client.post("/api/analyze/audio", files={"file": ("b.wav", wav, "audio/wav")})
+        assert mock_audio.await_count == 1
+        assert second.json()["decision_source"] == "cache"
+        assert second.json()["audio_analysis"] == first.json()["audio_analysis"]
+        assert second.json()["id"] != first.json()["id"]
+
+    def test_failed_second_opinion_not_cached(self, client, make_valid_wav):
+        high = ANALYSIS_JSON.replace("0.4", "0.8")
+        wav = make_valid_wav([2000, -2000] * 50)
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=high) as mock_audio, \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, side_effect=RuntimeError("down")):
+            client.post("/api/analyze/audio", files={"file": ("a.wav", wav, "audio/wav")})
+            client.post("/api/analyze/audio", files={"file": ("a.wav", wav, "audio/wav")})
+        assert mock_audio.await_count == 2
+
+    def test_health_reports_cache_counters(self, client):
+        asyncio.run(result_cache.get("missing"))
+        data = client.get("/api/health").json()
+        assert data["cache"]["misses"] >= 1
+        assert "hits" in data["cache"]
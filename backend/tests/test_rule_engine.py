@@ -0,0 +1,133 @@
+"""Tests for services/rule_engine.py and tier-0 decisions in the transcript endpoint."""
+
+import os
+import json
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from services.rule_engine import RuleEngine, DEFAULT_RULES_PATH, rule_engine
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "..", "..", "demo", "sample_calls")
+
+RULES = {
+    "scam": [
+        {"category": "UNUSUAL_PAYMENT", "severity": "high", "weight": 0.6,
+         "detail": "Gift cards", "phrases": ["gift cards", "gift card"]},
+        {"category": "ROBOCALL_IVR", "severity": "medium", "weight": 0.5,
+         "detail": "Press a key", "phrases": ["press 1", "press 1 now"]},
+    ],
+}
+
+PLEASANTRIES = "Hope you're doing well! Happy birthday, love you, talk soon."
+
+
+MODEL_JSON = json.dumps({
+    "scam_score": 0.75, "confidence": 0.9, "verdict": "LIKELY_SCAM", "signals": [],
+    "recommendation": "Hang up.", "transcript_summary": "Medicare robocall.",
+})
+
+
+def _sample(name):
+    with open(os.path.join(SAMPLES, f"{name}_transcript.txt")) as f:
+        return f.read()
+
+
+class TestMatching:
+    def test_noisy_or_over_distinct_rules(self):
+        engine = RuleEngine(RULES)
+        ev = engine.evaluate("Buy GIFT CARDS and then press 1 now")
+        assert ev.scam_score == pytest.approx(1 - 0.4 * 0.5)
+        assert ev.phrases == ["gift cards", "press 1 now"]
+
+    def test_repeated_phrases_of_one_rule_count_once(self):
+        engine = RuleEngine(RULES)
+        ev = engine.evaluate("gift card, gift cards, more gift cards")
+        assert ev.scam_score == pytest.approx(0.6)
+
+    def test_word_boundaries(self):
+        engine = RuleEngine(RULES)
+        assert engine.evaluate("press 10 for billing").scam_score == 0.0
+
+    def test_whitespace_and_case_are_normalized(self):
+        engine = RuleEngine(RULES)
+        assert engine.evaluate("Gift\n  Cards").scam_score == pytest.approx(0.6)
+
+
+class TestDecisions:
+    def test_conclusive_scam(self):
+        engine = RuleEngine(RULES, scam_threshold=0.75)
+        result = engine.decide("Pay with gift cards. Press 1 now.")
+        assert result.verdict.value == "LIKELY_SCAM"
+        assert {s.category for s in result.signals} == {"UNUSUAL_PAYMENT", "ROBOCALL_IVR"}
+
+    def test_pleasantries_alone_go_to_model(self):
+        engine = RuleEngine(RULES)
+        assert engine.decide(PLEASANTRIES) is None
+
+    def test_pleasantries_do_not_soften_scam_rules(self):
+        engine = RuleEngine(RULES, scam_threshold=0.75)
+        result = engine.decide(f"{PLEASANTRIES} Pay with gift cards. Press 1 now.")
+        assert result.verdict.value == "LIKELY_SCAM"
+        assert result.scam_score == pytest.approx(0.8)
+
+    def test_inconclusive_goes_to_model(self):
+        engine = RuleEngine(RULES)
+        assert engine.decide("Press 1 to hear more") is None
+
+    def test_threshold_controls_skip_rate(self):
+        strict = RuleEngine(RULES, scam_threshold=0.99)
+        loose = RuleEngine(RULES, scam_threshold=0.5)
+        for engine in (strict, loose):
+            engine.decide("press 1 now")
+            engine.decide("gift cards")
+        assert strict.stats()["skip_rate"] == 0.0
+        assert loose.stats()["skip_rate"] == 1.0
+
+    def test_disabled_engine_never_decides(self):
+        engine = RuleEngine(RULES, scam_threshold=0.1, enabled=False)
+        assert engine.decide("gift cards") is None
+
+
+class TestBundledRules:
+    def test_demo_transcripts(self):
+        engine = RuleEngine.from_file(DEFAULT_RULES_PATH)
+        assert engine.decide(_sample("irs_scam")).verdict.value == "SCAM"
+        assert engine.decide(_sample("safe_call")) is None
+        # A bare robocall is left for the model to grade
+        assert engine.decide(_sample("medicare_robocall")) is None
+
+
+class TestEndpoint:
+    def test_rule_decided_transcript_skips_model(self, client):
+        with patch("routers.analyze.analyze_text", new_callable=AsyncMock) as mock_text:
+            resp = client.post("/api/analyze/transcript", json={"transcript": _sample("irs_scam")})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["decision_source"] == "rules"
+        assert data["text_analysis"]["verdict"] == "SCAM"
+        mock_text.assert_not_called()
+
+    def test_scam_wrapped_in_pleasantries_reaches_model(self, client):
+        transcript = (
+            "Grandma, it's me, I'm in jail and I need bail money wired today. "
+            "Don't tell mom. " + PLEASANTRIES
+        )
+        assert rule_engine.decide(transcript) is None
+        with patch("routers.analyze.local_classifier", None), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_text:
+            resp = client.post("/api/analyze/transcript", json={"transcript": transcript})
+        assert resp.json()["decision_source"] == "model"
+        mock_text.assert_awaited_once()
+
+    def test_inconclusive_transcript_reaches_model(self, client):
+        with patch("routers.analyze.local_classifier", None), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_text:
+            resp = client.post("/api/analyze/transcript", json={"transcript": _sample("medicare_robocall")})
+        assert resp.json()["decision_source"] == "model"
+        mock_text.assert_awaited_once()
+
+    def test_health_reports_rule_stats(self, client):
+        rule_engine.decide("nothing to see here")
+        data = client.get("/api/health").json()
+        assert data["rules"]["evaluated"] >= 1
+        assert "skip_rate" in data["rules"]
@@ -17,10 +17,6 @@ _config.THRESHOLD_SUSPICIOUS = 0.60
 _config.THRESHOLD_LIKELY_SCAM = 0.85
 sys.modules.setdefault("config", _config)
 
-_mistralai = types.ModuleType("mistralai")
-_mistralai.Mistral = lambda **kw: None
-sys.modules.setdefault("mistralai", _mistralai)
-
 import pytest
 from pydantic import ValidationError
 from models.schemas import (
@@ -136,7 +132,7 @@ class TestTranscriptRequest:
 
     def test_transcript_request_max_length(self):
         with pytest.raises(ValidationError):
-            TranscriptRequest(transcript="a" * 10001)
+            TranscriptRequest(transcript="a" * 200001)
 
 
 # ── ErrorResponse ─────────────────────────────────────────────────────────────
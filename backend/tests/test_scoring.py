@@ -20,10 +20,6 @@ _config.THRESHOLD_SUSPICIOUS = 0.60
 _config.THRESHOLD_LIKELY_SCAM = 0.85
 sys.modules.setdefault("config", _config)
 
-_mistralai = types.ModuleType("mistralai")
-_mistralai.Mistral = lambda **kw: None
-sys.modules.setdefault("mistralai", _mistralai)
-
 from services.response_formatter import score_to_verdict, build_scam_report
 from models.schemas import AnalysisResult
 
@@ -0,0 +1,214 @@
+"""Tests for the speculative second opinion (services/second_opinion.py) and its use in /api/analyze/audio."""
+
+import asyncio
+import json
+import httpx
+from unittest.mock import patch, AsyncMock
+
+from services import upstream
+from services.second_opinion import SpeculativeSecondOpinion
+from services.upstream import stream_chat_completion
+
+
+AUDIO_JSON = json.dumps({
+    "scam_score": 0.82,
+    "confidence": 0.9,
+    "verdict": "LIKELY_SCAM",
+    "signals": [{"category": "URGENCY", "detail": "act now", "severity": "high"}],
+    "transcript_summary": "Caller claims to be the IRS and demands gift cards.",
+    "recommendation": "Hang up.",
+    "vocal_stress": 0.4,
+})
+
+TEXT_JSON = json.dumps({
+    "scam_score": 0.9,
+    "confidence": 0.9,
+    "verdict": "SCAM",
+    "signals": [],
+    "recommendation": "Hang up.",
+})
+
+
+def _prefix_through_summary(raw: str) -> str:
+    return raw[:raw.index('"recommendation"')]
+
+
+class TestSpeculationTrigger:
+    def test_starts_once_summary_closes(self):
+        async def run():
+            analyze_text = AsyncMock(return_value=TEXT_JSON)
+            spec = SpeculativeSecondOpinion(analyze_text, gate=0.5)
+            partial = _prefix_through_summary(AUDIO_JSON)
+            spec.feed(partial[:partial.index("demands")])
+            assert not spec.started
+            spec.feed(partial)
+            assert spec.started
+            result = await spec.result("Caller claims to be the IRS and demands gift cards.")
+            return analyze_text, result
+
+        analyze_text, result = asyncio.run(run())
+        assert result == TEXT_JSON
+        analyze_text.assert_awaited_once_with("Caller claims to be the IRS and demands gift cards.")
+
+    def test_not_started_below_gate(self):
+        async def run():
+            analyze_text = AsyncMock(return_value=TEXT_JSON)
+            spec = SpeculativeSecondOpinion(analyze_text, gate=0.9)
+            spec.feed(_prefix_through_summary(AUDIO_JSON))
+            return spec
+
+        assert not asyncio.run(run()).started
+
+    def test_decodes_escaped_summary(self):
+        async def run():
+            analyze_text = AsyncMock(return_value=TEXT_JSON)
+            spec = SpeculativeSecondOpinion(analyze_text, gate=0.5)
+            spec.feed('{"scam_score": 0.8, "transcript_summary": "Said \\"press 1\\" now", ')
+            await spec.result('Said "press 1" now')
+            return analyze_text
+
+        asyncio.run(run()).assert_awaited_once_with('Said "press 1" now')
+
+    def test_mismatched_summary_restarts(self):
+        async def run():
+            analyze_text = AsyncMock(return_value=TEXT_JSON)
+            spec = SpeculativeSecondOpinion(analyze_text, gate=0.5)
+            spec.feed('{"scam_score": 0.8, "transcript_summary": "first", ')
+            await spec.result("second")
+            return analyze_text
+
+        analyze_text = asyncio.run(run())
+        assert analyze_text.await_args.args == ("second",)
+
+    def test_cancel_stops_inflight_call(self):
+        events = []
+
+        async def slow_text(summary):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+
+        async def run():
+            spec = SpeculativeSecondOpinion(slow_text, gate=0.5)
+            spec.feed('{"transcript_summary": "maybe", ')
+            await asyncio.sleep(0)
+            spec.cancel()
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        assert events == ["cancelled"]
+
+    def test_record_saving_measures_overlap(self):
+        spec = SpeculativeSecondOpinion(AsyncMock(), gate=0.5)
+        spec.started_at = 100.0
+        spec.finished_at = 101.5
+        assert spec.record_saving(audio_done_at=101.0) == 1000.0
+
+
+class TestStreamChatCompletion:
+    def test_accumulates_sse_deltas(self):
+        deltas = ['{"scam_', 'score": 0.8', '}']
+        sse = "".join(
+            "data: " + json.dumps({"choices": [{"delta": {"content": d}}]}) + "\n\n" for d in deltas
+        ) + "data: [DONE]\n\n"
+        seen = []
+
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, text=sse, headers={"Content-Type": "text/event-stream"})
+
+        mock_client = upstream.create_client(transport=httpx.MockTransport(handler))
+        with patch.object(upstream, "_client", mock_client):
+            content = asyncio.run(stream_chat_completion({"model": "m"}, seen.append))
+        assert content == '{"scam_score": 0.8}'
+        assert seen == ['{"scam_', '{"scam_score": 0.8', '{"scam_score": 0.8}']
+
+
+def _streaming_audio(raw: str, tail_delay: float = 0.05, cut_at: str = '"recommendation"'):
+    """Fake analyze_audio that streams ``raw`` up to ``cut_at``, then finishes later."""
+    async def fake(audio_bytes, on_partial=None):
+        if on_partial:
+            on_partial(raw[:raw.index(cut_at)])
+        await asyncio.sleep(tail_delay)
+        return raw
+    return fake
+
+
+class TestSpeculativeEndpoint:
+    def test_second_opinion_overlaps_audio(self, client, make_valid_wav):
+        analyze_text = AsyncMock(return_value=TEXT_JSON)
+        with patch("routers.analyze.analyze_audio", _streaming_audio(AUDIO_JSON)), \
+             patch("routers.analyze.analyze_text", analyze_text):
+            resp = client.post("/api/analyze/audio", files={"file": ("t.wav", make_valid_wav(), "audio/wav")})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["text_analysis"]["verdict"] == "SCAM"
+        analyze_text.assert_awaited_once()
+        timing = data["timing"]
+        assert timing["speculative_saving_ms"] > 0
+        assert timing["speculative_saving_p50_ms"] is not None
+        assert timing["speculative_saving_p95_ms"] is not None
+
+    def test_low_score_cancels_speculation(self, client, make_valid_wav):
+        # Summary arrives before the score, so speculation starts; final score is low
+        raw = json.dumps({
+            "transcript_summary": "Friendly reminder about a dentist appointment.",
+            "scam_score": 0.1,
+            "confidence": 0.9,
+            "verdict": "SAFE",
+            "signals": [],
+            "recommendation": "No action needed.",
+        })
+        events = []
+
+        async def slow_text(summary):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+
+        with patch("routers.analyze.analyze_audio", _streaming_audio(raw, cut_at='"scam_score"')), \
+             patch("routers.analyze.analyze_text", slow_text):
+            resp = client.post("/api/analyze/audio", files={"file": ("t.wav", make_valid_wav(), "audio/wav")})
+        assert resp.status_code == 200
+        assert resp.json()["text_analysis"] is None
+        assert events == ["cancelled"]
+
+    def test_audio_deadline_cancels_speculation(self, client, make_valid_wav):
+        # DeadlineExceeded passes through _call_voxtral unmapped; speculation must still stop
+        from services.deadline import DeadlineExceeded
+        events = []
+
+        async def failing_audio(audio_bytes, on_partial=None):
+            on_partial(_prefix_through_summary(AUDIO_JSON))
+            await asyncio.sleep(0.05)
+            raise DeadlineExceeded("audio")
+
+        async def slow_text(summary):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+
+        # Keep one event loop across the request so a leaked task is still running afterwards
+        with client, patch("routers.analyze.analyze_audio", failing_audio), \
+             patch("routers.analyze.analyze_text", slow_text):
+            resp = client.post("/api/analyze/audio", files={"file": ("t.wav", make_valid_wav(), "audio/wav")})
+            assert resp.status_code == 504
+            assert events == ["cancelled"]
+
+    def test_sequential_when_disabled(self, client, make_valid_wav):
+        analyze_text = AsyncMock(return_value=TEXT_JSON)
+        with patch("routers.analyze.SPECULATIVE_SECOND_OPINION", False), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=AUDIO_JSON) as mock_audio, \
+             patch("routers.analyze.analyze_text", analyze_text):
+            resp = client.post("/api/analyze/audio", files={"file": ("t.wav", make_valid_wav(), "audio/wav")})
+        assert resp.status_code == 200
+        assert mock_audio.await_args.kwargs["on_partial"] is None
+        timing = resp.json()["timing"]
+        assert timing["text_ms"] is not None
+        assert timing["speculative_saving_ms"] is None
@@ -0,0 +1,160 @@
+"""Tests for services/segmenter.py, reduce_results and segmented scoring of long uploads."""
+
+import asyncio
+import itertools
+import json
+from unittest.mock import patch, AsyncMock
+
+import numpy as np
+import pytest
+
+from models.schemas import AnalysisResult, Signal
+from services.response_formatter import peak_weighted_score, reduce_results, update_cumulative
+from services.segmenter import split_wav
+from services.wav import build_wav, parse_wav
+
+RATE = 16000
+
+
+def _speech(seconds, seed=0):
+    return np.random.default_rng(seed).standard_normal(int(RATE * seconds)) * 3000
+
+
+def _wav(*parts):
+    return build_wav(np.concatenate(parts).astype("<i2").tobytes(), 1, RATE, 16)
+
+
+def _model_json(score, category=None, severity="low", summary="Call."):
+    signals = [{"category": category, "detail": "x", "severity": severity}] if category else []
+    return json.dumps({
+        "scam_score": score, "confidence": 0.8, "verdict": "SAFE", "signals": signals,
+        "recommendation": f"rec {score}", "transcript_summary": summary,
+    })
+
+
+class TestSplit:
+    def test_short_audio_is_one_segment(self):
+        audio = _wav(_speech(2))
+        segments = split_wav(audio, window_s=3)
+        assert len(segments) == 1
+        assert segments[0].audio_bytes is audio
+
+    def test_cuts_land_in_pauses(self):
+        # Pauses at 4.5 s and 8.2 s, inside the search span before each 5 s window end
+        audio = _wav(_speech(4.5), np.zeros(3200), _speech(3.5, 1), np.zeros(3200), _speech(3, 2))
+        segments = split_wav(audio, window_s=5, overlap_s=1, search_s=1)
+        assert len(segments) == 3
+        assert 4.5 <= segments[0].end_s <= 4.7
+        assert 8.2 <= segments[1].end_s <= 8.4
+        for previous, segment in zip(segments, segments[1:]):
+            assert segment.start_s == pytest.approx(previous.end_s - 1, abs=0.03)
+        assert segments[-1].end_s == pytest.approx(parse_wav(audio).duration_s)
+
+    def test_segments_cover_the_audio_and_keep_format(self):
+        audio = _wav(_speech(7.3, seed=3))
+        segments = split_wav(audio, window_s=2, overlap_s=0.5, search_s=0.5)
+        assert segments[0].start_s == 0.0
+        assert segments[-1].end_s == pytest.approx(7.3)
+        for segment in segments:
+            info = parse_wav(segment.audio_bytes)
+            assert (info.channels, info.sample_rate, info.bits_per_sample) == (1, RATE, 16)
+            assert info.duration_s == pytest.approx(segment.end_s - segment.start_s, abs=0.001)
+            assert info.duration_s <= 2.0 + 1e-9
+
+
+def _result(score, signals=(), summary=None):
+    return AnalysisResult(
+        scam_score=score, confidence=0.5, verdict="SAFE", signals=list(signals),
+        recommendation=f"rec {score}", transcript_summary=summary,
+    )
+
+
+class TestReduce:
+    def test_matches_stream_formula(self):
+        scores = [0.1, 0.9, 0.3]
+        cumulative = 0.0
+        for s in scores:
+            cumulative = update_cumulative(cumulative, s)
+        reduced = reduce_results([_result(s) for s in scores])
+        assert reduced.scam_score == peak_weighted_score(0.9, cumulative)
+        assert reduced.recommendation == "rec 0.9"
+
+    def test_signals_keep_most_severe_per_category(self):
+        low = Signal(category="URGENCY", detail="a", severity="low")
+        high = Signal(category="URGENCY", detail="b", severity="high")
+        other = Signal(category="AUTHORITY", detail="c", severity="medium")
+        reduced = reduce_results([_result(0.5, [low, other], "First."), _result(0.6, [high], "Second.")])
+        assert {(s.category, s.detail) for s in reduced.signals} == {("URGENCY", "b"), ("AUTHORITY", "c")}
+        assert reduced.transcript_summary == "First. Second."
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            reduce_results([])
+
+
+class TestSegmentedUpload:
+    def _post(self, client, audio):
+        return client.post("/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")})
+
+    def test_long_upload_is_scored_in_segments(self, client):
+        audio = _wav(_speech(7, seed=11))
+        responses = itertools.cycle([_model_json(0.2), _model_json(0.9, "URGENCY", "high"), _model_json(0.4)])
+        with patch("routers.analyze.SEGMENT_THRESHOLD_S", 3.0), \
+             patch("routers.analyze.SEGMENT_WINDOW_S", 2.0), \
+             patch("routers.analyze.SEGMENT_OVERLAP_S", 0.5), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, side_effect=Exception("skip")), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock,
+                   side_effect=lambda *a, **kw: next(responses)) as mock_audio:
+            resp = self._post(client, audio)
+        assert resp.status_code == 200
+        data = resp.json()
+        segments = data["timing"]["segments"]
+        assert mock_audio.await_count == len(segments) >= 4
+        assert [s["index"] for s in segments] == list(range(len(segments)))
+        assert segments[-1]["end_s"] == pytest.approx(7.0)
+        assert data["audio_analysis"]["scam_score"] == reduce_results(
+            [_result(s["scam_score"]) for s in segments]
+        ).scam_score
+        assert data["audio_analysis"]["signals"][0]["category"] == "URGENCY"
+
+    def test_fan_out_is_bounded(self, client):
+        audio = _wav(_speech(9, seed=12))
+        active = peak = 0
+
+        async def fake(*args, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return _model_json(0.1)
+
+        with patch("routers.analyze.SEGMENT_THRESHOLD_S", 3.0), \
+             patch("routers.analyze.SEGMENT_WINDOW_S", 1.0), \
+             patch("routers.analyze.SEGMENT_MAX_PARALLEL", 2), \
+             patch("routers.analyze.analyze_audio", side_effect=fake):
+            resp = self._post(client, audio)
+        assert resp.status_code == 200
+        assert len(resp.json()["timing"]["segments"]) > 4
+        assert peak == 2
+
+    def test_segment_failure_fails_the_request(self, client):
+        audio = _wav(_speech(7, seed=13))
+
+        async def fake(*args, **kwargs):
+            raise RuntimeError("upstream down")
+
+        with patch("routers.analyze.SEGMENT_THRESHOLD_S", 3.0), \
+             patch("routers.analyze.SEGMENT_WINDOW_S", 2.0), \
+             patch("routers.analyze.analyze_audio", side_effect=fake):
+            resp = self._post(client, audio)
+        assert resp.status_code == 502
+        assert resp.json()["detail"]["error"] == "model_error"
+
+    def test_short_upload_is_one_call(self, client):
+        audio = _wav(_speech(2, seed=14))
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock,
+                   return_value=_model_json(0.2)) as mock_audio:
+            resp = self._post(client, audio)
+        assert mock_audio.await_count == 1
+        assert resp.json()["timing"]["segments"] is None
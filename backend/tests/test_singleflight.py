@@ -0,0 +1,172 @@
+"""Tests for services/singleflight.py and request coalescing in the analyze endpoints."""
+
+import asyncio
+import json
+import httpx
+from unittest.mock import patch, MagicMock
+
+from main import app
+from services.singleflight import SingleFlight
+from services.stream_processor import StreamProcessor
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "done"
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+        assert asyncio.run(run()) == ["done"] * 5
+        assert calls == 1
+        assert flights.stats() == {"upstream_calls": 1, "coalesced": 4, "in_flight": 0}
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flights = SingleFlight()
+
+        async def work():
+            return 1
+
+        async def run():
+            await flights.do("k", work)
+            await flights.do("k", work)
+
+        asyncio.run(run())
+        assert flights.stats()["upstream_calls"] == 2
+        assert flights.stats()["coalesced"] == 0
+
+    def test_error_reaches_every_waiter(self):
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", work) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flights.stats()["in_flight"] == 0
+
+    def test_one_cancelled_waiter_does_not_cancel_the_call(self):
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            leaver = asyncio.ensure_future(flights.do("k", work))
+            stayer = asyncio.ensure_future(flights.do("k", work))
+            await asyncio.sleep(0.01)
+            leaver.cancel()
+            return await stayer
+
+        assert asyncio.run(run()) == "done"
+
+    def test_call_cancelled_when_every_waiter_leaves(self):
+        flights = SingleFlight()
+
+        async def run():
+            stopped = asyncio.Event()
+
+            async def work():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    stopped.set()
+                    raise
+
+            waiter = asyncio.ensure_future(flights.do("k", work))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.wait_for(stopped.wait(), timeout=1)
+
+        asyncio.run(run())
+        assert flights.stats()["in_flight"] == 0
+
+
+ANALYSIS_JSON = json.dumps({
+    "scam_score": 0.3,
+    "confidence": 0.8,
+    "verdict": "SAFE",
+    "signals": [],
+    "recommendation": "Looks fine.",
+    "transcript_summary": "Test call.",
+})
+
+
+def _slow(calls):
+    async def fake(*args, **kwargs):
+        calls.append(args)
+        await asyncio.sleep(0.05)
+        return ANALYSIS_JSON
+    return fake
+
+
+async def _post_concurrently(n, **request):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        return await asyncio.gather(*(ac.post(**request) for _ in range(n)))
+
+
+class TestEndpointCoalescing:
+    def test_identical_transcripts_share_one_upstream_call(self):
+        calls = []
+        with patch("routers.analyze.analyze_text", _slow(calls)):
+            responses = asyncio.run(_post_concurrently(
+                4, url="/api/analyze/transcript", json={"transcript": "Press 1 to renew your warranty"},
+            ))
+        assert [r.status_code for r in responses] == [200] * 4
+        assert len(calls) == 1
+        assert len({r.json()["id"] for r in responses}) == 4
+        assert all(r.json()["text_analysis"]["scam_score"] == 0.3 for r in responses)
+
+    def test_identical_uploads_share_one_voxtral_call(self, make_valid_wav):
+        calls = []
+        wav = make_valid_wav([1500, -1500] * 50)
+        with patch("routers.analyze.analyze_audio", _slow(calls)):
+            responses = asyncio.run(_post_concurrently(
+                3, url="/api/analyze/audio", files={"file": ("a.wav", wav, "audio/wav")},
+            ))
+        assert [r.status_code for r in responses] == [200] * 3
+        assert len(calls) == 1
+        assert len({r.json()["id"] for r in responses}) == 3
+
+    def test_upstream_audio_is_recorded_once(self, make_valid_wav):
+        usage = MagicMock()
+        wav = make_valid_wav([1500, -1500] * 50)
+        with patch("routers.analyze.analyze_audio", _slow([])), \
+             patch("routers.analyze.audio_usage", usage):
+            asyncio.run(_post_concurrently(
+                3, url="/api/analyze/audio", files={"file": ("a.wav", wav, "audio/wav")},
+            ))
+        sources = sorted(c.args[1] for c in usage.record.call_args_list if c.args[1] != "vad")
+        assert sources == ["coalesced", "coalesced", "model"]
+
+    def test_stream_chunks_record_upstream_audio_once(self, make_valid_wav):
+        calls, usage = [], MagicMock()
+        wav = make_valid_wav([1500, -1500] * 50)
+
+        async def run():
+            return await asyncio.gather(*(StreamProcessor().process_chunk(wav) for _ in range(2)))
+
+        with patch("services.stream_processor.analyze_audio", _slow(calls)), \
+             patch("services.stream_processor.FINGERPRINT_ENABLED", False), \
+             patch("services.stream_processor.audio_usage", usage):
+            results = asyncio.run(run())
+        assert len(calls) == 1
+        assert [r["decision_source"] for r in results] == ["model", "model"]
+        assert sorted(c.args[1] for c in usage.record.call_args_list) == ["coalesced", "model"]
+
+    def test_health_reports_coalescing(self, client):
+        data = client.get("/api/health").json()
+        assert set(data["coalescing"]) == {"upstream_calls", "coalesced", "in_flight"}
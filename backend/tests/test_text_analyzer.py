@@ -1,11 +1,12 @@
-"""Tests for services/text_analyzer.py with mocked Mistral client."""
+"""Tests for services/text_analyzer.py against a mocked upstream transport."""
 
 import sys
 import os
 import types
 import asyncio
+import httpx
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -18,79 +19,83 @@ _config.MAX_TRANSCRIPT_LENGTH = 10000
 _config.THRESHOLD_SAFE = 0.30
 _config.THRESHOLD_SUSPICIOUS = 0.60
 _config.THRESHOLD_LIKELY_SCAM = 0.85
-_config.client = MagicMock()
 sys.modules.setdefault("config", _config)
 
-_mistralai = types.ModuleType("mistralai")
-_mistralai.Mistral = lambda **kw: None
-sys.modules.setdefault("mistralai", _mistralai)
-
+from services import upstream
 from services.text_analyzer import analyze_transcript
 from prompts.templates import SCAM_TEXT_PROMPT
 
 
-def _make_mock_response(content):
-    """Create a mock Mistral API response."""
-    mock_choice = MagicMock()
-    mock_choice.message.content = content
-    mock_response = MagicMock()
-    mock_response.choices = [mock_choice]
-    return mock_response
-
-
 class TestAnalyzeTranscript:
-    def test_prompt_includes_transcript(self):
+    def test_prompt_includes_transcript(self, mock_upstream):
         transcript = "Hello, this is a test."
-        mock_client = MagicMock()
-        mock_client.chat.complete.return_value = _make_mock_response('{"ok": true}')
-
-        with patch("services.text_analyzer.client", mock_client):
-            asyncio.run(analyze_transcript(transcript))
-
-        call_kwargs = mock_client.chat.complete.call_args
-        messages = call_kwargs.kwargs.get("messages") or call_kwargs[1].get("messages")
-        if messages is None:
-            # functools.partial passes as keyword args
-            messages = call_kwargs[0][0] if call_kwargs[0] else None
-        content = messages[0]["content"]
+        mock_upstream.reply('{"ok": true}')
+        asyncio.run(analyze_transcript(transcript))
+
+        content = mock_upstream.payloads()[0]["messages"][0]["content"]
         assert SCAM_TEXT_PROMPT in content
         assert transcript in content
 
-    def test_model_selection(self):
-        mock_client = MagicMock()
-        mock_client.chat.complete.return_value = _make_mock_response('{"ok": true}')
-
-        with patch("services.text_analyzer.client", mock_client):
-            asyncio.run(analyze_transcript("test"))
-
-        call_kwargs = mock_client.chat.complete.call_args
-        model = call_kwargs.kwargs.get("model") or call_kwargs[1].get("model")
-        assert model == "mistral-large-latest"
-
-    def test_response_format(self):
-        mock_client = MagicMock()
-        mock_client.chat.complete.return_value = _make_mock_response('{"ok": true}')
+    def test_model_selection(self, mock_upstream):
+        mock_upstream.reply('{"ok": true}')
+        asyncio.run(analyze_transcript("test"))
+        assert mock_upstream.payloads()[0]["model"] == "mistral-large-latest"
 
-        with patch("services.text_analyzer.client", mock_client):
-            asyncio.run(analyze_transcript("test"))
+    def test_response_format(self, mock_upstream):
+        mock_upstream.reply('{"ok": true}')
+        asyncio.run(analyze_transcript("test"))
+        assert mock_upstream.payloads()[0]["response_format"] == {"type": "json_object"}
 
-        call_kwargs = mock_client.chat.complete.call_args
-        fmt = call_kwargs.kwargs.get("response_format") or call_kwargs[1].get("response_format")
-        assert fmt == {"type": "json_object"}
+    def test_uses_shared_upstream_client(self, mock_upstream):
+        mock_upstream.reply('{"ok": true}')
+        asyncio.run(analyze_transcript("test"))
+        request = mock_upstream.requests[0]
+        assert str(request.url) == "https://api.mistral.ai/v1/chat/completions"
+        assert request.headers["Authorization"] == "Bearer test-key"
 
-    def test_successful_response(self):
+    def test_successful_response(self, mock_upstream):
         expected = '{"scam_score": 0.5, "verdict": "SUSPICIOUS"}'
-        mock_client = MagicMock()
-        mock_client.chat.complete.return_value = _make_mock_response(expected)
-
-        with patch("services.text_analyzer.client", mock_client):
-            result = asyncio.run(analyze_transcript("test transcript"))
+        mock_upstream.reply(expected)
+        result = asyncio.run(analyze_transcript("test transcript"))
         assert result == expected
 
-    def test_client_error_propagates(self):
-        mock_client = MagicMock()
-        mock_client.chat.complete.side_effect = RuntimeError("Connection failed")
+    def test_client_error_propagates(self, mock_upstream):
+        mock_upstream.reply(body={"message": "Connection failed"}, status_code=503)
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(analyze_transcript("test"))
+
 
-        with patch("services.text_analyzer.client", mock_client):
-            with pytest.raises(RuntimeError, match="Connection failed"):
-                asyncio.run(analyze_transcript("test"))
+class TestCancellation:
+    def _hanging_client(self, events):
+        async def handler(request):
+            events.append("started")
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+            return httpx.Response(200, json={})
+
+        return upstream.create_client(transport=httpx.MockTransport(handler))
+
+    def test_timeout_cancels_inflight_request(self):
+        events = []
+        with patch.object(upstream, "_client", self._hanging_client(events)), \
+             patch("services.text_analyzer.UPSTREAM_TIMEOUT_S", 0.05):
+            with pytest.raises(asyncio.TimeoutError):
+                asyncio.run(analyze_transcript("slow upstream"))
+        assert events == ["started", "cancelled"]
+
+    def test_caller_cancellation_propagates(self):
+        events = []
+
+        async def run():
+            task = asyncio.create_task(analyze_transcript("abandoned"))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with patch.object(upstream, "_client", self._hanging_client(events)):
+            asyncio.run(run())
+        assert events == ["started", "cancelled"]
@@ -0,0 +1,115 @@
+"""Tests for services/transcript_chunker.py and chunked analysis of long transcripts."""
+
+import asyncio
+import json
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from services.transcript_chunker import split_transcript
+
+
+def _model_json(score, category=None, severity="low"):
+    signals = [{"category": category, "detail": "x", "severity": severity}] if category else []
+    return json.dumps({
+        "scam_score": score, "confidence": 0.8, "verdict": "SAFE", "signals": signals,
+        "recommendation": f"rec {score}", "transcript_summary": "Call.",
+    })
+
+
+def _dialogue(turns):
+    speakers = ("Agent", "Caller")
+    return "\n".join(
+        f"{speakers[i % 2]}: This is sentence one of turn {i}. And here is sentence two of turn {i}."
+        for i in range(turns)
+    )
+
+
+class TestSplit:
+    def test_short_text_is_one_chunk(self):
+        assert split_transcript("Hello there.", 100) == ["Hello there."]
+
+    def test_chunks_end_at_speaker_turns(self):
+        text = _dialogue(60)
+        chunks = split_transcript(text, 1000, overlap_chars=200)
+        assert len(chunks) > 4
+        for chunk in chunks:
+            assert len(chunk) <= 1000
+            assert chunk.startswith(("Agent:", "Caller:"))
+            assert chunk.endswith(".")
+        assert text.startswith(chunks[0])
+        assert text.endswith(chunks[-1])
+
+    def test_consecutive_chunks_overlap(self):
+        chunks = split_transcript(_dialogue(60), 1000, overlap_chars=200)
+        for previous, chunk in zip(chunks, chunks[1:]):
+            first_turn = chunk.split("\n", 1)[0]
+            assert first_turn in previous
+
+    def test_sentences_without_turns(self):
+        text = " ".join(f"Sentence number {i} is here." for i in range(200))
+        chunks = split_transcript(text, 500, overlap_chars=100)
+        assert all(len(c) <= 500 and c.endswith(".") and c.startswith("Sentence") for c in chunks)
+
+    def test_unbroken_text_is_hard_cut(self):
+        chunks = split_transcript("a" * 2500, 1000, overlap_chars=0)
+        assert [len(c) for c in chunks] == [1000, 1000, 500]
+
+
+@pytest.fixture
+def model_only():
+    """Keep the local tiers out of the way so every transcript reaches the model."""
+    with patch("routers.analyze.rule_engine.decide", return_value=None), \
+         patch("routers.analyze.local_classifier", None):
+        yield
+
+
+class TestChunkedTranscript:
+    def _post(self, client, transcript):
+        return client.post("/api/analyze/transcript", json={"transcript": transcript})
+
+    def test_long_transcript_is_scored_in_chunks(self, client, model_only):
+        transcript = _dialogue(400)
+        responses = iter([_model_json(0.2), _model_json(0.95, "URGENCY", "high")] + [_model_json(0.1)] * 50)
+        with patch("routers.analyze.analyze_text", new_callable=AsyncMock,
+                   side_effect=lambda *a, **kw: next(responses)) as mock_text:
+            resp = self._post(client, transcript)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert mock_text.await_count == len(split_transcript(transcript, 10000, 500)) > 1
+        assert all(len(call.args[0]) <= 10000 for call in mock_text.call_args_list)
+        assert data["text_analysis"]["signals"][0]["category"] == "URGENCY"
+        assert data["combined_score"] > 0.57  # 0.6 * peak alone
+
+        with patch("routers.analyze.analyze_text", new_callable=AsyncMock) as mock_text:
+            assert self._post(client, transcript).json()["decision_source"] == "cache"
+        mock_text.assert_not_called()
+
+    def test_fan_out_is_bounded(self, client, model_only):
+        active = peak = 0
+
+        async def fake(chunk):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return _model_json(0.1)
+
+        with patch("routers.analyze.TRANSCRIPT_MAX_PARALLEL", 2), \
+             patch("routers.analyze.analyze_text", side_effect=fake):
+            resp = self._post(client, _dialogue(401))
+        assert resp.status_code == 200
+        assert peak == 2
+
+    def test_chunk_failure_fails_the_request(self, client, model_only):
+        with patch("routers.analyze.analyze_text", new_callable=AsyncMock, side_effect=RuntimeError("down")):
+            resp = self._post(client, _dialogue(402))
+        assert resp.status_code == 502
+        assert resp.json()["detail"]["error"] == "model_error"
+
+    def test_short_transcript_is_one_call(self, client, model_only):
+        with patch("routers.analyze.analyze_text", new_callable=AsyncMock,
+                   return_value=_model_json(0.2)) as mock_text:
+            self._post(client, _dialogue(5))
+        assert mock_text.await_count == 1
@@ -0,0 +1,89 @@
+"""Tests for upload_limit.py and the bounded-memory upload path of /api/analyze/audio."""
+
+import asyncio
+import json
+import mmap
+from unittest.mock import patch, AsyncMock
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+import routers.analyze as analyze_router
+from services.wav import build_wav
+from upload_limit import UploadLimitMiddleware
+
+MODEL_JSON = json.dumps({
+    "scam_score": 0.2, "confidence": 0.9, "verdict": "SAFE", "signals": [],
+    "recommendation": "ok", "transcript_summary": "Friendly call.",
+})
+
+
+def _noise_wav(seconds, seed):
+    samples = np.random.default_rng(seed).standard_normal(int(16000 * seconds)) * 3000
+    return build_wav(samples.astype("<i2").tobytes(), 1, 16000, 16)
+
+
+def _post(client, audio):
+    return client.post("/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")})
+
+
+class TestMiddleware:
+    def test_declared_length_over_limit_is_refused_unread(self, client):
+        with patch("upload_limit.MAX_AUDIO_SIZE_MB", 0.01), \
+             patch("routers.analyze._map_upload") as mock_map:
+            resp = _post(client, _noise_wav(5, seed=40))
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["error"] == "file_too_large"
+        mock_map.assert_not_called()
+
+    def test_undeclared_body_is_counted(self):
+        """A chunked body without Content-Length is cut off once it passes the limit."""
+        messages = [{"type": "http.request", "body": b"x" * 50_000, "more_body": True}] * 3
+
+        async def receive():
+            return messages.pop(0)
+
+        async def app(scope, receive, send):
+            while (await receive()).get("more_body"):
+                pass
+
+        scope = {"type": "http", "method": "POST", "path": "/api/analyze/audio", "headers": []}
+        with patch("upload_limit.MAX_AUDIO_SIZE_MB", 0.01):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(UploadLimitMiddleware(app)(scope, receive, None))
+        assert exc.value.detail["error"] == "file_too_large"
+
+    def test_other_paths_pass_through(self, client):
+        with patch("upload_limit.MAX_AUDIO_SIZE_MB", 0.0), \
+             patch("routers.analyze.analyze_text", new_callable=AsyncMock, return_value=MODEL_JSON):
+            resp = client.post("/api/analyze/transcript", json={"transcript": "x" * 70_000})
+        assert resp.status_code == 200
+
+
+class TestUploadMapping:
+    def test_large_upload_is_memory_mapped(self, client):
+        audio = _noise_wav(40, seed=41)  # 1.28 MB: spooled to disk
+        assert len(audio) > analyze_router.MMAP_MIN_BYTES
+        with patch("routers.analyze._map_upload", wraps=analyze_router._map_upload) as mock_map, \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_audio:
+            resp = _post(client, audio)
+        assert resp.status_code == 200
+        mock_map.assert_called_once()
+        sent = mock_audio.call_args.args[0]
+        # Already 16 kHz mono speech: the mapped upload itself goes upstream
+        assert isinstance(sent, mmap.mmap)
+        assert sent[:] == audio
+
+    def test_small_upload_is_read(self, client):
+        audio = _noise_wav(1, seed=42)
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_audio:
+            _post(client, audio)
+        assert isinstance(mock_audio.call_args.args[0], bytes)
+
+    def test_bad_header_is_rejected_from_the_probe(self, client):
+        with patch("routers.analyze._map_upload") as mock_map:
+            resp = _post(client, b"NOT A RIFF FILE " * 100_000)
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["error"] == "invalid_file_type"
+        mock_map.assert_not_called()
@@ -0,0 +1,135 @@
+"""Tests for services/upstream.py against a local stand-in Mistral server."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from unittest.mock import patch
+
+from services import upstream
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Minimal chat completions endpoint that records the peer of each request."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        self.server.seen.append((self.client_address, self.headers.get("Authorization"), payload))
+        time.sleep(self.server.delay)
+        body = json.dumps({
+            "choices": [{"message": {"content": json.dumps({"model": payload["model"]})}}]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.seen = []
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    with patch.object(upstream, "MISTRAL_API_BASE_URL", base_url), \
+         patch.object(upstream, "_client", None):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+async def _with_client(coro_fn):
+    await upstream.startup()
+    try:
+        return await coro_fn()
+    finally:
+        await upstream.shutdown()
+
+
+class TestSharedClient:
+    def test_chat_completion_round_trip(self, stand_in_server):
+        content = asyncio.run(_with_client(
+            lambda: upstream.chat_completion({"model": "voxtral-mini-latest", "messages": []})
+        ))
+        assert json.loads(content) == {"model": "voxtral-mini-latest"}
+        _, auth, payload = stand_in_server.seen[0]
+        assert auth == "Bearer test-key"
+        assert payload["model"] == "voxtral-mini-latest"
+
+    def test_sequential_calls_reuse_connection(self, stand_in_server):
+        async def run():
+            for _ in range(3):
+                await upstream.chat_completion({"model": "m", "messages": []})
+
+        asyncio.run(_with_client(run))
+        peers = {peer for peer, _, _ in stand_in_server.seen}
+        assert len(stand_in_server.seen) == 3
+        assert len(peers) == 1
+
+    def test_concurrent_calls_not_serialised(self, stand_in_server):
+        stand_in_server.delay = 0.2
+
+        async def run():
+            await asyncio.gather(*[
+                upstream.chat_completion({"model": "m", "messages": []}) for _ in range(20)
+            ])
+
+        started = time.monotonic()
+        asyncio.run(_with_client(run))
+        elapsed = time.monotonic() - started
+        assert len(stand_in_server.seen) == 20
+        # Sequential would take >= 4s; the pool fans out across connections
+        assert elapsed < 2.0
+
+    def test_pool_limit_caps_connections(self, stand_in_server):
+        stand_in_server.delay = 0.05
+
+        async def run():
+            await asyncio.gather(*[
+                upstream.chat_completion({"model": "m", "messages": []}) for _ in range(12)
+            ])
+
+        with patch.object(upstream, "UPSTREAM_MAX_CONNECTIONS", 2):
+            asyncio.run(_with_client(run))
+        peers = {peer for peer, _, _ in stand_in_server.seen}
+        assert len(stand_in_server.seen) == 12
+        assert len(peers) <= 2
+
+    def test_shutdown_closes_client(self, stand_in_server):
+        async def run():
+            await upstream.startup()
+            client = upstream.get_client()
+            await upstream.shutdown()
+            return client
+
+        client = asyncio.run(run())
+        assert client.is_closed
+        assert upstream._client is None
+
+
+class TestHttp2Option:
+    def test_http2_falls_back_without_h2(self):
+        with patch.object(upstream, "UPSTREAM_HTTP2", True), \
+             patch.object(upstream, "_http2_available", return_value=False), \
+             patch("httpx.AsyncClient") as mock_client_cls:
+            upstream.create_client()
+        assert mock_client_cls.call_args.kwargs["http2"] is False
+
+    def test_http2_enabled_when_available(self):
+        with patch.object(upstream, "UPSTREAM_HTTP2", True), \
+             patch.object(upstream, "_http2_available", return_value=True), \
+             patch("httpx.AsyncClient") as mock_client_cls:
+            upstream.create_client()
+        assert mock_client_cls.call_args.kwargs["http2"] is True
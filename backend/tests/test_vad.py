@@ -0,0 +1,112 @@
+"""Tests for services/vad.py and non-speech trimming on uploads and stream chunks."""
+
+import asyncio
+import json
+from unittest.mock import patch, AsyncMock
+
+import numpy as np
+import pytest
+
+from services.stream_processor import StreamProcessor
+from services.vad import keep_mask, speech_frames, trim_silence
+from services.wav import WAVE_FLOAT, build_wav, parse_wav
+
+RATE = 16000
+MODEL_JSON = json.dumps({
+    "scam_score": 0.2, "confidence": 0.9, "verdict": "SAFE", "signals": [],
+    "recommendation": "ok", "transcript_summary": "Friendly call.",
+})
+
+
+def _speech(seconds, seed=0):
+    return np.random.default_rng(seed).standard_normal(int(RATE * seconds)) * 3000
+
+
+def _silence(seconds):
+    return np.zeros(int(RATE * seconds))
+
+
+def _wav(*parts):
+    return build_wav(np.concatenate(parts).astype("<i2").tobytes(), 1, RATE, 16)
+
+
+class TestFrames:
+    def test_energy(self):
+        samples = np.concatenate([_silence(0.03), _speech(0.03)])
+        assert speech_frames(samples, 480, 500).tolist() == [False, True]
+
+    def test_quiet_unvoiced_frame_counts_with_zcr(self):
+        hiss = np.tile([400.0, -400.0], 240)  # RMS 400, one crossing per sample
+        assert speech_frames(hiss, 480, 500).tolist() == [True]
+        assert speech_frames(hiss, 480, 500, zcr_threshold=None).tolist() == [False]
+
+    def test_keep_mask_pads_around_speech(self):
+        speech = np.array([0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 1], dtype=bool)
+        keep = keep_mask(speech, min_silence_frames=3, padding_frames=1)
+        # leading run keeps 1 frame before speech; middle run keeps 1 on each side;
+        # the single-frame pause is shorter than min_silence and stays
+        assert keep.astype(int).tolist() == [0, 0, 0, 1, 1, 1, 0, 0, 0, 1, 1, 1, 1]
+
+
+class TestTrim:
+    def test_long_silences_are_cut(self):
+        audio = _wav(_silence(2), _speech(1), _silence(2), _speech(1, seed=1), _silence(0.2), _speech(1, seed=2))
+        result = trim_silence(audio, min_silence_ms=500, padding_ms=150)
+        assert result.original_s == pytest.approx(7.2)
+        assert result.segments_removed == 2
+        # 3 s of speech, the 0.2 s pause, and 0.15 s padding on three edges
+        assert result.kept_s == pytest.approx(3.65, abs=0.05)
+        assert parse_wav(result.audio_bytes).duration_s == pytest.approx(result.kept_s)
+
+    def test_nothing_to_cut_returns_original_bytes(self):
+        audio = _wav(_speech(1), _silence(0.2), _speech(1, seed=1))
+        result = trim_silence(audio)
+        assert result.audio_bytes is audio
+        assert result.removed_s == 0.0
+
+    def test_no_speech(self):
+        result = trim_silence(_wav(_silence(1)))
+        assert result.kept_s == 0.0
+
+    def test_float_format_is_preserved(self):
+        samples = np.concatenate([_silence(1), _speech(1)]) / 32768.0
+        audio = build_wav(samples.astype("<f4").tobytes(), 1, RATE, 32, WAVE_FLOAT)
+        result = trim_silence(audio)
+        info = parse_wav(result.audio_bytes)
+        assert info.format_tag == WAVE_FLOAT
+        assert result.kept_s == pytest.approx(1.15, abs=0.05)
+
+    def test_unreadable(self):
+        assert trim_silence(b"not a wav") is None
+
+
+class TestUploadTrim:
+    def test_report_records_removed_audio(self, client):
+        audio = _wav(_silence(3), _speech(1))
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")})
+        data = resp.json()
+        assert data["audio_duration_s"] == pytest.approx(4.0)
+        assert data["audio_removed_s"] == pytest.approx(2.85, abs=0.05)
+        sent = mock_audio.call_args.args[0]
+        assert len(sent) < len(audio) / 3
+
+    def test_disabled(self, client):
+        audio = _wav(_silence(3), _speech(1, seed=5))
+        with patch("routers.analyze.VAD_ENABLED", False), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("a.wav", audio, "audio/wav")})
+        assert resp.json()["audio_removed_s"] == 0.0
+        assert mock_audio.call_args.args[0] == audio
+
+
+class TestStreamTrim:
+    def test_chunk_is_trimmed_before_upstream(self):
+        sp = StreamProcessor()
+        chunk = _wav(_speech(1, seed=7), _silence(2))
+        with patch("services.stream_processor.analyze_audio", new_callable=AsyncMock,
+                   return_value=MODEL_JSON) as mock_audio:
+            partial = sp.apply(sp.next_index(), asyncio.run(sp.analyze_chunk(chunk)))
+        assert partial["audio_removed_ms"] == pytest.approx(1850, abs=50)
+        assert len(mock_audio.call_args.args[0]) < len(chunk) / 2
+        assert sp.get_final_result()["audio_removed_s"] == pytest.approx(1.85, abs=0.05)
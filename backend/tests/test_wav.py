@@ -0,0 +1,128 @@
+"""Tests for services/wav.py, services/audio_usage.py and WAV validation on uploads."""
+
+import json
+import struct
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from services.audio_usage import AudioUsage
+from services.wav import WavFormatError, WavParser, parse_wav, pcm_samples
+
+MODEL_JSON = json.dumps({
+    "scam_score": 0.2, "confidence": 0.9, "verdict": "SAFE", "signals": [],
+    "recommendation": "ok", "transcript_summary": "Friendly call.",
+})
+
+
+def _riff(payload=b"\x00\x00" * 1600, fmt_tag=1, channels=1, rate=16000, bits=16,
+          extra_chunk=b"", data_size=None, extensible_tag=None):
+    block = channels * bits // 8
+    fmt = struct.pack("<HHIIHH", fmt_tag, channels, rate, rate * block, block, bits)
+    if extensible_tag is not None:
+        fmt += struct.pack("<HHIH", 22, bits, 0, extensible_tag) + b"\x00" * 14
+    size = len(payload) if data_size is None else data_size
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + extra_chunk
+    body += b"data" + struct.pack("<I", size) + payload
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class TestParseWav:
+    def test_basic_fields(self):
+        info = parse_wav(_riff(rate=8000, channels=2, payload=b"\x00" * 8000 * 4))
+        assert (info.sample_rate, info.channels, info.bits_per_sample) == (8000, 2, 16)
+        assert info.duration_s == pytest.approx(1.0)
+        assert info.chunk_ids == ("fmt ", "data")
+
+    def test_list_chunk_is_skipped(self):
+        extra = b"LIST" + struct.pack("<I", 5) + b"INFOx" + b"\x00"  # odd size is padded
+        audio = _riff(extra_chunk=extra)
+        info = parse_wav(audio)
+        assert info.chunk_ids == ("fmt ", "LIST", "data")
+        assert bytes(info.pcm(audio)) == b"\x00\x00" * 1600
+
+    def test_pcm_view_is_zero_copy(self):
+        audio = bytearray(_riff())
+        view = parse_wav(audio).pcm(audio)
+        audio[-1] = 7
+        assert view[-1] == 7
+
+    def test_extensible_format(self):
+        info = parse_wav(_riff(fmt_tag=0xFFFE, bits=32, extensible_tag=3, payload=b"\x00" * 64))
+        assert info.format_tag == 3
+
+    def test_unknown_data_size_reads_to_end(self):
+        info = parse_wav(_riff(payload=b"\x00" * 320, data_size=0xFFFFFFFF))
+        assert info.data_size == 320
+
+    @pytest.mark.parametrize("audio", [
+        b"",
+        b"\x00" * 100,
+        b"RIFF\x00\x00\x00\x00WAVE",
+        b"RIFF\x00\x00\x00\x00WAVEdata\x04\x00\x00\x00\x00\x00\x00\x00",
+        _riff(channels=0),
+        _riff(rate=0),
+    ])
+    def test_malformed(self, audio):
+        with pytest.raises(WavFormatError):
+            parse_wav(audio)
+
+
+class TestWavParser:
+    def test_incremental_header(self):
+        audio = _riff(payload=b"\x01\x00" * 800)
+        parser = WavParser()
+        assert parser.feed(audio[:20]) is None
+        info = parser.feed(audio[20:50])
+        assert info is not None and info.data_offset == 44
+        parser.feed(audio[50:])
+        assert parser.finish().data_size == 1600
+
+    def test_rejects_early(self):
+        parser = WavParser()
+        with pytest.raises(WavFormatError):
+            parser.feed(b"ID3\x04" + b"\x00" * 20)
+
+    def test_truncated_upload_is_clamped(self):
+        audio = _riff(payload=b"\x00" * 1000)
+        parser = WavParser()
+        parser.feed(audio[:-400])
+        assert parser.finish().data_size == 600
+
+    def test_headerless_chunk_falls_back_to_44_bytes(self):
+        assert len(pcm_samples(b"\x00" * 44 + b"\x01\x00" * 10)) == 10
+
+
+class TestAudioUsage:
+    def test_only_model_seconds_are_billed(self):
+        usage = AudioUsage(cost_per_minute=0.6)
+        usage.record(30.0, "model")
+        usage.record(60.0, "cache")
+        stats = usage.stats()
+        assert stats["audio_seconds"] == 90.0
+        assert stats["upstream_audio_seconds"] == 30.0
+        assert stats["estimated_cost_usd"] == pytest.approx(0.3)
+
+
+class TestUploadValidation:
+    def test_report_carries_duration(self, client):
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock, return_value=MODEL_JSON):
+            resp = client.post("/api/analyze/audio", files={"file": ("a.wav", _riff(), "audio/wav")})
+        assert resp.status_code == 200
+        assert resp.json()["audio_duration_s"] == pytest.approx(0.1)
+        assert client.get("/api/health").json()["audio_usage"]["upstream_audio_seconds"] >= 0.1
+
+    def test_too_long(self, client):
+        with patch("routers.analyze.MAX_AUDIO_DURATION_S", 0.05), \
+             patch("routers.analyze.analyze_audio", new_callable=AsyncMock) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("a.wav", _riff(), "audio/wav")})
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["error"] == "audio_too_long"
+        mock_audio.assert_not_called()
+
+    def test_malformed_header_is_rejected_before_upstream(self, client):
+        with patch("routers.analyze.analyze_audio", new_callable=AsyncMock) as mock_audio:
+            resp = client.post("/api/analyze/audio", files={"file": ("a.wav", _riff(channels=0), "audio/wav")})
+        assert resp.status_code == 400
+        assert resp.json()["detail"]["error"] == "invalid_file_type"
+        mock_audio.assert_not_called()
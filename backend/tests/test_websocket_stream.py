@@ -40,8 +40,11 @@ class TestWebSocketStream:
         with client.websocket_connect("/ws/stream") as ws:
             ws.receive_json()  # connected
             ws.send_bytes(silent_wav)
+            ack = ws.receive_json()
+            assert ack == {"type": "chunk_received", "chunk_index": 1}
             data = ws.receive_json()
             assert data["type"] == "partial_result"
+            assert data["chunk_index"] == 1
             assert data["verdict"] == "SAFE"
             assert data["scam_score"] == 0.0
             # Clean exit
@@ -59,7 +62,8 @@ class TestWebSocketStream:
 
     def test_ws_process_chunk_error(self, client):
         mock_processor = MagicMock()
-        mock_processor.process_chunk = AsyncMock(
+        mock_processor.next_index.return_value = 1
+        mock_processor.analyze_chunk = AsyncMock(
             side_effect=RuntimeError("API error")
         )
         mock_processor.get_final_result.return_value = {
@@ -77,6 +81,7 @@ class TestWebSocketStream:
             with client.websocket_connect("/ws/stream") as ws:
                 ws.receive_json()  # connected
                 ws.send_bytes(b"\x00" * 100)
+                assert ws.receive_json()["type"] == "chunk_received"
                 data = ws.receive_json()
                 assert data["type"] == "error"
                 assert "API error" in data["detail"]
@@ -85,6 +90,29 @@ class TestWebSocketStream:
                 final = ws.receive_json()
                 assert final["type"] == "final_result"
 
+    def test_ws_malformed_model_reply_is_a_chunk_error(self, client, make_valid_wav):
+        bad = '{"scam_score": null, "confidence": 0.9, "verdict": "SAFE", "signals": [], "recommendation": "ok"}'
+        replies = iter([bad, _chunk_json(0.2)])
+
+        async def fake_analyze(audio_bytes, on_partial=None):
+            return next(replies)
+
+        with patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+            with client.websocket_connect("/ws/stream") as ws:
+                ws.receive_json()  # connected
+                for i in range(2):
+                    ws.send_bytes(make_valid_wav([2000 + i, -2000] * 50))
+                ws.send_json({"type": "end_stream"})
+                messages = []
+                while not messages or messages[-1]["type"] != "final_result":
+                    messages.append(ws.receive_json())
+
+        errors = [m for m in messages if m["type"] == "error"]
+        partials = [m for m in messages if m["type"] == "partial_result"]
+        assert [e["chunk_index"] for e in errors] == [1]
+        assert [p["chunk_index"] for p in partials] == [2]
+        assert messages[-1]["total_chunks"] == 2
+
     def test_ws_timeout(self, client):
         """When no data arrives within timeout, server sends error and closes."""
         original_wait_for = asyncio.wait_for
@@ -106,3 +134,104 @@ class TestWebSocketStream:
                 data = ws.receive_json()
                 assert data["type"] == "error"
                 assert "timeout" in data["detail"].lower()
+
+
+def _chunk_json(score):
+    return (
+        f'{{"scam_score": {score}, "confidence": 0.9, "verdict": "SAFE", "signals": [], '
+        f'"recommendation": "ok", "transcript_summary": "chunk {score}"}}'
+    )
+
+
+class TestStreamPipeline:
+    def test_acks_are_immediate_and_results_stay_in_order(self, client, make_valid_wav):
+        slow = make_valid_wav([3000, -3000] * 50)
+        fast = make_valid_wav([4000, -4000] * 50)
+        finished = []
+
+        async def fake_analyze(audio_bytes, on_partial=None):
+            if audio_bytes == slow:
+                await asyncio.sleep(0.3)
+                finished.append("slow")
+                return _chunk_json(0.9)
+            finished.append("fast")
+            return _chunk_json(0.1)
+
+        with patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+            with client.websocket_connect("/ws/stream") as ws:
+                ws.receive_json()  # connected
+                ws.send_bytes(slow)
+                ws.send_bytes(fast)
+                first, second = ws.receive_json(), ws.receive_json()
+                assert [first["type"], second["type"]] == ["chunk_received", "chunk_received"]
+                assert [first["chunk_index"], second["chunk_index"]] == [1, 2]
+                results = [ws.receive_json(), ws.receive_json()]
+                ws.send_json({"type": "end_stream"})
+                final = ws.receive_json()
+
+        assert finished == ["fast", "slow"]
+        assert [r["chunk_index"] for r in results] == [1, 2]
+        assert [r["scam_score"] for r in results] == [0.9, 0.1]
+        # Session state was folded in chunk order: 0.7 * 0.1 + 0.3 * (0.7 * 0.9)
+        assert results[1]["cumulative_score"] == pytest.approx(0.259)
+        assert final["type"] == "final_result"
+        assert final["total_chunks"] == 2
+
+    def test_in_flight_limit(self, client, make_valid_wav):
+        active = 0
+        peak = 0
+
+        async def fake_analyze(audio_bytes, on_partial=None):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+            return _chunk_json(0.2)
+
+        chunks = [make_valid_wav([1000 + 100 * i, -1000] * 50) for i in range(5)]
+        with patch("routers.stream.STREAM_MAX_IN_FLIGHT", 2), \
+             patch("routers.stream.STREAM_BACKPRESSURE_POLICY", "block"), \
+             patch("services.stream_processor.analyze_audio", side_effect=fake_analyze):
+            with client.websocket_connect("/ws/stream") as ws:
+                ws.receive_json()  # connected
+                for chunk in chunks:
+                    ws.send_bytes(chunk)
+                ws.send_json({"type": "end_stream"})
+                messages = [ws.receive_json() for _ in range(2 * len(chunks) + 1)]
+
+        partials = [m for m in messages if m["type"] == "partial_result"]
+        assert [p["chunk_index"] for p in partials] == [1, 2, 3, 4, 5]
+        assert messages[-1]["type"] == "final_result"
+        assert peak == 2
+
+    def test_disconnect_cancels_running_analyses(self, client, make_valid_wav):
+        running = 0
+        both_started = asyncio.Event()
+        events = []
+
+        async def slow_analyze(audio_bytes, on_partial=None):
+            nonlocal running
+            running += 1
+            if running == 2:
+                both_started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+
+        # One event loop for the whole test, so a leaked analysis would still be sleeping.
+        # The deliverer awaits chunk 1; chunk 2 is only reachable through the session.
+        with client, patch("routers.stream.STREAM_MAX_IN_FLIGHT", 2), \
+             patch("services.stream_processor.analyze_audio", side_effect=slow_analyze):
+            with client.websocket_connect("/ws/stream") as ws:
+                ws.receive_json()  # connected
+                for i in range(2):
+                    ws.send_bytes(make_valid_wav([3000 + i, -3000] * 50))
+                    ws.receive_json()  # chunk_received
+                client.portal.call(both_started.wait)
+                ws.close()
+                # The server closes its side only after its cleanup has finished
+                assert ws.receive()["type"] == "websocket.close"
+            assert events == ["cancelled", "cancelled"]
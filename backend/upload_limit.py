@@ -0,0 +1,66 @@
+"""Request-body size limit for audio uploads, enforced before the body is parsed.
+
+FastAPI parses multipart bodies before the endpoint runs, so a size check
+in the endpoint only happens once the whole upload has been spooled. This
+ASGI middleware rejects an upload whose Content-Length is over the limit
+without reading it. It also counts body bytes as they arrive, which
+catches chunked uploads and clients that send more than they declared.
+"""
+
+import json
+
+from fastapi import HTTPException
+
+from config import MAX_AUDIO_SIZE_MB
+
+LIMITED_PATHS = ("/api/analyze/audio",)
+# Multipart boundaries, part headers and small form fields around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def upload_limit_bytes() -> int:
+    return int(MAX_AUDIO_SIZE_MB * 1024 * 1024) + MULTIPART_OVERHEAD_BYTES
+
+
+def _too_large_detail() -> dict:
+    return {"error": "file_too_large", "detail": f"File exceeds {MAX_AUDIO_SIZE_MB:g}MB limit."}
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or scope.get("path") not in LIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limit = upload_limit_bytes()
+        declared = dict(scope.get("headers") or []).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            body = json.dumps({"detail": _too_large_detail()}).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"connection", b"close"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPException from body parsing as is
+                    raise HTTPException(status_code=400, detail=_too_large_detail())
+            return message
+
+        await self.app(scope, counting_receive, send)
@@ -28,7 +28,7 @@ export default function App() {
       .catch(() => {});
   }, []);
   const { isAnalyzing, report, error, submitAudio, submitTranscript, clearResults } = useAnalyze();
-  const { isRecording, isProcessingFinal, partialResults, finalResult, error: streamError, audioLevel, startRecording, stopRecording, clearStream } = useStream();
+  const { isRecording, isProcessingFinal, partialResults, finalResult, earlyVerdict, error: streamError, audioLevel, startRecording, stopRecording, clearStream } = useStream();
 
   const hasAnyResults = report !== null || finalResult !== null || partialResults.length > 0;
 
@@ -154,6 +154,21 @@ export default function App() {
           <ScoreTrendChart chunks={partialResults} isRecording={isRecording} />
         )}
 
+        {/* Early verdict — the call is settled but recording continues */}
+        {isRecording && earlyVerdict && (
+          <div className="bg-red-950 border border-red-700 rounded-lg p-4">
+            <p className="text-red-300 text-sm font-semibold">
+              Early verdict: {earlyVerdict.verdict?.replace("_", " ")} ({Math.round((earlyVerdict.combined_score ?? 0) * 100)}%)
+            </p>
+            {earlyVerdict.early_verdict && (
+              <p className="text-xs text-red-400 mt-1">{earlyVerdict.early_verdict.reason}. Still recording.</p>
+            )}
+            {earlyVerdict.recommendation && (
+              <p className="text-sm text-gray-200 mt-2">{earlyVerdict.recommendation}</p>
+            )}
+          </div>
+        )}
+
         {/* Acoustic Context — live panel during recording */}
         {isRecording && partialResults.length > 0 && (() => {
           const latest = partialResults[partialResults.length - 1];
@@ -1,6 +1,9 @@
 import { useState, useRef } from "react";
 import type { DragEvent } from "react";
 
+// Matches the server's MAX_AUDIO_SIZE_MB with segmentation enabled
+const MAX_FILE_MB = 64;
+
 interface Props {
   onFileSelect: (file: File) => void;
   disabled?: boolean;
@@ -18,8 +21,8 @@ export default function AudioUploader({ onFileSelect, disabled }: Props) {
       return;
     }
 
-    if (file.size > 25 * 1024 * 1024) {
-      setError("File exceeds 25MB limit");
+    if (file.size > MAX_FILE_MB * 1024 * 1024) {
+      setError(`File exceeds ${MAX_FILE_MB}MB limit`);
       return;
     }
 
@@ -70,7 +73,7 @@ export default function AudioUploader({ onFileSelect, disabled }: Props) {
           <p className="text-gray-300 text-lg mb-2">
             Drop a WAV file here or click to browse
           </p>
-          <p className="text-gray-500 text-sm">Max 25MB, WAV format only</p>
+          <p className="text-gray-500 text-sm">Max {MAX_FILE_MB}MB, WAV format only</p>
         </>
       )}
       {error && <p className="text-red-400 text-sm mt-2">{error}</p>}
@@ -7,7 +7,7 @@ import ScenarioGallery from "./ScenarioGallery";
 type Tab = "upload" | "record" | "paste";
 
 interface ChunkData {
-  scam_score?: number;
+  scam_score?: number | null;
   confidence?: number;
   [key: string]: unknown;
 }
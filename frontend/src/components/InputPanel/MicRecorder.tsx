@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from "react";
 
 interface ChunkData {
-  scam_score?: number;
+  scam_score?: number | null;
   confidence?: number;
   [key: string]: unknown;
 }
@@ -133,12 +133,13 @@ export default function MicRecorder({ isRecording, onStart, onStop, cumulativeSc
             </span>
           )}
           {(() => {
-            const trend = chunks.length >= 2
-              ? (chunks[chunks.length - 1].scam_score ?? 0) - (chunks[chunks.length - 2].scam_score ?? 0)
+            const scored = chunks.filter((c) => c.scam_score != null);
+            const trend = scored.length >= 2
+              ? (scored[scored.length - 1].scam_score ?? 0) - (scored[scored.length - 2].scam_score ?? 0)
               : 0;
             const trendLabel = trend > 0.05 ? "\u2191 Rising" : trend < -0.05 ? "\u2193 Falling" : "\u2192 Stable";
             const trendColor = trend > 0.05 ? "text-red-400" : trend < -0.05 ? "text-green-400" : "text-gray-400";
-            return chunks.length >= 2 ? (
+            return scored.length >= 2 ? (
               <span className={`text-sm ${trendColor}`}>{trendLabel}</span>
             ) : null;
           })()}
@@ -1,5 +1,8 @@
 import { useState } from "react";
 
+// Matches the server's MAX_TRANSCRIPT_TOTAL_LENGTH; longer transcripts are scored in windows
+const MAX_CHARS = 200000;
+
 interface Props {
   onTranscriptSubmit: (text: string) => void;
   disabled?: boolean;
@@ -28,7 +31,7 @@ export default function TranscriptPaster({ onTranscriptSubmit, disabled, prefill
   const [text, setText] = useState(prefillText || "");
 
   const charCount = text.length;
-  const isOverLimit = charCount > 10000;
+  const isOverLimit = charCount > MAX_CHARS;
 
   return (
     <div className="space-y-3">
@@ -42,7 +45,7 @@ export default function TranscriptPaster({ onTranscriptSubmit, disabled, prefill
       />
       <div className="flex justify-between items-center">
         <span className={`text-xs ${isOverLimit ? "text-red-400" : "text-gray-500"}`}>
-          {charCount} / 10,000 characters
+          {charCount.toLocaleString()} / {MAX_CHARS.toLocaleString()} characters
         </span>
         <div className="flex gap-2">
           <button
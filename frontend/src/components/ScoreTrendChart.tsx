@@ -1,8 +1,10 @@
 interface PartialResult {
   chunk_index?: number;
-  scam_score?: number;
+  scam_score?: number | null;
   cumulative_score?: number;
   verdict?: string;
+  decision_source?: string;
+  analyzed?: boolean;
 }
 
 interface Props {
@@ -58,8 +60,10 @@ export default function ScoreTrendChart({ chunks, isRecording }: Props) {
         {/* Bars */}
         <div className="absolute inset-0 flex items-end gap-0.5 pr-6">
           {visible.map((chunk, i) => {
+            // Chunks the model never heard get a placeholder, not a zero-score bar
+            const analyzed = chunk.analyzed !== false && chunk.scam_score != null;
             const score = chunk.scam_score ?? 0;
-            const heightPct = Math.max(2, Math.round(score * 100));
+            const heightPct = analyzed ? Math.max(2, Math.round(score * 100)) : 100;
             const isLast = i === visible.length - 1;
             return (
               <div
@@ -73,9 +77,13 @@ export default function ScoreTrendChart({ chunks, isRecording }: Props) {
                   </span>
                 )}
                 <div
-                  className={`w-full rounded-sm transition-all duration-300 ${getBarColor(score)}`}
+                  className={`w-full rounded-sm transition-all duration-300 ${
+                    analyzed ? getBarColor(score) : "border border-dashed border-gray-600 bg-transparent"
+                  }`}
                   style={{ height: `${heightPct}%` }}
-                  title={`Chunk #${chunk.chunk_index ?? i}: ${Math.round(score * 100)}%`}
+                  title={analyzed
+                    ? `Chunk #${chunk.chunk_index ?? i}: ${Math.round(score * 100)}%`
+                    : `Chunk #${chunk.chunk_index ?? i}: not analyzed (${chunk.decision_source ?? "skipped"})`}
                 />
                 {/* Chunk index label below bar */}
                 <span className="text-[8px] text-gray-600 font-mono mt-0.5 leading-none">
@@ -88,7 +96,7 @@ export default function ScoreTrendChart({ chunks, isRecording }: Props) {
       </div>
 
       <p className="text-[10px] text-gray-600 mt-1 italic">
-        Each bar = one 5s audio chunk · height = scam score
+        Each bar = one 5s audio chunk · height = scam score · dashed = not analyzed
       </p>
     </div>
   );
@@ -3,7 +3,7 @@ import type { Signal } from "../types/scamReport";
 interface PartialResult {
   type: string;
   chunk_index?: number;
-  scam_score?: number;
+  scam_score?: number | null;
   cumulative_score?: number;
   verdict?: string;
   signals?: Signal[];
@@ -12,6 +12,8 @@ interface PartialResult {
   timestamp_ms?: number;
   score_delta?: number;
   new_signals?: Signal[];
+  decision_source?: string;
+  analyzed?: boolean;
 }
 
 interface Props {
@@ -58,8 +60,11 @@ seconds)...</p>
                 </span>
               </div>
               <div className="flex gap-4 text-sm mb-2 items-center">
-                <span className="text-gray-300">Score: <b>{Math.round((r.scam_score ?? 0) *
-  100)}%</b></span>
+                {r.analyzed === false || r.scam_score == null ? (
+                  <span className="text-gray-500 italic">Not analyzed</span>
+                ) : (
+                  <span className="text-gray-300">Score: <b>{Math.round(r.scam_score * 100)}%</b></span>
+                )}
                 <span className="text-gray-300">Cumulative: <b>{Math.round((r.cumulative_score ?? 0)
   * 100)}%</b></span>
                 {r.score_delta !== undefined && Math.abs(r.score_delta) > 0.05 && (
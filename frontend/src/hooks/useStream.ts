@@ -5,7 +5,8 @@ import type { Signal } from "../types/scamReport";
 interface PartialResult {
   type: string;
   chunk_index?: number;
-  scam_score?: number;
+  // null when the chunk was not sent to the model (see `analyzed`)
+  scam_score?: number | null;
   cumulative_score?: number;
   confidence?: number;
   verdict?: string;
@@ -19,6 +20,8 @@ interface PartialResult {
   vocal_stress?: number;
   background_noise?: number;
   synthetic_voice_probability?: number;
+  decision_source?: string;
+  analyzed?: boolean;
   [key: string]: unknown;
 }
 
@@ -76,6 +79,13 @@ export function useStream() {
     review_required?: boolean;
     review_reason?: string;
   } | null>(null);
+  // Sent as soon as the server settles the call; recording continues
+  const [earlyVerdict, setEarlyVerdict] = useState<{
+    combined_score?: number;
+    verdict?: string;
+    recommendation?: string;
+    early_verdict?: { reason: string; after_verdict: string; upstream_calls_saved: number };
+  } | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [audioLevel, setAudioLevel] = useState(0);
   const streamRef = useRef<MediaStream | null>(null);
@@ -104,6 +114,7 @@ export function useStream() {
     setError(null);
     setPartialResults([]);
     setFinalResult(null);
+    setEarlyVerdict(null);
     intentionalCloseRef.current = false;
 
     try {
@@ -172,6 +183,8 @@ export function useStream() {
 
           if (data.type === "partial_result") {
             setPartialResults((prev) => [...prev, data]);
+          } else if (data.type === "early_final_result") {
+            setEarlyVerdict(data);
           } else if (data.type === "final_result") {
             setFinalResult(data);
             setIsProcessingFinal(false);
@@ -250,9 +263,10 @@ export function useStream() {
   const clearStream = useCallback(() => {
     setPartialResults([]);
     setFinalResult(null);
+    setEarlyVerdict(null);
     setIsProcessingFinal(false);
     setError(null);
   }, []);
 
-  return { isRecording, isProcessingFinal, partialResults, finalResult, error, audioLevel, startRecording, stopRecording, clearStream };
+  return { isRecording, isProcessingFinal, partialResults, finalResult, earlyVerdict, error, audioLevel, startRecording, stopRecording, clearStream };
 }
@@ -18,6 +18,14 @@ export interface AnalysisResult {
   review_reason?: string;
 }
 
+export interface ReportTiming {
+  audio_ms?: number | null;
+  text_ms?: number | null;
+  speculative_saving_ms?: number | null;
+  speculative_saving_p50_ms?: number | null;
+  speculative_saving_p95_ms?: number | null;
+}
+
 export interface ScamReport {
   id: string;
   mode: "audio" | "text" | "stream";
@@ -27,6 +35,8 @@ export interface ScamReport {
   processing_time_ms: number;
   review_required?: boolean;
   review_reason?: string;
+  timing?: ReportTiming | null;
+  decision_source?: string;
   analyzed_at?: string;
 }
 
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Microbenchmark the live-stream silence check.
+
+Compares the current NumPy, header-aware is_silent with the previous
+struct.unpack + Python sum implementation on typical stream chunks
+(16-bit mono, 16 kHz by default).
+
+Usage:
+    python scripts/benchmark_is_silent.py
+    python scripts/benchmark_is_silent.py --seconds 5 --repeat 200
+"""
+
+import argparse
+import io
+import os
+import struct
+import sys
+import time
+import wave
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(ROOT), "backend"))
+
+from services.stream_processor import is_silent  # noqa: E402
+
+
+def legacy_is_silent(audio_bytes: bytes, threshold=500) -> bool:
+    """The implementation this replaced, kept for comparison."""
+    pcm_data = audio_bytes[44:]
+    if len(pcm_data) < 2:
+        return True
+    try:
+        num_samples = len(pcm_data) // 2
+        samples = struct.unpack(f"<{num_samples}h", pcm_data[:num_samples * 2])
+        rms = (sum(s * s for s in samples) / num_samples) ** 0.5
+        return rms < threshold
+    except (struct.error, ValueError):
+        return True
+
+
+def _chunk(seconds: float, rate: int) -> bytes:
+    samples = (np.random.default_rng(0).standard_normal(int(seconds * rate)) * 3000).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+def _time_us(fn, chunk: bytes, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(chunk)
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark is_silent per-chunk cost")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[1.0, 5.0], help="Chunk lengths to time")
+    parser.add_argument("--rate", type=int, default=16000, help="Sample rate (Hz)")
+    parser.add_argument("--repeat", type=int, default=100, help="Calls per measurement")
+    args = parser.parse_args()
+
+    print(f"{'chunk':>8}  {'legacy (us)':>12}  {'numpy (us)':>11}  {'speed-up':>8}")
+    for seconds in args.seconds:
+        chunk = _chunk(seconds, args.rate)
+        assert legacy_is_silent(chunk) == is_silent(chunk)
+        before = _time_us(legacy_is_silent, chunk, args.repeat)
+        after = _time_us(is_silent, chunk, args.repeat)
+        print(f"{seconds:>7.1f}s  {before:>12.1f}  {after:>11.1f}  {before / after:>7.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark the local transcript classifier against the LLM path.
+
+For every transcript the local model is timed and its cascade decision
+(scam / safe / uncertain) recorded. Decisions are compared with a reference:
+- by default the expected verdicts of the labelled set
+- with --llm, live Mistral Large verdicts (needs MISTRAL_API_KEY), which
+  also measures LLM latency
+
+The bundled scenarios are the classifier's training data; pass --data with a
+held-out JSONL file of {"transcript", "verdict"} rows to measure agreement on
+unseen calls.
+
+Usage:
+    python scripts/benchmark_local_classifier.py
+    python scripts/benchmark_local_classifier.py --data held_out.jsonl --llm
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(ROOT), "backend"))
+sys.path.insert(0, ROOT)
+
+from train_local_classifier import load_examples  # noqa: E402
+from config import LOCAL_SCAM_THRESHOLD, LOCAL_SAFE_THRESHOLD  # noqa: E402
+from services.local_classifier import DEFAULT_MODEL_PATH, LocalClassifier  # noqa: E402
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _load_data(path: str) -> List[Tuple[str, str]]:
+    if not path:
+        return load_examples()
+    with open(path) as f:
+        return [(row["transcript"], row["verdict"]) for row in map(json.loads, filter(str.strip, f))]
+
+
+async def _llm_verdict(transcript: str) -> Tuple[Optional[str], float]:
+    from services import upstream
+    from services.text_analyzer import analyze_transcript
+    from services.response_formatter import parse_analysis_result
+
+    t0 = time.perf_counter()
+    try:
+        result = parse_analysis_result(await analyze_transcript(transcript))
+        verdict = result.verdict.value
+    except Exception as e:
+        print(f"  LLM call failed: {e}")
+        verdict = None
+    finally:
+        elapsed = (time.perf_counter() - t0) * 1000
+    await upstream.shutdown()
+    return verdict, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the local classifier against the LLM path")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Model file (.npz)")
+    parser.add_argument("--data", default="", help="JSONL of {transcript, verdict}; default: bundled set")
+    parser.add_argument("--llm", action="store_true", help="Use live Mistral Large verdicts as the reference")
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions per transcript")
+    parser.add_argument("--scam-threshold", type=float, default=LOCAL_SCAM_THRESHOLD, dest="scam_threshold")
+    parser.add_argument("--safe-threshold", type=float, default=LOCAL_SAFE_THRESHOLD, dest="safe_threshold")
+    args = parser.parse_args()
+
+    model = LocalClassifier.load(args.model, scam_threshold=args.scam_threshold, safe_threshold=args.safe_threshold)
+    if model is None:
+        print(f"No model at {args.model}; run scripts/train_local_classifier.py first")
+        return 1
+
+    examples = _load_data(args.data)
+    local_us, llm_ms = [], []
+    decided = agreed = llm_agreed = llm_total = 0
+
+    for transcript, expected in examples:
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            p = model.predict_proba(transcript)
+        local_us.append((time.perf_counter() - t0) / args.repeat * 1e6)
+
+        reference = expected
+        if args.llm:
+            verdict, elapsed = asyncio.run(_llm_verdict(transcript))
+            if verdict is not None:
+                llm_ms.append(elapsed)
+                llm_total += 1
+                llm_agreed += int((verdict == "SAFE") == (expected == "SAFE"))
+                reference = verdict
+
+        if p >= args.scam_threshold or p <= args.safe_threshold:
+            decided += 1
+            local_scam = p >= args.scam_threshold
+            agreed += int(local_scam == (reference != "SAFE"))
+            decision = "scam" if local_scam else "safe"
+        else:
+            decision = "uncertain"
+        print(f"  p={p:.3f}  {decision:<9}  reference={reference}")
+
+    print()
+    print(f"Transcripts           : {len(examples)}")
+    print(f"Local latency (us)    : p50={_percentile(local_us, 50):.1f}  p95={_percentile(local_us, 95):.1f}")
+    print(f"Answered locally      : {decided}/{len(examples)} = {decided / len(examples):.2%}")
+    if decided:
+        print(f"Agreement when decided: {agreed}/{decided} = {agreed / decided:.2%}")
+    if llm_ms:
+        print(f"LLM latency (ms)      : p50={statistics.median(llm_ms):.0f}  p95={_percentile(llm_ms, 95):.0f}")
+        print(f"LLM binary accuracy   : {llm_agreed}/{llm_total}")
+        print(f"Speed-up on decided   : {statistics.median(llm_ms) * 1000 / statistics.median(local_us):.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Train the local hashed n-gram transcript classifier.
+
+Bootstraps from the evaluation scenarios in scripts/run_evaluation.py and the
+demo transcripts in demo/sample_calls (labelled by demo/expected_outputs).
+More labelled data can be added as JSON lines of {"transcript", "verdict"}.
+Any verdict other than SAFE is a positive (scam) label.
+
+Usage:
+    python scripts/train_local_classifier.py
+    python scripts/train_local_classifier.py --extra labelled_calls.jsonl
+    python scripts/train_local_classifier.py --cv          # leave-one-out accuracy only
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_evaluation import SCENARIOS  # noqa: E402
+from services.local_classifier import DEFAULT_BUCKETS, DEFAULT_MODEL_PATH, train  # noqa: E402
+
+DEMO_DIR = os.path.join(ROOT, "demo")
+
+
+def load_examples(extra_path: str = "") -> List[Tuple[str, str]]:
+    """Return (transcript, verdict) pairs from every bundled source."""
+    examples = [(transcript, expected) for _, _, expected, transcript in SCENARIOS]
+
+    samples_dir = os.path.join(DEMO_DIR, "sample_calls")
+    for fname in sorted(os.listdir(samples_dir)):
+        if not fname.endswith("_transcript.txt"):
+            continue
+        output_path = os.path.join(DEMO_DIR, "expected_outputs", fname[: -len("_transcript.txt")] + ".json")
+        if not os.path.exists(output_path):
+            continue
+        with open(output_path) as f:
+            report = json.load(f)
+        analysis = report.get("text_analysis") or report.get("audio_analysis") or {}
+        with open(os.path.join(samples_dir, fname)) as f:
+            examples.append((f.read(), analysis.get("verdict", "SAFE")))
+
+    if extra_path:
+        with open(extra_path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    examples.append((row["transcript"], row["verdict"]))
+    return examples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Train the CallShield local transcript classifier")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH, help="Model file to write (.npz)")
+    parser.add_argument("--extra", default="", help="JSONL file of additional {transcript, verdict} rows")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS, help="Hash buckets (default: 16384)")
+    parser.add_argument("--epochs", type=int, default=1000)
+    parser.add_argument("--learning-rate", type=float, default=20.0, dest="learning_rate")
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--cv", action="store_true", help="Report leave-one-out accuracy and exit")
+    args = parser.parse_args()
+
+    examples = load_examples(args.extra)
+    transcripts = [t for t, _ in examples]
+    labels = [0 if verdict == "SAFE" else 1 for _, verdict in examples]
+    params = dict(buckets=args.buckets, epochs=args.epochs, learning_rate=args.learning_rate, l2=args.l2)
+    print(f"{len(examples)} examples ({sum(labels)} scam, {len(labels) - sum(labels)} safe)")
+
+    if args.cv:
+        correct = 0
+        for i in range(len(examples)):
+            model = train(transcripts[:i] + transcripts[i + 1:], labels[:i] + labels[i + 1:], **params)
+            p = model.predict_proba(transcripts[i])
+            correct += int((p >= 0.5) == bool(labels[i]))
+            print(f"  {i:>3}  label={labels[i]}  p={p:.3f}")
+        print(f"Leave-one-out accuracy: {correct}/{len(examples)} = {correct / len(examples):.2%}")
+        return 0
+
+    model = train(transcripts, labels, **params)
+    model.save(args.output)
+    train_correct = sum(int((model.predict_proba(t) >= 0.5) == bool(y)) for t, y in zip(transcripts, labels))
+    print(f"Training accuracy: {train_correct}/{len(examples)}")
+    print(f"Model written to {args.output} ({os.path.getsize(args.output)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())